@@ -222,6 +222,18 @@ pypy_optiondescription = OptionDescription("objspace", "Object Space Options", [
         BoolOption("withstrbuf", "use strings optimized for addition (ver 2)",
                    default=False),
 
+        BoolOption("withstrbuilder",
+                   "use a builder for strings extended by repeated +=",
+                   default=False),
+
+        BoolOption("withunboxedattrs",
+                   "store int and float instance attributes unboxed",
+                   default=False),
+
+        BoolOption("withjsonkeysharing",
+                   "make the objects decoded by json share their keys",
+                   default=False),
+
         BoolOption("withspecialisedtuple",
                    "use specialised tuples",
                    default=False),
@@ -213,6 +213,7 @@ def get_additional_entrypoints(space, w_initstdio):
 class PyPyTarget(object):
 
     usage = SUPPRESS_USAGE
+    space = None
 
     take_options = True
 
@@ -360,6 +361,7 @@ class PyPyTarget(object):
 
     def get_entry_point(self, config):
         space = make_objspace(config)
+        self.space = space
 
         # manually imports app_main.py
         filename = os.path.join(pypydir, 'interpreter', 'app_main.py')
@@ -370,9 +372,15 @@ class PyPyTarget(object):
 
         return entry_point, None, PyPyAnnotatorPolicy()
 
+    def get_gchooks(self):
+        from pypy.module.gc.hook import LowLevelGcHooks
+        if self.space is None:
+            raise Exception("get_gchooks must be called after get_entry_point")
+        return self.space.fromcache(LowLevelGcHooks)
+
     def interface(self, ns):
         for name in ['take_options', 'handle_config', 'print_help', 'target',
-                     'jitpolicy', 'get_entry_point',
+                     'jitpolicy', 'get_entry_point', 'get_gchooks',
                      'get_additional_config_options']:
             ns[name] = getattr(self, name)
 
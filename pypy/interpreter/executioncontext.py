@@ -404,7 +404,8 @@ class AbstractActionFlag(object):
         self._periodic_actions = []
         self._nonperiodic_actions = []
         self.has_bytecode_counter = False
-        self.fired_actions = None
+        self._fired_actions_first = None
+        self._fired_actions_last = None
         # the default value is not 100, unlike CPython 2.7, but a much
         # larger value, because we use a technique that not only allows
         # but actually *forces* another thread to run whenever the counter
@@ -412,13 +413,18 @@ class AbstractActionFlag(object):
         self.checkinterval_scaled = 10000 * TICK_COUNTER_STEP
         self._rebuild_action_dispatcher()
 
+    @rgc.no_collect
     def fire(self, action):
-        """Request for the action to be run before the next opcode."""
+        """Request for the action to be run before the next opcode.
+        Does not allocate, so that it can be called from the GC hooks."""
         if not action._fired:
             action._fired = True
-            if self.fired_actions is None:
-                self.fired_actions = []
-            self.fired_actions.append(action)
+            # the fired actions form a linked list, in order of firing
+            if self._fired_actions_first is None:
+                self._fired_actions_first = action
+            else:
+                self._fired_actions_last._next = action
+            self._fired_actions_last = action
             # set the ticker to -1 in order to force action_dispatcher()
             # to run at the next possible bytecode
             self.reset_ticker(-1)
@@ -466,9 +472,10 @@ class AbstractActionFlag(object):
                 action.perform(ec, frame)
 
             # nonperiodic actions
-            list = self.fired_actions
-            if list is not None:
-                self.fired_actions = None
+            action = self._fired_actions_first
+            if action is not None:
+                self._fired_actions_first = None
+                self._fired_actions_last = None
                 # NB. in case there are several actions, we reset each
                 # 'action._fired' to false only when we're about to call
                 # 'action.perform()'.  This means that if
@@ -476,9 +483,12 @@ class AbstractActionFlag(object):
                 # the corresponding perform(), the fire() has no
                 # effect---which is the effect we want, because
                 # perform() will be called anyway.
-                for action in list:
+                while action is not None:
+                    next_action = action._next
+                    action._next = None
                     action._fired = False
                     action.perform(ec, frame)
+                    action = next_action
 
         self.action_dispatcher = action_dispatcher
 
@@ -511,6 +521,7 @@ class AsyncAction(object):
     to occur between two opcodes, not at a completely random time.
     """
     _fired = False
+    _next = None
 
     def __init__(self, space):
         self.space = space
@@ -5,6 +5,8 @@ from rpython.rlib import rfloat, runicode
 from rpython.rtyper.lltypesystem import lltype, rffi
 from pypy.interpreter.error import oefmt
 from pypy.interpreter import unicodehelper
+from pypy.objspace.std.keysharingdict import (
+    KeyMapTerminator, new_key_sharing_dict)
 
 OVF_DIGITS = len(str(sys.maxint))
 
@@ -56,10 +58,16 @@ class JSONDecoder(object):
         self.end_ptr = lltype.malloc(rffi.CCHARPP.TO, 1, flavor='raw')
         self.pos = 0
         self.last_type = TYPE_UNKNOWN
+        # with withjsonkeysharing, the objects decoded from the same string
+        # share their keys if they have the same keys in the same order
+        self.keymap_root = None
 
     def close(self):
         rffi.free_charp(self.ll_chars)
         lltype.free(self.end_ptr, flavor='raw')
+        if self.keymap_root is not None:
+            # adding keys to the decoded objects must not grow the tree
+            self.keymap_root.stop_growing()
 
     def getslice(self, start, end):
         assert start >= 0
@@ -248,13 +256,18 @@ class JSONDecoder(object):
 
     def decode_object(self, i):
         start = i
-        w_dict = self.space.newdict()
         #
         i = self.skip_whitespace(i)
         if self.ll_chars[i] == '}':
             self.pos = i+1
-            return w_dict
+            return self.space.newdict()
         #
+        if self.space.config.objspace.std.withjsonkeysharing:
+            if self.keymap_root is None:
+                self.keymap_root = KeyMapTerminator()
+            w_dict = new_key_sharing_dict(self.space, self.keymap_root)
+        else:
+            w_dict = self.space.newdict()
         while True:
             # parse a key: value
             self.last_type = TYPE_UNKNOWN
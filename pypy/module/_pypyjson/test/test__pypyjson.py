@@ -167,7 +167,12 @@ class AppTest(object):
     def test_decode_object_nonstring_key(self):
         import _pypyjson
         raises(ValueError, "_pypyjson.loads('{42: 43}')")
-        
+
+    def test_decode_object_no_shared_keys(self):
+        import _pypyjson, __pypy__
+        d = _pypyjson.loads('{"a": 1, "b": 2}')
+        assert __pypy__.strategy(d) == "UnicodeDictStrategy"
+
     def test_decode_array(self):
         import _pypyjson
         assert _pypyjson.loads('[]') == []
@@ -231,3 +236,40 @@ class AppTest(object):
         for inputtext, errmsg in test_cases:
             exc = raises(ValueError, _pypyjson.loads, inputtext)
             assert str(exc.value) == errmsg
+
+
+class AppTestKeySharing(object):
+    spaceconfig = {"objspace.usemodules._pypyjson": True,
+                   "objspace.std.withjsonkeysharing": True}
+
+    def test_decode_object_shared_keys(self):
+        import _pypyjson, __pypy__
+        s = '[{"a": 1, "b": 2}, {"a": 3, "b": 4}, {"b": 5, "a": 6}]'
+        l = _pypyjson.loads(s)
+        assert l == [{'a': 1, 'b': 2}, {'a': 3, 'b': 4}, {'a': 6, 'b': 5}]
+        for d in l:
+            assert __pypy__.strategy(d) == "KeySharingDictStrategy"
+        assert l[2].keys() == ['b', 'a']
+        assert _pypyjson.loads('{"a": 1, "b": 2, "a": 3}') == {'a': 3, 'b': 2}
+        d = l[1]
+        d['x'] = 43
+        assert __pypy__.strategy(d) == "ObjectDictStrategy"
+        assert d == {'a': 3, 'b': 4, 'x': 43}
+        assert l[2]['a'] == 6
+
+    def test_no_new_keys_after_decoding(self):
+        import _pypyjson, __pypy__
+        l = _pypyjson.loads('[{"a": 1, "b": 2}, {"a": 3}, {"b": 4}]')
+        d = l[1]
+        d[u'b'] = 5
+        # the map for a, b was made while decoding, and can be used
+        assert __pypy__.strategy(d) == "KeySharingDictStrategy"
+        assert d == {'a': 3, 'b': 5}
+        d = l[0]
+        d[u'c'] = 7
+        assert __pypy__.strategy(d) == "UnicodeDictStrategy"
+        assert d == {'a': 1, 'b': 2, 'c': 7}
+        assert l[1] == {'a': 3, 'b': 5}
+        del l[2][u'b']
+        assert __pypy__.strategy(l[2]) == "UnicodeDictStrategy"
+        assert l[2] == {}
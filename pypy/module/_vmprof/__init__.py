@@ -10,6 +10,8 @@ class Module(MixedModule):
 
     interpleveldefs = {
         'enable': 'interp_vmprof.enable',
+        'enable_allocation_sampling':
+                            'interp_vmprof.enable_allocation_sampling',
         'disable': 'interp_vmprof.disable',
         'write_all_code_objects': 'interp_vmprof.write_all_code_objects',
         'VMProfError': 'space.fromcache(interp_vmprof.Cache).w_VMProfError',
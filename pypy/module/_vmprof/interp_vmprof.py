@@ -69,6 +69,19 @@ def enable(space, fileno, period):
     except rvmprof.VMProfError as e:
         raise VMProfError(space, e)
 
+@unwrap_spec(fileno=int, period=int)
+def enable_allocation_sampling(space, fileno, period):
+    """Enable vmprof in allocation sampling mode.  Writes go to the given
+    'fileno', like enable(), and use the same format.  Instead of a
+    sample every 'interval' seconds, the stack is sampled each time
+    'period' bytes have been allocated in the nursery of the GC: the
+    profile shows which code allocates the most memory.
+    """
+    try:
+        rvmprof.enable_alloc(fileno, period)
+    except rvmprof.VMProfError as e:
+        raise VMProfError(space, e)
+
 def write_all_code_objects(space):
     """ Needed on cpython, just empty function here
     """
@@ -82,3 +82,19 @@ class AppTestVMProf(object):
         raises(_vmprof.VMProfError, _vmprof.enable, 2, 1e300 * 1e300)
         NaN = (1e300*1e300) / (1e300*1e300)
         raises(_vmprof.VMProfError, _vmprof.enable, 2, NaN)
+
+    def test_enable_allocation_sampling(self):
+        import _vmprof
+        tmpfile = open(self.tmpfilename, 'wb')
+        _vmprof.enable_allocation_sampling(tmpfile.fileno(), 4096)
+        raises(_vmprof.VMProfError, _vmprof.enable, tmpfile.fileno(), 0.01)
+        exec """def foo3():
+            pass
+        """ in {}
+        _vmprof.disable()
+        tmpfile.close()
+        s = open(self.tmpfilename, 'rb').read()
+        assert "py:foo3:" in s
+        assert s.endswith('\x03')
+        raises(_vmprof.VMProfError, _vmprof.disable)
+        raises(_vmprof.VMProfError, _vmprof.enable_allocation_sampling, 2, 0)
@@ -4,6 +4,12 @@ from pypy.interpreter.mixedmodule import MixedModule
 class Module(MixedModule):
     interpleveldefs = {
         'collect': 'interp_gc.collect',
+        'collect_step': 'interp_gc.collect_step',
+        'get_stats': 'interp_gc.get_stats',
+        'hooks': 'space.fromcache(hook.W_AppLevelHooks)',
+        'GcCollectStepStats': 'hook.W_GcCollectStepStats',
+        'GcCollectStats': 'hook.W_GcCollectStats',
+        'GcMinorStats': 'hook.W_GcMinorStats',
         'enable': 'interp_gc.enable',
         'disable': 'interp_gc.disable',
         'isenabled': 'interp_gc.isenabled',
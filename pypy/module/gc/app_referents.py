@@ -2,7 +2,7 @@
 
 import gc
 
-def dump_rpy_heap(file):
+def dump_rpy_heap(file, write_classes=False):
     """Write a full dump of the objects in the heap to the given file
     (which can be a file, a file name, or a file descritor).
     Format for each object (each item is one machine word):
@@ -17,12 +17,24 @@ def dump_rpy_heap(file):
 
     If the argument is a filename and the 'zlib' module is available,
     we also write 'typeids.txt' and 'typeids.lst' in the same directory,
-    if they don't already exist.
+    if they don't already exist.  If the argument is a filename and
+    'write_classes' is true, we also write the names of the app-level
+    classes to '<filename>.classes', for pypy/tool/gcdiff.py.  This
+    costs a full collection, and it takes the id() of every class,
+    which keeps the classes from being moved by a compacting GC.
     """
     if isinstance(file, str):
+        if write_classes:
+            class_names = _get_class_names()
+            gc.collect()    # move the young classes to their id() address
         f = open(file, 'wb')
         gc._dump_rpy_heap(f.fileno())
         f.close()
+        if write_classes:
+            f = open(file + '.classes', 'w')
+            for line in class_names:
+                f.write(line)
+            f.close()
         try:
             import zlib, os
         except ImportError:
@@ -48,3 +60,20 @@ def dump_rpy_heap(file):
                 file.flush()
             fd = file.fileno()
         gc._dump_rpy_heap(fd)
+
+def _get_class_names():
+    # For each new-style class, a line 'id name'.  The id of an object is
+    # also its address in the dump, as long as the object is not young.
+    lines = []
+    seen = set()
+    pending = [object]
+    while pending:
+        cls = pending.pop()
+        if id(cls) in seen:
+            continue
+        seen.add(id(cls))
+        lines.append('%d %s.%s\n' % (id(cls),
+                                     getattr(cls, '__module__', '?'),
+                                     cls.__name__))
+        pending.extend(type.__subclasses__(cls))
+    return lines
@@ -0,0 +1,316 @@
+from rpython.memory.gc.hook import GcHooks
+from rpython.memory.gc import incminimark
+from rpython.rlib.rarithmetic import intmask
+from rpython.rlib import rvmprof
+from pypy.interpreter.baseobjspace import W_Root
+from pypy.interpreter.error import OperationError
+from pypy.interpreter.gateway import interp2app
+from pypy.interpreter.typedef import TypeDef, interp_attrproperty, GetSetProperty
+from pypy.interpreter.executioncontext import AsyncAction
+
+class LowLevelGcHooks(GcHooks):
+    """
+    These are the low-level hooks which are called directly from the GC.
+
+    They can't do much, because the base class marks the methods as
+    @rgc.no_collect: they only update the statistics stored in the
+    corresponding AsyncAction and fire it.  The app-level callbacks are
+    then called by the action, outside of the GC.
+
+    This is expected to be a singleton, created by space.fromcache, and it
+    is integrated with the translation by targetpypystandalone.get_gchooks.
+    """
+
+    def __init__(self, space):
+        self.space = space
+        self.w_hooks = space.fromcache(W_AppLevelHooks)
+
+    def is_gc_minor_enabled(self):
+        return self.w_hooks.gc_minor_enabled
+
+    def is_gc_collect_step_enabled(self):
+        return self.w_hooks.gc_collect_step_enabled
+
+    def is_gc_collect_enabled(self):
+        return self.w_hooks.gc_collect_enabled
+
+    def is_gc_alloc_sample_enabled(self):
+        # the GC takes allocation samples only after
+        # _vmprof.enable_allocation_sampling()
+        return self.space.config.objspace.usemodules._vmprof
+
+    def on_gc_minor(self, duration, total_memory_used, pinned_objects,
+                    surviving_size):
+        action = self.w_hooks.gc_minor
+        action.record_duration(duration)
+        action.total_memory_used = intmask(total_memory_used)
+        action.pinned_objects = pinned_objects
+        action.surviving_size += surviving_size
+        action.fire()
+
+    def on_gc_collect_step(self, duration, oldstate, newstate):
+        action = self.w_hooks.gc_collect_step
+        action.record_duration(duration)
+        action.oldstate = oldstate
+        action.newstate = newstate
+        action.fire()
+
+    def on_gc_collect(self, num_major_collects,
+                      arenas_count_before, arenas_count_after,
+                      arenas_bytes, rawmalloc_bytes_before,
+                      rawmalloc_bytes_after):
+        action = self.w_hooks.gc_collect
+        action.count += 1
+        action.num_major_collects = num_major_collects
+        action.arenas_count_before = arenas_count_before
+        action.arenas_count_after = arenas_count_after
+        action.arenas_bytes = intmask(arenas_bytes)
+        action.rawmalloc_bytes_before = intmask(rawmalloc_bytes_before)
+        action.rawmalloc_bytes_after = intmask(rawmalloc_bytes_after)
+        action.fire()
+
+    def on_gc_alloc_sample(self, size):
+        if self.space.config.objspace.usemodules._vmprof:
+            rvmprof.sample_stack_now()
+
+
+class W_AppLevelHooks(W_Root):
+
+    def __init__(self, space):
+        self.space = space
+        self.gc_minor_enabled = False
+        self.gc_collect_step_enabled = False
+        self.gc_collect_enabled = False
+        self.gc_minor = GcMinorHookAction(space)
+        self.gc_collect_step = GcCollectStepHookAction(space)
+        self.gc_collect = GcCollectHookAction(space)
+
+    def descr_get_on_gc_minor(self, space):
+        return self.gc_minor.w_callable
+
+    def descr_set_on_gc_minor(self, space, w_obj):
+        self.gc_minor_enabled = not space.is_none(w_obj)
+        self.gc_minor.w_callable = w_obj
+        self.gc_minor.reset()
+
+    def descr_get_on_gc_collect_step(self, space):
+        return self.gc_collect_step.w_callable
+
+    def descr_set_on_gc_collect_step(self, space, w_obj):
+        self.gc_collect_step_enabled = not space.is_none(w_obj)
+        self.gc_collect_step.w_callable = w_obj
+        self.gc_collect_step.reset()
+
+    def descr_get_on_gc_collect(self, space):
+        return self.gc_collect.w_callable
+
+    def descr_set_on_gc_collect(self, space, w_obj):
+        self.gc_collect_enabled = not space.is_none(w_obj)
+        self.gc_collect.w_callable = w_obj
+        self.gc_collect.reset()
+
+    def descr_set(self, space, w_obj):
+        """set(obj): install the hooks found as the attributes on_gc_minor,
+        on_gc_collect_step and on_gc_collect of 'obj'.  Missing attributes
+        disable the corresponding hook."""
+        w_a = space.findattr(w_obj, space.newtext('on_gc_minor'))
+        w_b = space.findattr(w_obj, space.newtext('on_gc_collect_step'))
+        w_c = space.findattr(w_obj, space.newtext('on_gc_collect'))
+        self.descr_set_on_gc_minor(space, w_a or space.w_None)
+        self.descr_set_on_gc_collect_step(space, w_b or space.w_None)
+        self.descr_set_on_gc_collect(space, w_c or space.w_None)
+
+    def descr_reset(self, space):
+        """reset(): disable all the hooks."""
+        self.descr_set_on_gc_minor(space, space.w_None)
+        self.descr_set_on_gc_collect_step(space, space.w_None)
+        self.descr_set_on_gc_collect(space, space.w_None)
+
+
+class GcHookAction(AsyncAction):
+    """Base class for the actions firing the app-level hooks.  The GC
+    can run several times before the action is performed: the statistics
+    are accumulated in the action and passed to the callback in a single
+    batch, whose size is given by 'count'.  The callback is not invoked
+    recursively if it triggers the GC itself; the statistics are then
+    reported in the next batch.
+    """
+    in_callback = False
+
+    def __init__(self, space):
+        AsyncAction.__init__(self, space)
+        self.w_callable = space.w_None
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.duration = 0.0
+        self.duration_min = 0.0
+        self.duration_max = 0.0
+
+    def record_duration(self, duration):
+        if self.count == 0 or duration < self.duration_min:
+            self.duration_min = duration
+        if duration > self.duration_max:
+            self.duration_max = duration
+        self.count += 1
+        self.duration += duration
+
+    def perform(self, ec, frame):
+        if (self.in_callback or self.count == 0 or
+                self.space.is_none(self.w_callable)):
+            return
+        w_stats = self.make_stats()
+        self.reset()
+        self.in_callback = True
+        try:
+            try:
+                self.space.call_function(self.w_callable, w_stats)
+            except OperationError as e:
+                e.write_unraisable(self.space, "GC hook ", self.w_callable)
+        finally:
+            self.in_callback = False
+
+
+class GcMinorHookAction(GcHookAction):
+    total_memory_used = 0
+    pinned_objects = 0
+    surviving_size = 0
+
+    def reset(self):
+        GcHookAction.reset(self)
+        self.surviving_size = 0
+
+    def make_stats(self):
+        return W_GcMinorStats(
+            self.count,
+            self.duration,
+            self.duration_min,
+            self.duration_max,
+            self.total_memory_used,
+            self.pinned_objects,
+            self.surviving_size)
+
+
+class GcCollectStepHookAction(GcHookAction):
+    oldstate = 0
+    newstate = 0
+
+    def make_stats(self):
+        return W_GcCollectStepStats(
+            self.count,
+            self.duration,
+            self.duration_min,
+            self.duration_max,
+            self.oldstate,
+            self.newstate)
+
+
+class GcCollectHookAction(GcHookAction):
+    num_major_collects = 0
+    arenas_count_before = 0
+    arenas_count_after = 0
+    arenas_bytes = 0
+    rawmalloc_bytes_before = 0
+    rawmalloc_bytes_after = 0
+
+    def make_stats(self):
+        return W_GcCollectStats(
+            self.count,
+            self.num_major_collects,
+            self.arenas_count_before,
+            self.arenas_count_after,
+            self.arenas_bytes,
+            self.rawmalloc_bytes_before,
+            self.rawmalloc_bytes_after)
+
+
+class W_GcMinorStats(W_Root):
+
+    def __init__(self, count, duration, duration_min, duration_max,
+                 total_memory_used, pinned_objects, surviving_size):
+        self.count = count
+        self.duration = duration
+        self.duration_min = duration_min
+        self.duration_max = duration_max
+        self.total_memory_used = total_memory_used
+        self.pinned_objects = pinned_objects
+        self.surviving_size = surviving_size
+
+
+class W_GcCollectStepStats(W_Root):
+
+    def __init__(self, count, duration, duration_min, duration_max,
+                 oldstate, newstate):
+        self.count = count
+        self.duration = duration
+        self.duration_min = duration_min
+        self.duration_max = duration_max
+        self.oldstate = oldstate
+        self.newstate = newstate
+
+
+class W_GcCollectStats(W_Root):
+
+    def __init__(self, count, num_major_collects,
+                 arenas_count_before, arenas_count_after,
+                 arenas_bytes, rawmalloc_bytes_before,
+                 rawmalloc_bytes_after):
+        self.count = count
+        self.num_major_collects = num_major_collects
+        self.arenas_count_before = arenas_count_before
+        self.arenas_count_after = arenas_count_after
+        self.arenas_bytes = arenas_bytes
+        self.rawmalloc_bytes_before = rawmalloc_bytes_before
+        self.rawmalloc_bytes_after = rawmalloc_bytes_after
+
+
+# just a shortcut to make the typedefs shorter
+def stats_typedef(name, cls, int_names, float_names=(), **consts):
+    d = consts
+    for attrname in int_names:
+        d[attrname] = interp_attrproperty(attrname, cls=cls, wrapfn="newint")
+    for attrname in float_names:
+        d[attrname] = interp_attrproperty(attrname, cls=cls,
+                                          wrapfn="newfloat")
+    typedef = TypeDef(name, **d)
+    typedef.acceptable_as_base_class = False
+    return typedef
+
+W_AppLevelHooks.typedef = TypeDef(
+    "GcHooks",
+    on_gc_minor = GetSetProperty(
+        W_AppLevelHooks.descr_get_on_gc_minor,
+        W_AppLevelHooks.descr_set_on_gc_minor),
+
+    on_gc_collect_step = GetSetProperty(
+        W_AppLevelHooks.descr_get_on_gc_collect_step,
+        W_AppLevelHooks.descr_set_on_gc_collect_step),
+
+    on_gc_collect = GetSetProperty(
+        W_AppLevelHooks.descr_get_on_gc_collect,
+        W_AppLevelHooks.descr_set_on_gc_collect),
+
+    set = interp2app(W_AppLevelHooks.descr_set),
+    reset = interp2app(W_AppLevelHooks.descr_reset),
+    )
+W_AppLevelHooks.typedef.acceptable_as_base_class = False
+
+W_GcMinorStats.typedef = stats_typedef("GcMinorStats", W_GcMinorStats,
+    ["count", "total_memory_used", "pinned_objects", "surviving_size"],
+    ["duration", "duration_min", "duration_max"])
+
+W_GcCollectStepStats.typedef = stats_typedef("GcCollectStepStats",
+    W_GcCollectStepStats,
+    ["count", "oldstate", "newstate"],
+    ["duration", "duration_min", "duration_max"],
+    STATE_SCANNING = incminimark.STATE_SCANNING,
+    STATE_MARKING = incminimark.STATE_MARKING,
+    STATE_SWEEPING = incminimark.STATE_SWEEPING,
+    STATE_FINALIZING = incminimark.STATE_FINALIZING,
+    GC_STATES = tuple(incminimark.GC_STATES))
+
+W_GcCollectStats.typedef = stats_typedef("GcCollectStats", W_GcCollectStats,
+    ["count", "num_major_collects", "arenas_count_before",
+     "arenas_count_after", "arenas_bytes", "rawmalloc_bytes_before",
+     "rawmalloc_bytes_after"])
@@ -1,11 +1,20 @@
+from pypy.interpreter.baseobjspace import W_Root
 from pypy.interpreter.gateway import unwrap_spec
 from pypy.interpreter.error import oefmt
-from rpython.rlib import rgc
+from pypy.interpreter.typedef import (
+    TypeDef, interp_attrproperty, interp_attrproperty_w)
+from rpython.rlib import rgc, jit_hooks
+from rpython.rlib.objectmodel import we_are_translated
+from rpython.rlib.rarithmetic import intmask
+from rpython.memory.gc.minimarkpage import WORD
 
 
-@unwrap_spec(generation=int)
-def collect(space, generation=0):
-    "Run a full collection.  The optional argument is ignored."
+@unwrap_spec(generation=int, compact=bool)
+def collect(space, generation=0, compact=False):
+    """Run a full collection.  The optional 'generation' argument is
+    ignored.  If 'compact' is True, the surviving objects are then moved
+    out of sparsely used memory pages, so that these can be returned to
+    the OS."""
     # First clear the method and the map cache.
     # See test_gc for an example of why.
     from pypy.objspace.std.typeobject import MethodCache
@@ -15,7 +24,10 @@ def collect(space, generation=0):
     cache = space.fromcache(MapAttrCache)
     cache.clear()
 
-    rgc.collect()
+    if compact:
+        rgc.collect_and_compact()
+    else:
+        rgc.collect()
 
     # if we are running in gc.disable() mode but gc.collect() is called,
     # we should still call the finalizers now.  We do this as an attempt
@@ -38,6 +50,15 @@ def collect(space, generation=0):
 
     return space.newint(0)
 
+def collect_step(space):
+    """If the GC is incremental, run a single gc-collect-step.  Return True
+    when the step completes a major collection cycle.  Call it repeatedly
+    while the program is idle to do the major collection work at a time
+    of your choosing.  If the GC is not incremental, this runs a full
+    collection and returns True.
+    """
+    return space.newbool(rgc.collect_step())
+
 def enable(space):
     """Non-recursive version.  Enable finalizers now.
     If they were already enabled, no-op.
@@ -89,3 +110,118 @@ def dump_heap_stats(space, filename):
         f.write("%d %d " % (tb[i].count, tb[i].size))
         f.write(",".join([str(tb[i].links[j]) for j in range(len(tb))]) + "\n")
     f.close()
+
+# ____________________________________________________________
+
+class W_GcStats(W_Root):
+    def __init__(self, space):
+        self.max_pause_target = rgc.get_stats(rgc.MAX_PAUSE_TARGET)
+        self.last_pause = rgc.get_stats(rgc.LAST_PAUSE)
+        self.longest_pause = rgc.get_stats(rgc.LONGEST_PAUSE)
+        self.marking_step_budget = rgc.get_stats(rgc.MARKING_STEP_BUDGET)
+        self.sweeping_step_budget = rgc.get_stats(rgc.SWEEPING_STEP_BUDGET)
+        self.nursery_size = rgc.get_stats(rgc.NURSERY_SIZE)
+        self.nursery_used = rgc.get_stats(rgc.NURSERY_USED)
+        self.nursery_max_size = rgc.get_stats(rgc.NURSERY_MAX_SIZE)
+        self.nursery_survival_rate = (
+            rgc.get_stats(rgc.NURSERY_SURVIVAL_RATE) / 1000000.0)
+        self.num_nursery_resizes = rgc.get_stats(rgc.NUM_NURSERY_RESIZES)
+        self.arena_page_size = rgc.get_stats(rgc.ARENA_PAGE_SIZE)
+        self.arena_pages_used = rgc.get_stats(rgc.ARENA_PAGES_USED)
+        self.arena_pages_free = rgc.get_stats(rgc.ARENA_PAGES_FREE)
+        self.arena_bytes_retained = rgc.get_stats(rgc.ARENA_BYTES_RETAINED)
+        self.arena_bytes_released = rgc.get_stats(rgc.ARENA_BYTES_RELEASED)
+        self.rawmalloced_total = rgc.get_stats(rgc.RAWMALLOCED_TOTAL)
+        self.total_memory_used = rgc.get_stats(rgc.TOTAL_MEMORY_USED)
+        self.num_minor_collects = rgc.get_stats(rgc.NUM_MINOR_COLLECTS)
+        self.num_major_collects = rgc.get_stats(rgc.NUM_MAJOR_COLLECTS)
+        self.total_minor_time = rgc.get_stats(rgc.TOTAL_MINOR_TIME)
+        self.total_major_time = rgc.get_stats(rgc.TOTAL_MAJOR_TIME)
+        self.jit_code_allocated = 0
+        self.jit_code_used = 0
+        if space.config.translation.jit and we_are_translated():
+            self.jit_code_allocated = intmask(
+                jit_hooks.stats_asmmemmgr_allocated(None))
+            self.jit_code_used = intmask(jit_hooks.stats_asmmemmgr_used(None))
+        #
+        # one tuple (block_size, pages, used_blocks, total_blocks) for each
+        # size class of the arenas; the fragmentation of a size class is
+        # given by 1 - used_blocks / total_blocks
+        size_classes = []
+        num_size_classes = rgc.get_stats(rgc.NUM_SIZE_CLASSES)
+        for i in range(1, num_size_classes + 1):
+            pages = rgc.get_size_class_stats(i, rgc.SIZE_CLASS_PAGES)
+            if pages == 0:
+                continue
+            used = rgc.get_size_class_stats(i, rgc.SIZE_CLASS_USED_BLOCKS)
+            total = rgc.get_size_class_stats(i, rgc.SIZE_CLASS_TOTAL_BLOCKS)
+            size_classes.append(space.newtuple([
+                space.newint(i * WORD), space.newint(pages),
+                space.newint(used), space.newint(total)]))
+        self.w_size_classes = space.newlist(size_classes)
+
+def _stat(name, doc):
+    return interp_attrproperty(name, cls=W_GcStats, doc=doc, wrapfn="newint")
+
+W_GcStats.typedef = TypeDef("GcStats",
+    max_pause_target = _stat("max_pause_target",
+        "target pause time in microseconds (PYPY_GC_MAX_PAUSE), or 0"),
+    last_pause = _stat("last_pause",
+        "duration of the last pause in microseconds (soft real-time mode)"),
+    longest_pause = _stat("longest_pause",
+        "duration of the longest pause in microseconds (soft real-time mode)"),
+    marking_step_budget = _stat("marking_step_budget",
+        "bytes marked by a single major collection step"),
+    sweeping_step_budget = _stat("sweeping_step_budget",
+        "arena pages swept by a single major collection step"),
+    nursery_size = _stat("nursery_size", "size of the nursery in bytes"),
+    nursery_used = _stat("nursery_used",
+        "bytes currently allocated in the nursery"),
+    nursery_max_size = _stat("nursery_max_size",
+        "maximum size of the nursery in adaptive mode "
+        "(PYPY_GC_NURSERY_MAX), or 0"),
+    nursery_survival_rate = interp_attrproperty("nursery_survival_rate",
+        cls=W_GcStats, wrapfn="newfloat",
+        doc="adaptive mode: average fraction of the nursery surviving "
+            "a minor collection"),
+    num_nursery_resizes = _stat("num_nursery_resizes",
+        "adaptive mode: number of times the nursery was resized"),
+    arena_page_size = _stat("arena_page_size",
+        "size in bytes of the pages of the arenas"),
+    arena_pages_used = _stat("arena_pages_used",
+        "arena pages containing at least one object"),
+    arena_pages_free = _stat("arena_pages_free",
+        "arena pages allocated from the system but currently unused"),
+    arena_bytes_retained = _stat("arena_bytes_retained",
+        "bytes of empty arenas kept for reuse (PYPY_GC_ARENA_RETAIN)"),
+    arena_bytes_released = _stat("arena_bytes_released",
+        "total bytes of empty arenas returned to the OS so far"),
+    rawmalloced_total = _stat("rawmalloced_total",
+        "bytes of the large old objects allocated outside the arenas"),
+    total_memory_used = _stat("total_memory_used",
+        "bytes used by the old objects, both in and outside the arenas"),
+    num_minor_collects = _stat("num_minor_collects",
+        "number of minor collections done so far"),
+    num_major_collects = _stat("num_major_collects",
+        "number of major collections done so far"),
+    total_minor_time = _stat("total_minor_time",
+        "total time spent in minor collections, in microseconds "
+        "(counted from the first call to get_stats())"),
+    total_major_time = _stat("total_major_time",
+        "total time spent in major collection steps, in microseconds "
+        "(counted from the first call to get_stats())"),
+    jit_code_allocated = _stat("jit_code_allocated",
+        "bytes of raw memory allocated for the machine code of the JIT"),
+    jit_code_used = _stat("jit_code_used",
+        "bytes of the JIT machine code memory currently in use"),
+    size_classes = interp_attrproperty_w("w_size_classes", cls=W_GcStats,
+        doc="list of (block_size, pages, used_blocks, total_blocks) for "
+            "the non-empty size classes of the arenas"),
+    )
+W_GcStats.typedef.acceptable_as_base_class = False
+
+def get_stats(space):
+    """Return an object whose attributes are statistics about the GC.
+    The values are a snapshot taken at the time of the call.
+    """
+    return W_GcStats(space)
@@ -37,3 +37,21 @@ def test_interface_to_dump_rpy_heap_fd(space):
             gc.dump_rpy_heap(fd)""")
     except NotImplementedError:
         pass
+
+def test_interface_to_dump_rpy_heap_classes(space):
+    filename = str(udir.join('dump_rpy_heap.classes'))
+    try:
+        space.appexec([space.wrap(filename)], """(filename):
+            import gc
+            gc.dump_rpy_heap(filename)""")
+    except NotImplementedError:
+        pass
+    assert not os.path.exists(filename + '.classes')
+    try:
+        space.appexec([space.wrap(filename)], """(filename):
+            import gc
+            gc.dump_rpy_heap(filename, write_classes=True)""")
+    except NotImplementedError:
+        pass
+    else:
+        assert os.path.exists(filename + '.classes')
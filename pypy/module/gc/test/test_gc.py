@@ -7,6 +7,64 @@ class AppTestGC(object):
         gc.collect() # mostly a "does not crash" kind of test
         gc.collect(0) # mostly a "does not crash" kind of test
 
+    def test_collect_compact(self):
+        import gc
+        class A(object):
+            pass
+        lst = [A() for i in range(1000)]
+        for i, a in enumerate(lst):
+            a.x = i
+        keep = lst[::20]
+        h = hash(keep[3])
+        del lst, a
+        gc.collect(compact=True)
+        assert [a.x for a in keep] == range(0, 1000, 20)
+        assert hash(keep[3]) == h
+
+    def test_collect_step(self):
+        import gc, weakref
+        deleted = []
+        class X(object):
+            def __del__(self):
+                deleted.append(1)
+        class Y(object):
+            pass
+        X()
+        y = Y()
+        ref = weakref.ref(y)
+        del y
+        # repeated calls eventually complete a major collection cycle,
+        # which handles the garbage made before it started
+        n = 0
+        while not gc.collect_step():
+            n += 1
+            assert n < 1000
+        assert ref() is None
+        for i in range(100):      # the finalizers run as a periodic action
+            if deleted:
+                break
+        assert deleted == [1]
+
+    def test_get_stats(self):
+        import gc
+        stats = gc.get_stats()
+        for name in ['max_pause_target', 'last_pause', 'longest_pause',
+                     'marking_step_budget', 'sweeping_step_budget',
+                     'nursery_size', 'nursery_used', 'nursery_max_size',
+                     'num_nursery_resizes', 'arena_page_size',
+                     'arena_pages_used', 'arena_pages_free',
+                     'arena_bytes_retained', 'arena_bytes_released',
+                     'rawmalloced_total', 'total_memory_used',
+                     'num_minor_collects', 'num_major_collects',
+                     'total_minor_time', 'total_major_time',
+                     'jit_code_allocated', 'jit_code_used']:
+            assert isinstance(getattr(stats, name), int)
+        assert isinstance(stats.nursery_survival_rate, float)
+        assert isinstance(stats.size_classes, list)
+        for item in stats.size_classes:
+            block_size, pages, used_blocks, total_blocks = item
+            assert used_blocks <= total_blocks
+
     def test_disable_finalizers(self):
         import gc
 
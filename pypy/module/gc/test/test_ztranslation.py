@@ -1,4 +1,25 @@
+from rpython.rlib.rarithmetic import r_uint
+from rpython.rlib.nonconst import NonConstant
 from pypy.objspace.fake.checkmodule import checkmodule
+from pypy.module.gc.hook import LowLevelGcHooks
 
 def test_checkmodule():
-    checkmodule('gc')
+    # we need to ensure that the GC hooks are actually annotated, because
+    # they are normally seen only by the GC transformer
+    def extra_func(space):
+        gchooks = space.fromcache(LowLevelGcHooks)
+        w_hooks = gchooks.w_hooks
+        w_hooks.gc_minor_enabled = NonConstant(True)
+        w_hooks.gc_collect_step_enabled = NonConstant(True)
+        w_hooks.gc_collect_enabled = NonConstant(True)
+        gchooks.fire_gc_minor(NonConstant(0.0), NonConstant(r_uint(0)),
+                              NonConstant(0), NonConstant(0))
+        gchooks.fire_gc_collect_step(NonConstant(0.0), NonConstant(0),
+                                     NonConstant(0))
+        gchooks.fire_gc_collect(NonConstant(0), NonConstant(0),
+                                NonConstant(0), NonConstant(r_uint(0)),
+                                NonConstant(r_uint(0)), NonConstant(r_uint(0)))
+        w_hooks.gc_minor.perform(None, None)
+        w_hooks.gc_collect_step.perform(None, None)
+        w_hooks.gc_collect.perform(None, None)
+    checkmodule('gc', extra_func=extra_func)
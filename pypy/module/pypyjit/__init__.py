@@ -2,6 +2,8 @@ from pypy.interpreter.mixedmodule import MixedModule
 
 class Module(MixedModule):
     appleveldefs = {
+        'save_warmup_profile': 'app_warmup.save_warmup_profile',
+        'load_warmup_profile': 'app_warmup.load_warmup_profile',
     }
 
     interpleveldefs = {
@@ -17,6 +19,12 @@ class Module(MixedModule):
         'set_trace_too_long_hook': 'interp_resop.set_trace_too_long_hook',
         'get_stats_snapshot': 'interp_resop.get_stats_snapshot',
         'get_stats_asmmemmgr': 'interp_resop.get_stats_asmmemmgr',
+        'get_stats_memmgr': 'interp_resop.get_stats_memmgr',
+        'enable_loop_counters': 'interp_resop.enable_loop_counters',
+        'disable_loop_counters': 'interp_resop.disable_loop_counters',
+        'get_warmup_profile': 'interp_warmup.get_warmup_profile',
+        'add_warmup_profile': 'interp_warmup.add_warmup_profile',
+        'warmup_and_freeze': 'interp_warmup.warmup_and_freeze',
         # those things are disabled because they have bugs, but if
         # they're found to be useful, fix test_ztranslation_jit_stats
         # in the backend first. get_stats_snapshot still produces
@@ -41,3 +49,9 @@ class Module(MixedModule):
         w_obj = space.wrap(PARAMETERS)
         space.setattr(self, space.newtext('defaults'), w_obj)
         pypy_hooks.space = space
+
+
+# Force the replacement of 'PyCode._init_jit_warmup' to occur early,
+# before the annotator sees the original empty method (same issue as
+# in the _vmprof module).
+import pypy.module.pypyjit.interp_warmup
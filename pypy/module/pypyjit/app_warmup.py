@@ -0,0 +1,50 @@
+_HEADER = '# pypyjit warmup profile v1\n'
+
+def save_warmup_profile(filename):
+    """ save_warmup_profile(filename)
+
+    Write the loops compiled so far to 'filename', in a form that
+    load_warmup_profile() can read back in another process.  Typically
+    called from an atexit handler.
+    """
+    import pypyjit
+    lines = []
+    for (co_filename, co_firstlineno, co_name, code_crc, next_instr,
+         is_being_profiled) in pypyjit.get_warmup_profile():
+        if '\n' in co_filename or ' ' in co_name:
+            continue
+        lines.append('%d %d %d %d %s %s\n' % (next_instr,
+                     int(is_being_profiled), co_firstlineno, code_crc,
+                     co_name, co_filename))
+    lines.sort()
+    f = open(filename, 'w')
+    try:
+        f.write(_HEADER)
+        f.writelines(lines)
+    finally:
+        f.close()
+
+def load_warmup_profile(filename):
+    """ load_warmup_profile(filename)
+
+    Read a file written by save_warmup_profile() and pass its content to
+    add_warmup_profile(): the loops it lists will be traced as soon as
+    they are reached, instead of after the usual warm-up.  Should be
+    called before the corresponding modules are imported.
+    """
+    import pypyjit
+    f = open(filename, 'r')
+    try:
+        header = f.readline()
+        if header != _HEADER:
+            raise ValueError("%r is not a warmup profile" % (filename,))
+        entries = []
+        for line in f:
+            (next_instr, is_being_profiled, co_firstlineno, code_crc,
+             co_name, co_filename) = line.rstrip('\n').split(' ', 5)
+            entries.append((co_filename, int(co_firstlineno), co_name,
+                            int(code_crc), int(next_instr),
+                            bool(int(is_being_profiled))))
+    finally:
+        f.close()
+    pypyjit.add_warmup_profile(entries)
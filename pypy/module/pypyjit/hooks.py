@@ -1,8 +1,13 @@
 
 from rpython.rlib import jit_hooks
 from rpython.rlib.jit import JitHookInterface, Counters
+from rpython.rtyper.annlowlevel import cast_base_ptr_to_instance
+from rpython.rtyper.lltypesystem import lltype
+from rpython.rtyper.rclass import OBJECT
 
 from pypy.interpreter.error import OperationError
+from pypy.interpreter.pycode import PyCode
+from pypy.module.pypyjit.interp_warmup import record_loop
 from pypy.module.pypyjit.interp_resop import (Cache, wrap_greenkey,
     WrappedOp, W_JitLoopInfo, wrap_oplist)
 
@@ -46,6 +51,7 @@ class PyPyJitIface(JitHookInterface):
                 cache.in_recursion = False
 
     def after_compile(self, debug_info):
+        self._record_warmup(debug_info)
         self._compile_hook(debug_info, is_bridge=False)
 
     def after_compile_bridge(self, debug_info):
@@ -57,6 +63,17 @@ class PyPyJitIface(JitHookInterface):
     def before_compile_bridge(self, debug_info):
         pass
 
+    def _record_warmup(self, debug_info):
+        if debug_info.get_jitdriver().name != 'pypyjit':
+            return
+        greenkey = debug_info.greenkey
+        next_instr = greenkey[0].getint()
+        is_being_profiled = greenkey[1].getint()
+        ll_code = lltype.cast_opaque_ptr(lltype.Ptr(OBJECT),
+                                         greenkey[2].getref_base())
+        pycode = cast_base_ptr_to_instance(PyCode, ll_code)
+        record_loop(self.space, pycode, next_instr, is_being_profiled)
+
     def _compile_hook(self, debug_info, is_bridge):
         space = self.space
         cache = space.fromcache(Cache)
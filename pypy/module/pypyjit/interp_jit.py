@@ -135,6 +135,18 @@ def _get_adapted_tick_counter():
 #
 # Public interface
 
+def _update_vectorize_find(text):
+    # list.index() on ints and floats uses loops that are only worth it
+    # if the JIT vectorizes them, see listobject.vectorize_find
+    from pypy.objspace.std.listobject import vectorize_find
+    if text == 'default':
+        vectorize_find.enabled = jit.PARAMETERS['vec'] != 0
+        return
+    for s in text.split(','):
+        parts = s.strip(' ').split('=')
+        if len(parts) == 2 and parts[0] == 'vec':
+            vectorize_find.enabled = int(parts[1]) != 0
+
 def set_param(space, __args__):
     '''Configure the tunable JIT parameters.
         * set_param(name=value, ...)            # as keyword arguments
@@ -154,6 +166,7 @@ def set_param(space, __args__):
             jit.set_user_param(None, text)
         except ValueError:
             raise oefmt(space.w_ValueError, "error in JIT parameters string")
+        _update_vectorize_find(text)
     for key, w_value in kwds_w.items():
         if key == 'enable_opts':
             jit.set_param(None, 'enable_opts', space.text_w(w_value))
@@ -162,6 +175,8 @@ def set_param(space, __args__):
             for name, _ in unroll_parameters:
                 if name == key and name != 'enable_opts':
                     jit.set_param(None, name, intval)
+                    if name == 'vec':
+                        _update_vectorize_find('vec=%d' % intval)
                     break
             else:
                 raise oefmt(space.w_TypeError, "no JIT parameter '%s'", key)
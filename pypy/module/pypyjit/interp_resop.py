@@ -14,6 +14,7 @@ from rpython.rlib.rarithmetic import r_uint
 from rpython.rlib import jit_hooks
 from rpython.rlib.jit import Counters
 from rpython.rlib.objectmodel import compute_unique_id
+from rpython.rlib.listsort import make_timsort_class
 from pypy.module.pypyjit.interp_jit import pypyjitdriver
 
 class Cache(object):
@@ -339,10 +340,13 @@ W_JitLoopInfo.typedef.acceptable_as_base_class = False
 
 
 class W_JitInfoSnapshot(W_Root):
-    def __init__(self, space, w_times, w_counters, w_counter_times):
+    def __init__(self, space, w_times, w_counters, w_counter_times,
+                 w_loops, w_guard_failures):
         self.w_loop_run_times = w_times
         self.w_counters = w_counters
         self.w_counter_times = w_counter_times
+        self.w_loops = w_loops
+        self.w_guard_failures = w_guard_failures
 
 W_JitInfoSnapshot.typedef = TypeDef(
     "JitInfoSnapshot",
@@ -353,10 +357,21 @@ W_JitInfoSnapshot.typedef = TypeDef(
                                        doc="various JIT counters"),
     counter_times = interp_attrproperty_w("w_counter_times",
                                             cls=W_JitInfoSnapshot,
-                                            doc="various JIT timers")
+                                            doc="various JIT timers"),
+    loops = interp_attrproperty_w("w_loops", cls=W_JitInfoSnapshot,
+        doc="list of (loop_no, location, entries), most entered first; "
+            "needs enable_loop_counters()"),
+    guard_failures = interp_attrproperty_w("w_guard_failures",
+        cls=W_JitInfoSnapshot,
+        doc="list of (guard_id, loop_no, failures), most failing first; "
+            "needs enable_loop_counters()"),
 )
 W_JitInfoSnapshot.typedef.acceptable_as_base_class = False
 
+# sort by decreasing count
+LoopCountSort = make_timsort_class(lt=lambda a, b: a[0] > b[0])
+GuardCountSort = make_timsort_class(lt=lambda a, b: a[0] > b[0])
+
 def get_stats_snapshot(space):
     """ Get the jit status in the specific moment in time. Note that this
     is eager - the attribute access is not lazy, if you need new stats
@@ -379,7 +394,43 @@ def get_stats_snapshot(space):
     space.setitem_str(w_counter_times, 'TRACING', space.newfloat(tr_time))
     b_time = jit_hooks.stats_get_times_value(None, Counters.BACKEND)
     space.setitem_str(w_counter_times, 'BACKEND', space.newfloat(b_time))
-    return W_JitInfoSnapshot(space, w_times, w_counters, w_counter_times)
+    #
+    ll_loops = jit_hooks.stats_get_loop_entries(None)
+    loops = [(ll_loops[i].entries, ll_loops[i].number)
+             for i in range(len(ll_loops))]
+    LoopCountSort(loops).sort()
+    loops_w = []
+    for entries, number in loops:
+        location = jit_hooks.stats_get_loop_location(None, number)
+        if location is None:
+            w_location = space.w_None
+        else:
+            w_location = space.newtext(location)
+        loops_w.append(space.newtuple([space.newint(number), w_location,
+                                       space.newint(entries)]))
+    ll_guards = jit_hooks.stats_get_guard_failures(None)
+    guards = [(ll_guards[i].failures, ll_guards[i].guard, ll_guards[i].loop)
+              for i in range(len(ll_guards))]
+    GuardCountSort(guards).sort()
+    guards_w = [space.newtuple([space.newint(guard), space.newint(loop),
+                                space.newint(failures)])
+                for failures, guard, loop in guards]
+    return W_JitInfoSnapshot(space, w_times, w_counters, w_counter_times,
+                             space.newlist(loops_w), space.newlist(guards_w))
+
+def enable_loop_counters(space):
+    """ Start counting, for get_stats_snapshot(), how many times each loop
+    is entered from the interpreter and how many times each guard fails
+    without a bridge.  Resets the previous counts.  Only the loops
+    compiled from now on have a location.
+    """
+    jit_hooks.stats_set_loop_counters(None, True)
+
+def disable_loop_counters(space):
+    """ Stop counting loop entries and guard failures.  The counts so far
+    are still returned by get_stats_snapshot().
+    """
+    jit_hooks.stats_set_loop_counters(None, False)
 
 def get_stats_asmmemmgr(space):
     """Returns the raw memory currently used by the JIT backend,
@@ -388,6 +439,15 @@ def get_stats_asmmemmgr(space):
     m2 = jit_hooks.stats_asmmemmgr_used(None)
     return space.newtuple([space.newint(m1), space.newint(m2)])
 
+def get_stats_memmgr(space):
+    """Returns the number of loops freed because the machine code was
+    larger than the 'jit_code_max_bytes' parameter, and the total size
+    of their code, as a pair (evicted_loops, evicted_bytes).  A loop
+    still referenced from another one is counted, but not freed yet."""
+    n1 = jit_hooks.stats_memmgr_evicted_loops(None)
+    n2 = jit_hooks.stats_memmgr_evicted_bytes(None)
+    return space.newtuple([space.newint(n1), space.newint(n2)])
+
 def enable_debug(space):
     """ Set the jit debugging - completely necessary for some stats to work,
     most notably assembler counters.
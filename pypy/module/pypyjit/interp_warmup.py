@@ -0,0 +1,133 @@
+""" Warm-start profiles: remember which loops got compiled in this
+process, and ask the JIT to trace them immediately in the next one.
+
+A loop is identified by the code object it starts in and by its
+'next_instr'.  Code objects don't survive a restart, so they are
+identified by (co_filename, co_firstlineno, co_name) and a CRC of
+co_code, which is enough to notice that the source changed.
+"""
+
+from rpython.rlib import jit_hooks, rzipfile
+from rpython.rlib.jit import dont_look_inside
+from rpython.rlib.objectmodel import we_are_translated
+from rpython.rlib.rarithmetic import r_uint, intmask
+from rpython.rtyper.annlowlevel import cast_instance_to_gcref
+
+from pypy.interpreter.error import oefmt
+from pypy.interpreter.pycode import PyCode
+
+
+class WarmupCache(object):
+    def __init__(self, space):
+        # loops compiled so far: key -> None
+        self.compiled = {}
+        # loops from a loaded profile, whose code object was not created
+        # yet: (co_filename, co_firstlineno, co_name) ->
+        #      list of (code_crc, next_instr, is_being_profiled)
+        self.pending = {}
+
+def code_crc(pycode):
+    return intmask(rzipfile.crc32(pycode.co_code))
+
+def record_loop(space, pycode, next_instr, is_being_profiled):
+    """Called from the compile hook for every loop (not bridges)."""
+    cache = space.fromcache(WarmupCache)
+    key = (pycode.co_filename, pycode.co_firstlineno, pycode.co_name,
+           code_crc(pycode), next_instr, is_being_profiled)
+    cache.compiled[key] = None
+
+@dont_look_inside
+def _trace_next_iteration(pycode, next_instr, is_being_profiled):
+    if not we_are_translated():
+        return      # tests: the JIT is not there
+    jit_hooks.trace_next_iteration('pypyjit', r_uint(next_instr),
+                                   is_being_profiled,
+                                   cast_instance_to_gcref(pycode))
+
+def _init_jit_warmup(pycode):
+    cache = pycode.space.fromcache(WarmupCache)
+    if not cache.pending:
+        return
+    entries = cache.pending.get((pycode.co_filename, pycode.co_firstlineno,
+                                 pycode.co_name), None)
+    if entries is None:
+        return
+    crc = code_crc(pycode)
+    for code_crc_, next_instr, is_being_profiled in entries:
+        if code_crc_ == crc:
+            _trace_next_iteration(pycode, next_instr, is_being_profiled)
+
+PyCode._init_jit_warmup = _init_jit_warmup
+
+@dont_look_inside
+def _freeze_jit_code():
+    if not we_are_translated():
+        return      # tests: the JIT is not there
+    jit_hooks.freeze_jit_code(None)
+
+
+def get_warmup_profile(space):
+    """ get_warmup_profile()
+
+    Return the loops compiled so far, as a list of tuples
+    (co_filename, co_firstlineno, co_name, code_crc, next_instr,
+    is_being_profiled), suitable for add_warmup_profile() in another
+    process.  Bridges are not included.
+    """
+    cache = space.fromcache(WarmupCache)
+    result_w = []
+    for key in cache.compiled:
+        filename, firstlineno, name, crc, next_instr, is_being_profiled = key
+        result_w.append(space.newtuple([
+            space.newtext(filename), space.newint(firstlineno),
+            space.newtext(name), space.newint(crc),
+            space.newint(next_instr), space.newbool(bool(is_being_profiled))]))
+    return space.newlist(result_w)
+
+def add_warmup_profile(space, w_entries):
+    """ add_warmup_profile(entries)
+
+    Take a list of tuples as returned by get_warmup_profile().  From now
+    on, whenever a matching code object is created, the JIT is asked to
+    trace the corresponding loops the next time they are reached instead
+    of waiting for them to become hot.  Code objects that already exist
+    are not affected, so this should be called early.
+    """
+    cache = space.fromcache(WarmupCache)
+    for w_entry in space.listview(w_entries):
+        items_w = space.fixedview(w_entry)
+        if len(items_w) != 6:
+            raise oefmt(space.w_ValueError,
+                        "expected a tuple of length 6, got %d", len(items_w))
+        filename = space.text_w(items_w[0])
+        firstlineno = space.int_w(items_w[1])
+        name = space.text_w(items_w[2])
+        crc = space.int_w(items_w[3])
+        next_instr = space.int_w(items_w[4])
+        is_being_profiled = int(space.is_true(items_w[5]))
+        if next_instr < 0:
+            raise oefmt(space.w_ValueError, "negative next_instr")
+        key = (filename, firstlineno, name)
+        entries = cache.pending.get(key, None)
+        if entries is None:
+            entries = []
+            cache.pending[key] = entries
+        entries.append((crc, next_instr, is_being_profiled))
+    return space.w_None
+
+def warmup_and_freeze(space, w_warmup=None):
+    """ warmup_and_freeze(warmup=None)
+
+    For servers that fork worker processes.  Call warmup() if given, so
+    that the hot loops get compiled in this process, then freeze the
+    machine code compiled so far: the loops are never freed, and the
+    memory that contains them is not reused for new code.  Call this in
+    the parent just before forking: the children then share these pages
+    copy-on-write and start with the loops already compiled, instead of
+    each compiling its own copy.  Combine with load_warmup_profile() to
+    compile the loops that a previous run found to be hot.
+    """
+    if not space.is_none(w_warmup):
+        space.call_function(w_warmup)
+    _freeze_jit_code()
+    return space.w_None
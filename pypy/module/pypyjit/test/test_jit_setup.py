@@ -41,6 +41,17 @@ class AppTestPyPyJIT:
             pypyjit.set_compile_hook(None)
             pypyjit.set_param('default')
 
+    def test_vec_list_find(self):
+        import pypyjit
+        try:
+            pypyjit.set_param(vec=1)
+            assert [1, 2, 3].index(3) == 2
+            assert [1.5, 2.5].index(2.5) == 1
+            pypyjit.set_param("vec=0")
+            assert [1, 2, 3].index(3) == 2
+        finally:
+            pypyjit.set_param('default')
+
     def test_doc(self):
         import pypyjit
         d = pypyjit.PARAMETER_DOCS
@@ -53,3 +64,20 @@ class AppTestPyPyJIT:
             return (args, kwds)
         res = pypyjit.residual_call(f, 4, x=6)
         assert res == ((4,), {'x': 6})
+
+
+def test_update_vectorize_find():
+    from pypy.objspace.std.listobject import vectorize_find
+    from pypy.module.pypyjit.interp_jit import _update_vectorize_find
+    try:
+        _update_vectorize_find("threshold=5, vec=1")
+        assert vectorize_find.enabled
+        _update_vectorize_find("threshold=5")
+        assert vectorize_find.enabled
+        _update_vectorize_find("vec=0,vec_all=1")
+        assert not vectorize_find.enabled
+        _update_vectorize_find("vec=1")
+        _update_vectorize_find("default")
+        assert not vectorize_find.enabled
+    finally:
+        vectorize_find.enabled = False
@@ -0,0 +1,106 @@
+import py
+from pypy.interpreter.gateway import interp2app
+from pypy.module.pypyjit import interp_warmup
+from pypy.module.pypyjit.hooks import pypy_hooks
+from pypy.module.pypyjit.test.test_jit_hook import MockJitDriverSD
+from rpython.jit.metainterp.history import JitCellToken, ConstInt, ConstPtr
+from rpython.rtyper.annlowlevel import cast_instance_to_gcref
+from rpython.rlib.jit import JitDebugInfo
+from rpython.tool.udir import udir
+
+
+class AppTestWarmup(object):
+    spaceconfig = dict(usemodules=('pypyjit',))
+
+    def setup_class(cls):
+        if cls.runappdirect:
+            py.test.skip("Can't run this test with -A")
+        space = cls.space
+        cls.w_source = space.wrap(
+            "def function(n):\n"
+            "    while n > 0:\n"
+            "        n -= 1\n")
+        w_f = space.appexec([cls.w_source], """(source):
+            d = {}
+            exec compile(source, 'warmup_test.py', 'exec') in d
+            return d['function']
+        """)
+        greenkey = [ConstInt(6), ConstInt(0),
+                    ConstPtr(cast_instance_to_gcref(w_f.code))]
+        di_loop = JitDebugInfo(MockJitDriverSD, None, JitCellToken(), [],
+                               'loop', greenkey)
+        traced = []
+
+        def interp_on_compile():
+            pypy_hooks.after_compile(di_loop)
+
+        def interp_get_traced():
+            result = space.newlist([space.newtuple([
+                pycode, space.newint(next_instr),
+                space.newint(is_being_profiled)])
+                for pycode, next_instr, is_being_profiled in traced])
+            del traced[:]
+            return result
+
+        def fake_trace_next_iteration(pycode, next_instr, is_being_profiled):
+            traced.append((pycode, next_instr, is_being_profiled))
+
+        cls.orig_trace_next_iteration = interp_warmup._trace_next_iteration
+        interp_warmup._trace_next_iteration = fake_trace_next_iteration
+        cls.w_on_compile = space.wrap(interp2app(interp_on_compile))
+        cls.w_get_traced = space.wrap(interp2app(interp_get_traced))
+        cls.w_tmpfile = space.wrap(str(udir.join('warmup_profile')))
+
+    def teardown_class(cls):
+        if not cls.runappdirect:
+            interp_warmup._trace_next_iteration = cls.orig_trace_next_iteration
+
+    def test_warmup_profile(self):
+        import pypyjit
+        self.on_compile()
+        self.on_compile()
+        profile = pypyjit.get_warmup_profile()
+        [entry] = [entry for entry in profile
+                   if entry[0] == 'warmup_test.py']
+        assert entry[:3] == ('warmup_test.py', 1, 'function')
+        assert entry[4:] == (6, False)
+        #
+        pypyjit.save_warmup_profile(self.tmpfile)
+        lines = open(self.tmpfile).readlines()
+        assert lines[0].startswith('#')
+        assert '6 0 1 %d function warmup_test.py\n' % entry[3] in lines
+        pypyjit.load_warmup_profile(self.tmpfile)
+        #
+        assert self.get_traced() == []
+        d = {}
+        exec compile(self.source, 'warmup_test.py', 'exec') in d
+        assert self.get_traced() == [(d['function'].__code__, 6, 0)]
+        # the bytecode changed: not traced
+        exec compile(self.source.replace('n -= 1', 'n = n - 1'),
+                     'warmup_test.py', 'exec') in d
+        assert self.get_traced() == []
+        # another file: not traced
+        exec compile(self.source, 'other.py', 'exec') in d
+        assert self.get_traced() == []
+
+    def test_add_warmup_profile_errors(self):
+        import pypyjit
+        raises(ValueError, pypyjit.add_warmup_profile, [('a', 1, 'f')])
+        raises(ValueError, pypyjit.add_warmup_profile,
+               [('a', 1, 'f', 0, -1, False)])
+        raises(TypeError, pypyjit.add_warmup_profile, [('a', 'x', 'f', 0,
+                                                        1, False)])
+        f = open(self.tmpfile, 'w')
+        f.write('garbage\n')
+        f.close()
+        raises(ValueError, pypyjit.load_warmup_profile, self.tmpfile)
+
+    def test_warmup_and_freeze(self):
+        import pypyjit
+        called = []
+        assert pypyjit.warmup_and_freeze(lambda: called.append(1)) is None
+        assert called == [1]
+        pypyjit.warmup_and_freeze()
+        pypyjit.warmup_and_freeze(None)
+        assert called == [1]
+        raises(ZeroDivisionError, pypyjit.warmup_and_freeze, lambda: 1 / 0)
@@ -1,4 +1,6 @@
+import py
 from pypy.module.pypyjit.test_pypy_c.test_00_model import BaseTestPyPyC
+from pypy.module.pypyjit.test_pypy_c.test_micronumpy import no_vector_backend
 
 
 class TestDicts(BaseTestPyPyC):
@@ -271,3 +273,23 @@ class TestOtherContainers(BaseTestPyPyC):
         loop, = log.loops_by_filename(self.filepath)
         opnames = log.opnames(loop.allops())
         assert opnames.count('new_with_vtable') == 0
+
+    @py.test.mark.skipif('no_vector_backend()')
+    @py.test.mark.parametrize("item", ["12345", "12345.0"])
+    def test_list_index_vectorized(self, item):
+        source = """
+        def main():
+            l = [0{suffix}] * 20000
+            l[12345] = {item}
+            total = 0
+            for i in range(50):
+                total += l.index({item})
+            return total
+        """.format(item=item, suffix=item[5:])
+        exec py.code.Source(source).compile()
+        log = self.run(main, [], vec=0)
+        vlog = self.run(main, [], vec=1)
+        assert log.result == vlog.result == 50 * 12345
+        assert log.jit_summary.vecopt_tried == 0
+        assert vlog.jit_summary.vecopt_tried > 0
+        assert vlog.jit_summary.vecopt_success > 0
@@ -4,6 +4,7 @@ from pypy.config.pypyoption import get_pypy_config
 
 def checkmodule(*modnames, **kwds):
     translate_startup = kwds.pop('translate_startup', True)
+    extra_func = kwds.pop('extra_func', None)
     assert not kwds
     config = get_pypy_config(translating=True)
     space = FakeObjSpace(config)
@@ -27,6 +28,8 @@ def checkmodule(*modnames, **kwds):
     def func():
         for mod in modules:
             mod.startup(space)
+        if extra_func is not None:
+            extra_func(space)
     if not translate_startup:
         func()   # call it now
         func = None
@@ -0,0 +1,36 @@
+""" time of json.loads() and memory of the result for record-shaped
+documents, to compare a pypy-c built with and without
+--objspace-std-withjsonkeysharing, see keysharingdict.py
+"""
+
+import sys, time, json, resource
+
+def count_operation(name, function):
+    t0 = time.time()
+    retval = function()
+    tk = time.time()
+    print name, " takes: %f" % (tk - t0)
+    return retval
+
+def make_document(size):
+    records = [{"id": i, "name": "user%d" % i, "email": "user%d@example.com" % i,
+                "active": i % 2 == 0, "score": i * 0.5}
+               for i in range(size)]
+    return json.dumps(records)
+
+def maxrss_kb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+def main(size, repeat):
+    s = make_document(size)
+    for i in range(repeat):
+        count_operation("loads, %d records" % size, lambda: json.loads(s))
+    # keep many decoded documents alive, to see the memory they use
+    before = maxrss_kb()
+    kept = [json.loads(s) for i in range(10)]
+    print "max RSS growth for 10 documents: %d kB" % (maxrss_kb() - before)
+    return kept
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(*(args + [100000, 10][len(args):]))
@@ -0,0 +1,66 @@
+
+""" time of building strings with repeated +=, in templating
+and log-line assembly loops, see strbufobject.py
+"""
+
+import sys, time
+
+def count_operation(name, function):
+    t0 = time.time()
+    retval = function()
+    tk = time.time()
+    print name, " takes: %f" % (tk - t0)
+    return retval
+
+def render_template(empty, rows):
+    # the kind of loop found in simple templating code
+    out = empty
+    out += empty + '<table>\n'
+    for name, value in rows:
+        out += empty + '  <tr><td>'
+        out += name
+        out += empty + '</td><td>'
+        out += value
+        out += empty + '</td></tr>\n'
+    out += empty + '</table>\n'
+    return len(out)
+
+def assemble_log(empty, records):
+    # build one line per record, then the whole log
+    log = empty
+    for level, module, message in records:
+        line = empty + '['
+        line += level
+        line += empty + '] '
+        line += module
+        line += empty + ': '
+        line += message
+        log += line
+        log += empty + '\n'
+    return len(log)
+
+def make_rows(empty, size):
+    return [(empty + 'name%d' % i, empty + 'value %d' % (i * 7))
+            for i in range(size)]
+
+def make_records(empty, size):
+    levels = ['DEBUG', 'INFO', 'WARNING']
+    return [(empty + levels[i % 3], empty + 'module%d' % (i % 10),
+             empty + 'processed item %d of %d' % (i, size))
+            for i in range(size)]
+
+def main(sizes):
+    # the empty string is kept as an argument so that the same loops can
+    # be timed with unicode, which doesn't use a builder
+    for empty in ['', u'']:
+        kind = type(empty).__name__
+        for size in sizes:
+            print "%s, %d rows:" % (kind, size)
+            rows = make_rows(empty, size)
+            records = make_records(empty, size)
+            count_operation("templating", lambda: render_template(empty, rows))
+            count_operation("log lines", lambda: assemble_log(empty, records))
+            print
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [1000, 10000, 100000])
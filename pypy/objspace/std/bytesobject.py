@@ -498,7 +498,7 @@ class W_BytesObject(W_AbstractBytesObject):
     @staticmethod
     def _use_rstr_ops(space, w_other):
         from pypy.objspace.std.unicodeobject import W_UnicodeObject
-        return (isinstance(w_other, W_BytesObject) or
+        return (isinstance(w_other, W_AbstractBytesObject) or
                 isinstance(w_other, W_UnicodeObject))
 
     @staticmethod
@@ -610,7 +610,7 @@ class W_BytesObject(W_AbstractBytesObject):
         return mod_format(space, w_values, self, do_unicode=False)
 
     def descr_eq(self, space, w_other):
-        if space.config.objspace.std.withstrbuf:
+        if _uses_strbuf(space):
             from pypy.objspace.std.strbufobject import W_StringBufferObject
             if isinstance(w_other, W_StringBufferObject):
                 return space.newbool(self._value == w_other.force())
@@ -619,7 +619,7 @@ class W_BytesObject(W_AbstractBytesObject):
         return space.newbool(self._value == w_other._value)
 
     def descr_ne(self, space, w_other):
-        if space.config.objspace.std.withstrbuf:
+        if _uses_strbuf(space):
             from pypy.objspace.std.strbufobject import W_StringBufferObject
             if isinstance(w_other, W_StringBufferObject):
                 return space.newbool(self._value != w_other.force())
@@ -628,7 +628,7 @@ class W_BytesObject(W_AbstractBytesObject):
         return space.newbool(self._value != w_other._value)
 
     def descr_lt(self, space, w_other):
-        if space.config.objspace.std.withstrbuf:
+        if _uses_strbuf(space):
             from pypy.objspace.std.strbufobject import W_StringBufferObject
             if isinstance(w_other, W_StringBufferObject):
                 return space.newbool(self._value < w_other.force())
@@ -637,7 +637,7 @@ class W_BytesObject(W_AbstractBytesObject):
         return space.newbool(self._value < w_other._value)
 
     def descr_le(self, space, w_other):
-        if space.config.objspace.std.withstrbuf:
+        if _uses_strbuf(space):
             from pypy.objspace.std.strbufobject import W_StringBufferObject
             if isinstance(w_other, W_StringBufferObject):
                 return space.newbool(self._value <= w_other.force())
@@ -646,7 +646,7 @@ class W_BytesObject(W_AbstractBytesObject):
         return space.newbool(self._value <= w_other._value)
 
     def descr_gt(self, space, w_other):
-        if space.config.objspace.std.withstrbuf:
+        if _uses_strbuf(space):
             from pypy.objspace.std.strbufobject import W_StringBufferObject
             if isinstance(w_other, W_StringBufferObject):
                 return space.newbool(self._value > w_other.force())
@@ -655,7 +655,7 @@ class W_BytesObject(W_AbstractBytesObject):
         return space.newbool(self._value > w_other._value)
 
     def descr_ge(self, space, w_other):
-        if space.config.objspace.std.withstrbuf:
+        if _uses_strbuf(space):
             from pypy.objspace.std.strbufobject import W_StringBufferObject
             if isinstance(w_other, W_StringBufferObject):
                 return space.newbool(self._value >= w_other.force())
@@ -861,6 +861,13 @@ class W_BytesObject(W_AbstractBytesObject):
         return tformat.formatter_field_name_split()
 
 
+def _uses_strbuf(space):
+    # W_StringBufferObjects are made by '+' with withstrbuf, and by
+    # repeated '+=' with withstrbuilder
+    std = space.config.objspace.std
+    return std.withstrbuf or std.withstrbuilder
+
+
 def _create_list_from_bytes(value):
     # need this helper function to allow the jit to look inside and inline
     # listview_bytes
@@ -938,10 +945,10 @@ W_BytesObject.typedef = TypeDef(
     zfill = interpindirect2app(W_AbstractBytesObject.descr_zfill),
     __buffer__ = interp2app(W_BytesObject.descr_getbuffer),
 
-    format = interpindirect2app(W_BytesObject.descr_format),
-    __format__ = interpindirect2app(W_BytesObject.descr__format__),
-    __mod__ = interpindirect2app(W_BytesObject.descr_mod),
-    __rmod__ = interpindirect2app(W_BytesObject.descr_rmod),
+    format = interpindirect2app(W_AbstractBytesObject.descr_format),
+    __format__ = interpindirect2app(W_AbstractBytesObject.descr__format__),
+    __mod__ = interpindirect2app(W_AbstractBytesObject.descr_mod),
+    __rmod__ = interpindirect2app(W_AbstractBytesObject.descr_rmod),
     __getnewargs__ = interpindirect2app(
         W_AbstractBytesObject.descr_getnewargs),
     _formatter_parser = interp2app(W_BytesObject.descr_formatter_parser),
@@ -0,0 +1,303 @@
+"""dict implementation for dicts of unicode keys that are built with the
+same keys in the same order, like the objects decoded by the json module.
+
+Like the maps of mapdict.py, the keys are stored in a tree of KeyMap objects
+shared between all the dicts that were built with the same sequence of keys,
+and every dict only stores its map and a list of values.
+
+New maps are only added to a tree while its dicts are being built, e.g. while
+a json document is decoded.  After stop_growing() was called on the root of
+the tree, a dict that gets a key for which there is no map yet switches to
+UnicodeDictStrategy, so that the tree doesn't grow with every dict that is
+changed by the program.
+"""
+
+from rpython.rlib import jit, rerased, objectmodel
+
+from pypy.objspace.std.dictmultiobject import (
+    DictStrategy, ObjectDictStrategy, UnicodeDictStrategy, W_DictObject,
+    _never_equal_to_string, create_iterator_classes)
+
+
+# limit the length of the maps, so that the linear searches in
+# _find_index() and the trees don't become too large
+MAX_KEYS = 64
+
+# maps with more keys than that build a dict to look up the index of a key
+SMALL_MAP = 8
+
+
+class AbstractKeyMap(object):
+    _immutable_fields_ = ['terminator']
+    cache_next = None    # {key: KeyMap with one more key}
+    _indexes = None      # {key: index}, built when needed for long maps
+    _keys = None         # the list of keys, built when needed
+
+    def length(self):
+        raise NotImplementedError("abstract base class")
+
+    @jit.elidable
+    def get_next(self, key):
+        """Return the map with 'key' added at the end.  'key' must not be
+        in this map already."""
+        cache = self.cache_next
+        if cache is None:
+            cache = self.cache_next = {}
+        keymap = cache.get(key, None)
+        if keymap is None:
+            keymap = KeyMap(key, self)
+            cache[key] = keymap
+        return keymap
+
+    def get_cached_next(self, key):
+        """Like get_next(), but return None if that map was not made yet.
+        Note that a map following this one can only have been made for a key
+        that is not in this map."""
+        if self.cache_next is None:
+            return None
+        return self.cache_next.get(key, None)
+
+    @jit.elidable
+    def find_index(self, key):
+        """Return the index of 'key', or -1."""
+        if self.length() <= SMALL_MAP:
+            return self._find_index(key)
+        indexes = self._indexes
+        if indexes is None:
+            indexes = self._indexes = {}
+            for i, key1 in enumerate(self.get_keys()):
+                indexes[key1] = i
+        return indexes.get(key, -1)
+
+    def _find_index(self, key):
+        while isinstance(self, KeyMap):
+            if self.key == key:
+                return self.index
+            self = self.back
+        return -1
+
+    def get_keys(self):
+        keys = self._keys
+        if keys is None:
+            keys = [u''] * self.length()
+            keymap = self
+            while isinstance(keymap, KeyMap):
+                keys[keymap.index] = keymap.key
+                keymap = keymap.back
+            self._keys = keys
+        return keys
+
+
+class KeyMapTerminator(AbstractKeyMap):
+    """The root of a tree of maps, with no keys."""
+
+    def __init__(self):
+        self.terminator = self
+        self.growing = True
+
+    def length(self):
+        return 0
+
+    def stop_growing(self):
+        """Don't add any new map to this tree."""
+        self.growing = False
+
+
+class KeyMap(AbstractKeyMap):
+    _immutable_fields_ = ['key', 'index', 'back']
+
+    def __init__(self, key, back):
+        self.key = key
+        self.index = back.length()
+        self.back = back
+        self.terminator = back.terminator
+
+    def length(self):
+        return self.index + 1
+
+
+class KeySharingStorage(object):
+    def __init__(self, keymap, values_w):
+        self.keymap = keymap
+        self.values_w = values_w
+
+
+class KeySharingDictStrategy(DictStrategy):
+    """The storage is a KeySharingStorage."""
+    erase, unerase = rerased.new_erasing_pair("keysharing")
+    erase = staticmethod(erase)
+    unerase = staticmethod(unerase)
+
+    def wrap(self, unwrapped):
+        return self.space.newunicode(unwrapped)
+
+    def unwrap(self, wrapped):
+        return self.space.unicode_w(wrapped)
+
+    def is_correct_type(self, w_obj):
+        space = self.space
+        return space.is_w(space.type(w_obj), space.w_unicode)
+
+    def _never_equal_to(self, w_lookup_type):
+        return _never_equal_to_string(self.space, w_lookup_type)
+
+    def get_empty_storage(self):
+        return self.get_storage(KeyMapTerminator())
+
+    def get_storage(self, keymap_root):
+        assert isinstance(keymap_root, KeyMapTerminator)
+        return self.erase(KeySharingStorage(keymap_root, []))
+
+    def setitem(self, w_dict, w_key, w_value):
+        if self.is_correct_type(w_key):
+            self._setitem(w_dict, self.unwrap(w_key), w_value)
+        else:
+            self.switch_to_object_strategy(w_dict)
+            w_dict.setitem(w_key, w_value)
+
+    def _setitem(self, w_dict, key, w_value):
+        storage = self.unerase(w_dict.dstorage)
+        keymap = storage.keymap
+        newmap = keymap.get_cached_next(key)
+        if newmap is None:
+            index = keymap.find_index(key)
+            if index >= 0:
+                storage.values_w[index] = w_value
+                return
+            if (keymap.length() >= MAX_KEYS or
+                    not keymap.terminator.growing):
+                self.switch_to_unicode_strategy(w_dict)
+                w_dict.setitem(self.wrap(key), w_value)
+                return
+            newmap = keymap.get_next(key)
+        storage.values_w.append(w_value)
+        storage.keymap = newmap
+
+    def setitem_str(self, w_dict, key, w_value):
+        self.switch_to_object_strategy(w_dict)
+        w_dict.setitem(self.space.newtext(key), w_value)
+
+    def setdefault(self, w_dict, w_key, w_default):
+        if self.is_correct_type(w_key):
+            key = self.unwrap(w_key)
+            w_result = self._getitem(w_dict, key)
+            if w_result is not None:
+                return w_result
+            self._setitem(w_dict, key, w_default)
+            return w_default
+        else:
+            self.switch_to_object_strategy(w_dict)
+            return w_dict.setdefault(w_key, w_default)
+
+    def delitem(self, w_dict, w_key):
+        self.switch_to_unicode_strategy(w_dict)
+        return w_dict.delitem(w_key)
+
+    def length(self, w_dict):
+        return len(self.unerase(w_dict.dstorage).values_w)
+
+    def getitem_str(self, w_dict, key):
+        return self.getitem(w_dict, self.space.newtext(key))
+
+    def getitem(self, w_dict, w_key):
+        space = self.space
+        if self.is_correct_type(w_key):
+            return self._getitem(w_dict, self.unwrap(w_key))
+        elif self._never_equal_to(space.type(w_key)):
+            return None
+        else:
+            self.switch_to_object_strategy(w_dict)
+            return w_dict.getitem(w_key)
+
+    def _getitem(self, w_dict, key):
+        storage = self.unerase(w_dict.dstorage)
+        index = storage.keymap.find_index(key)
+        if index < 0:
+            return None
+        return storage.values_w[index]
+
+    def w_keys(self, w_dict):
+        return self.space.newlist_unicode(self.listview_unicode(w_dict))
+
+    def values(self, w_dict):
+        return self.unerase(w_dict.dstorage).values_w[:]
+
+    def listview_unicode(self, w_dict):
+        return self.unerase(w_dict.dstorage).keymap.get_keys()[:]
+
+    def prepare_update(self, w_dict, num_extra):
+        if self.length(w_dict) + num_extra > MAX_KEYS:
+            self.switch_to_unicode_strategy(w_dict)
+            w_dict.get_strategy().prepare_update(w_dict, num_extra)
+
+    def switch_to_unicode_strategy(self, w_dict):
+        storage = self.unerase(w_dict.dstorage)
+        keymap, values_w = storage.keymap, storage.values_w
+        strategy = self.space.fromcache(UnicodeDictStrategy)
+        new_storage = strategy.get_empty_storage()
+        d = strategy.unerase(new_storage)
+        keys = keymap.get_keys()
+        for i in range(len(keys)):
+            d[keys[i]] = values_w[i]
+        w_dict.set_strategy(strategy)
+        w_dict.dstorage = new_storage
+
+    def switch_to_object_strategy(self, w_dict):
+        storage = self.unerase(w_dict.dstorage)
+        keymap, values_w = storage.keymap, storage.values_w
+        strategy = self.space.fromcache(ObjectDictStrategy)
+        new_storage = strategy.get_empty_storage()
+        d = strategy.unerase(new_storage)
+        keys = keymap.get_keys()
+        for i in range(len(keys)):
+            d[self.wrap(keys[i])] = values_w[i]
+        w_dict.set_strategy(strategy)
+        w_dict.dstorage = new_storage
+
+    # --------------- iterator interface -----------------
+
+    def getiterkeys(self, w_dict):
+        return iter(self.unerase(w_dict.dstorage).keymap.get_keys())
+
+    def getitervalues(self, w_dict):
+        return iter(self.unerase(w_dict.dstorage).values_w)
+
+    def getiteritems_with_hash(self, w_dict):
+        storage = self.unerase(w_dict.dstorage)
+        return KeySharingItemsWithHash(storage.keymap.get_keys(),
+                                       storage.values_w)
+
+    def getiterreversed(self, w_dict):
+        keys = self.unerase(w_dict.dstorage).keymap.get_keys()
+        return iter([keys[i] for i in range(len(keys) - 1, -1, -1)])
+
+    def wrapkey(space, key):
+        return space.newunicode(key)
+
+create_iterator_classes(KeySharingDictStrategy)
+
+
+class KeySharingItemsWithHash(object):
+    def __init__(self, keys, values_w):
+        self.keys = keys
+        self.values_w = values_w
+        self.i = 0
+
+    def __iter__(self):
+        return self
+
+    def next(self):
+        i = self.i
+        if i >= len(self.values_w):
+            raise StopIteration
+        self.i = i + 1
+        key = self.keys[i]
+        return (key, self.values_w[i], objectmodel.compute_hash(key))
+
+
+def new_key_sharing_dict(space, keymap_root):
+    """Make an empty dict whose maps are in the tree rooted at 'keymap_root',
+    a KeyMapTerminator."""
+    strategy = space.fromcache(KeySharingDictStrategy)
+    storage = strategy.get_storage(keymap_root)
+    return W_DictObject(space, strategy, storage)
@@ -766,6 +766,21 @@ class W_ListObject(W_Root):
             raise oefmt(space.w_ValueError, "list modified during sort")
 
 find_jmp = jit.JitDriver(greens = ['tp'], reds = 'auto', name = 'list.find')
+# loops over unwrapped storages that the JIT can vectorize (with 'vec=1')
+int_find_jmp = jit.JitDriver(greens = [], reds = 'auto',
+                             name = 'list.find_int', vectorize = True)
+float_find_jmp = jit.JitDriver(greens = [], reds = 'auto',
+                               name = 'list.find_float', vectorize = True)
+
+class VectorizeFind(object):
+    """Whether the loops above are used.  Follows the 'vec' JIT parameter,
+    see pypyjit.set_param(); otherwise searching stays a residual call."""
+    _immutable_fields_ = ['enabled?']
+
+    def __init__(self):
+        self.enabled = False
+
+vectorize_find = VectorizeFind()
 
 class ListStrategy(object):
 
@@ -1679,6 +1694,24 @@ class IntegerListStrategy(ListStrategy):
     def getitems_int(self, w_list):
         return self.unerase(w_list.lstorage)
 
+    _base_safe_find = _safe_find
+
+    def _safe_find(self, w_list, obj, start, stop):
+        if vectorize_find.enabled:
+            return self._vectorized_find(w_list, obj, start, stop)
+        return self._base_safe_find(w_list, obj, start, stop)
+
+    def _vectorized_find(self, w_list, obj, start, stop):
+        l = self.unerase(w_list.lstorage)
+        stop = min(stop, len(l))
+        i = start
+        while i < stop:
+            int_find_jmp.jit_merge_point()
+            if l[i] == obj:
+                return i
+            i += 1
+        raise ValueError
+
 
     _base_extend_from_list = _extend_from_list
 
@@ -1802,6 +1835,12 @@ class FloatListStrategy(ListStrategy):
 
 
     def _safe_find(self, w_list, obj, start, stop):
+        from rpython.rlib.rfloat import isnan
+        if vectorize_find.enabled and not isnan(obj):
+            return self._vectorized_find(w_list, obj, start, stop)
+        return self._plain_find(w_list, obj, start, stop)
+
+    def _plain_find(self, w_list, obj, start, stop):
         from rpython.rlib.rfloat import isnan
         #
         l = self.unerase(w_list.lstorage)
@@ -1819,6 +1858,17 @@ class FloatListStrategy(ListStrategy):
                     return i
         raise ValueError
 
+    def _vectorized_find(self, w_list, obj, start, stop):
+        l = self.unerase(w_list.lstorage)
+        stop = min(stop, len(l))
+        i = start
+        while i < stop:
+            float_find_jmp.jit_merge_point()
+            if l[i] == obj:
+                return i
+            i += 1
+        raise ValueError
+
     @staticmethod
     def float_2_float_or_int(w_list):
         l = FloatListStrategy.unerase(w_list.lstorage)
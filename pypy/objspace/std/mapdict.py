@@ -1,7 +1,8 @@
 import weakref, sys
 
 from rpython.rlib import jit, objectmodel, debug, rerased
-from rpython.rlib.rarithmetic import intmask, r_uint
+from rpython.rlib.longlong2float import longlong2float, float2longlong
+from rpython.rlib.rarithmetic import intmask, r_uint, r_longlong
 
 from pypy.interpreter.baseobjspace import W_Root
 from pypy.objspace.std.dictmultiobject import (
@@ -9,6 +10,8 @@ from pypy.objspace.std.dictmultiobject import (
     BaseValueIterator, BaseItemIterator, _never_equal_to_string,
     W_DictObject,
 )
+from pypy.objspace.std.floatobject import W_FloatObject
+from pypy.objspace.std.intobject import W_IntObject
 from pypy.objspace.std.typeobject import MutableCell
 
 
@@ -25,11 +28,19 @@ NUM_DIGITS_POW2 = 1 << NUM_DIGITS
 # note: we use "x * NUM_DIGITS_POW2" instead of "x << NUM_DIGITS" because
 # we want to propagate knowledge that the result cannot be negative
 
+# how the value of an attribute is stored: as a W_Root, or (for exact ints
+# and floats, with withunboxedattrs) unboxed in an UnboxedStorage shared by
+# all the unboxed attributes of the object
+BOXED = 0
+UNBOXED_INT = 1
+UNBOXED_FLOAT = 2
+
 
 class AbstractAttribute(object):
     _immutable_fields_ = ['terminator']
     cache_attrs = None
     _size_estimate = 0
+    num_attributes = 0    # differs from length() if some are unboxed
 
     def __init__(self, space, terminator):
         self.space = space
@@ -45,21 +56,28 @@ class AbstractAttribute(object):
             jit.isconstant(obj) and
             not attr.ever_mutated
         ):
+            if isinstance(attr, UnboxedPlainAttribute):
+                return attr._box(self._pure_mapdict_read_unboxed(
+                    obj, attr.storageindex, attr.listindex))
             return self._pure_mapdict_read_storage(obj, attr.storageindex)
         else:
-            return obj._mapdict_read_storage(attr.storageindex)
+            return attr._direct_read(obj)
 
     @jit.elidable
     def _pure_mapdict_read_storage(self, obj, storageindex):
         return obj._mapdict_read_storage(storageindex)
 
+    @jit.elidable
+    def _pure_mapdict_read_unboxed(self, obj, storageindex, listindex):
+        return _read_unboxed_storage(obj, storageindex, listindex)
+
     def write(self, obj, name, index, w_value):
         attr = self.find_map_attr(name, index)
         if attr is None:
             return self.terminator._write_terminator(obj, name, index, w_value)
         if not attr.ever_mutated:
             attr.ever_mutated = True
-        obj._mapdict_write_storage(attr.storageindex, w_value)
+        attr._direct_write(obj, w_value)
         return True
 
     def delete(self, obj, name, index):
@@ -129,14 +147,19 @@ class AbstractAttribute(object):
         return None
 
     @jit.elidable
-    def _get_new_attr(self, name, index):
+    def _get_new_attr(self, name, index, kind):
         cache = self.cache_attrs
         if cache is None:
             cache = self.cache_attrs = {}
         attr = cache.get((name, index), None)
         if attr is None:
-            attr = PlainAttribute(name, index, self)
+            if kind == BOXED:
+                attr = PlainAttribute(name, index, self)
+            else:
+                attr = UnboxedPlainAttribute(name, index, self, kind)
             cache[name, index] = attr
+        elif attr.kind != kind:
+            attr = attr._boxed_attr()
         return attr
 
     def add_attr(self, obj, name, index, w_value):
@@ -150,7 +173,8 @@ class AbstractAttribute(object):
             oldattr._size_estimate = size_est
 
     def _add_attr_without_reordering(self, obj, name, index, w_value):
-        attr = self._get_new_attr(name, index)
+        attr = self._get_new_attr(name, index,
+                                  _unboxed_kind(self.space, index, w_value))
         attr._switch_map_and_write_storage(obj, w_value)
 
     @jit.unroll_safe
@@ -165,11 +189,11 @@ class AbstractAttribute(object):
         # the order is important here: first change the map, then the storage,
         # for the benefit of the special subclasses
         obj._set_mapdict_map(self)
-        obj._mapdict_write_storage(self.storageindex, w_value)
+        self._write_new_attribute(obj, w_value)
 
 
     @jit.elidable
-    def _find_branch_to_move_into(self, name, index):
+    def _find_branch_to_move_into(self, name, index, kind):
         # walk up the map chain to find an ancestor with lower order that
         # already has the current name as a child inserted
         current_order = sys.maxint
@@ -184,9 +208,11 @@ class AbstractAttribute(object):
                 # we reached the top, so we didn't find it anywhere,
                 # just add it to the top attribute
                 if not isinstance(current, PlainAttribute):
-                    return 0, self._get_new_attr(name, index)
+                    return 0, self._get_new_attr(name, index, kind)
 
             else:
+                if attr.kind != kind:
+                    attr = attr._boxed_attr()
                 return number_to_readd, attr
             # if not found try parent
             number_to_readd += 1
@@ -219,19 +245,20 @@ class AbstractAttribute(object):
         # enough to store all current attributes
         stack = None
         stack_index = 0
+        kind = _unboxed_kind(self.space, index, w_value)
         while True:
             current = self
-            number_to_readd, attr = self._find_branch_to_move_into(name, index)
+            number_to_readd, attr = self._find_branch_to_move_into(
+                    name, index, kind)
             # we found the attributes further up, need to save the
             # previous values of the attributes we passed
             if number_to_readd:
                 if stack is None:
-                    stack = [erase_map(None)] * (self.length() * 2)
+                    stack = [erase_map(None)] * (self.num_attributes * 2)
                 current = self
                 for i in range(number_to_readd):
                     assert isinstance(current, PlainAttribute)
-                    w_self_value = obj._mapdict_read_storage(
-                            current.storageindex)
+                    w_self_value = current._direct_read(obj)
                     stack[stack_index] = erase_map(current)
                     stack[stack_index + 1] = erase_item(w_self_value)
                     stack_index += 2
@@ -247,6 +274,9 @@ class AbstractAttribute(object):
             w_value = unerase_item(stack[stack_index + 1])
             name = next_map.name
             index = next_map.index
+            # re-added attributes keep their kind, so that the object never
+            # ends up using fewer storage slots than before
+            kind = next_map.kind
             self = obj._get_mapdict_map()
 
     def materialize_r_dict(self, space, obj, dict_w):
@@ -353,7 +383,7 @@ class DevolvedDictTerminator(Terminator):
         return Terminator.set_terminator(self, obj, terminator)
 
 class PlainAttribute(AbstractAttribute):
-    _immutable_fields_ = ['name', 'index', 'storageindex', 'back', 'ever_mutated?', 'order']
+    _immutable_fields_ = ['name', 'index', 'storageindex', 'back', 'ever_mutated?', 'order', 'kind']
 
     def __init__(self, name, index, back):
         AbstractAttribute.__init__(self, back.space, back.terminator)
@@ -364,6 +394,20 @@ class PlainAttribute(AbstractAttribute):
         self._size_estimate = self.length() * NUM_DIGITS_POW2
         self.ever_mutated = False
         self.order = len(back.cache_attrs) if back.cache_attrs else 0
+        self.kind = BOXED
+        self.num_attributes = back.num_attributes + 1
+
+    def _direct_read(self, obj):
+        return obj._mapdict_read_storage(self.storageindex)
+
+    def _direct_write(self, obj, w_value):
+        obj._mapdict_write_storage(self.storageindex, w_value)
+
+    def _write_new_attribute(self, obj, w_value):
+        obj._mapdict_write_storage(self.storageindex, w_value)
+
+    def _boxed_attr(self):
+        return self
 
     def _copy_attr(self, obj, new_obj):
         w_value = self.read(obj, self.name, self.index)
@@ -402,7 +446,7 @@ class PlainAttribute(AbstractAttribute):
         new_obj = self.back.materialize_r_dict(space, obj, dict_w)
         if self.index == DICT:
             w_attr = space.newtext(self.name)
-            dict_w[w_attr] = obj._mapdict_read_storage(self.storageindex)
+            dict_w[w_attr] = self._direct_read(obj)
         else:
             self._copy_attr(obj, new_obj)
         return new_obj
@@ -416,6 +460,138 @@ class PlainAttribute(AbstractAttribute):
     def __repr__(self):
         return "<PlainAttribute %s %s %s %r>" % (self.name, self.index, self.storageindex, self.back)
 
+
+class UnboxedPlainAttribute(PlainAttribute):
+    """ An attribute whose value is an exact int or float, stored unboxed.
+    All the unboxed attributes of an object share a single storage slot,
+    which contains an UnboxedStorage; the first of them allocates it.
+    """
+    _immutable_fields_ = ['listindex', 'firstunboxed']
+
+    def __init__(self, name, index, back, kind):
+        assert kind != BOXED
+        attr = back
+        while isinstance(attr, PlainAttribute):
+            if isinstance(attr, UnboxedPlainAttribute):
+                break
+            attr = attr.back
+        if isinstance(attr, UnboxedPlainAttribute):
+            self.firstunboxed = False
+            self.listindex = attr.listindex + 1
+        else:
+            self.firstunboxed = True
+            self.listindex = 0
+        PlainAttribute.__init__(self, name, index, back)
+        if not self.firstunboxed:
+            assert isinstance(attr, UnboxedPlainAttribute)
+            self.storageindex = attr.storageindex
+        self.kind = kind
+
+    def length(self):
+        if self.firstunboxed:
+            return self.storageindex + 1
+        return self.back.length()
+
+    def _box(self, value):
+        if self.kind == UNBOXED_INT:
+            return self.space.newint(intmask(float2longlong(value)))
+        return self.space.newfloat(value)
+
+    def _direct_read(self, obj):
+        return self._box(_read_unboxed_storage(
+            obj, self.storageindex, self.listindex))
+
+    def _unbox(self, w_value):
+        if self.kind == UNBOXED_INT:
+            assert isinstance(w_value, W_IntObject)
+            return longlong2float(r_longlong(w_value.intval))
+        assert isinstance(w_value, W_FloatObject)
+        return w_value.floatval
+
+    def _direct_write(self, obj, w_value):
+        if _unboxed_kind(self.space, self.index, w_value) != self.kind:
+            self._switch_to_boxed(obj, w_value)
+            return
+        storage = obj._mapdict_read_storage(self.storageindex)
+        assert isinstance(storage, UnboxedStorage)
+        storage.values[self.listindex] = self._unbox(w_value)
+
+    @jit.unroll_safe
+    def _switch_map_and_write_storage(self, obj, w_value):
+        if (not self.firstunboxed and
+                obj._get_mapdict_map().length() > self.length()):
+            # we are re-adding attributes in _reorder_and_add() and this
+            # attribute doesn't get a storage slot of its own: the storage
+            # of 'obj' may be laid out for a longer map, which matters for
+            # the special subclasses.  Lay it out again for this map.
+            storage = [None] * self.size_estimate()
+            for i in range(self.length()):
+                storage[i] = obj._mapdict_read_storage(i)
+            obj._set_mapdict_storage_and_map(storage, self)
+        PlainAttribute._switch_map_and_write_storage(self, obj, w_value)
+
+    @jit.unroll_safe
+    def _write_new_attribute(self, obj, w_value):
+        # the kind of w_value was checked by the caller.  The storage slot
+        # may still contain garbage if this is the first unboxed attribute.
+        if self.firstunboxed:
+            storage = UnboxedStorage([0.0] * (self.listindex + 1))
+            obj._mapdict_write_storage(self.storageindex, storage)
+        else:
+            storage = obj._mapdict_read_storage(self.storageindex)
+            assert isinstance(storage, UnboxedStorage)
+            if len(storage.values) <= self.listindex:
+                values = [0.0] * (self.listindex + 1)
+                for i in range(len(storage.values)):
+                    values[i] = storage.values[i]
+                storage.values = values
+        storage.values[self.listindex] = self._unbox(w_value)
+
+    def _boxed_attr(self):
+        # values of different types were seen for this attribute: replace
+        # it with a boxed attribute for all objects that get it from now on
+        # (the objects that already use this map keep working unchanged)
+        key = (self.name, self.index)
+        attr = self.back.cache_attrs.get(key, None)
+        if attr is None or attr.kind != BOXED:
+            attr = PlainAttribute(self.name, self.index, self.back)
+            attr.order = self.order
+            self.back.cache_attrs[key] = attr
+        return attr
+
+    def _switch_to_boxed(self, obj, w_value):
+        self._boxed_attr()
+        new_obj = obj._get_mapdict_map().copy(obj)
+        flag = new_obj._get_mapdict_map().write(
+            new_obj, self.name, self.index, w_value)
+        assert flag
+        obj._set_mapdict_storage_and_map(new_obj.storage, new_obj.map)
+
+    def __repr__(self):
+        return "<UnboxedPlainAttribute %s %s %s %s %r>" % (
+            self.name, self.index, self.storageindex, self.listindex,
+            self.back)
+
+
+class UnboxedStorage(W_Root):
+    """ The values of the unboxed attributes of one object, as floats (ints
+    are stored as the bits of a float).  Only ever seen by mapdict. """
+    def __init__(self, values):
+        self.values = values
+
+def _read_unboxed_storage(obj, storageindex, listindex):
+    storage = obj._mapdict_read_storage(storageindex)
+    assert isinstance(storage, UnboxedStorage)
+    return storage.values[listindex]
+
+def _unboxed_kind(space, index, w_value):
+    if space.config.objspace.std.withunboxedattrs and index != SPECIAL:
+        if type(w_value) is W_IntObject:
+            return UNBOXED_INT
+        if type(w_value) is W_FloatObject:
+            return UNBOXED_FLOAT
+    return BOXED
+
 class MapAttrCache(object):
     def __init__(self, space):
         SIZE = 1 << space.config.objspace.std.methodcachesizeexp
@@ -919,6 +1095,7 @@ class MapDictIteratorItems(BaseItemIterator):
 class CacheEntry(object):
     version_tag = None
     storageindex = 0
+    unboxed_attr = None # for attributes that are not stored as a W_Root
     w_method = None # for callmethod
     success_counter = 0
     failure_counter = 0
@@ -951,7 +1128,8 @@ def init_mapdict_cache(pycode):
     pycode._mapdict_caches = [INVALID_CACHE_ENTRY] * num_entries
 
 @jit.dont_look_inside
-def _fill_cache(pycode, nameindex, map, version_tag, storageindex, w_method=None):
+def _fill_cache(pycode, nameindex, map, version_tag, storageindex, w_method=None,
+                unboxed_attr=None):
     entry = pycode._mapdict_caches[nameindex]
     if entry is INVALID_CACHE_ENTRY:
         entry = CacheEntry()
@@ -959,6 +1137,7 @@ def _fill_cache(pycode, nameindex, map, version_tag, storageindex, w_method=None
     entry.map_wref = weakref.ref(map)
     entry.version_tag = version_tag
     entry.storageindex = storageindex
+    entry.unboxed_attr = unboxed_attr
     entry.w_method = w_method
     if pycode.space.config.objspace.std.withmethodcachecounter:
         entry.failure_counter += 1
@@ -970,6 +1149,8 @@ def LOAD_ATTR_caching(pycode, w_obj, nameindex):
     map = w_obj._get_mapdict_map()
     if entry.is_valid_for_map(map) and entry.w_method is None:
         # everything matches, it's incredibly fast
+        if entry.unboxed_attr is not None:
+            return entry.unboxed_attr._direct_read(w_obj)
         return w_obj._mapdict_read_storage(entry.storageindex)
     return LOAD_ATTR_slowpath(pycode, w_obj, nameindex, map)
 LOAD_ATTR_caching._always_inline_ = True
@@ -1016,8 +1197,12 @@ def LOAD_ATTR_slowpath(pycode, w_obj, nameindex, map):
                     # Note that if map.terminator is a DevolvedDictTerminator
                     # or the class provides its own dict, not using mapdict, then:
                     # map.find_map_attr will always return None if index==DICT.
-                    _fill_cache(pycode, nameindex, map, version_tag, attr.storageindex)
-                    return w_obj._mapdict_read_storage(attr.storageindex)
+                    unboxed_attr = None
+                    if isinstance(attr, UnboxedPlainAttribute):
+                        unboxed_attr = attr
+                    _fill_cache(pycode, nameindex, map, version_tag,
+                                attr.storageindex, unboxed_attr=unboxed_attr)
+                    return attr._direct_read(w_obj)
     if space.config.objspace.std.withmethodcachecounter:
         INVALID_CACHE_ENTRY.failure_counter += 1
     return space.getattr(w_obj, w_name)
@@ -8,7 +8,7 @@ from pypy.interpreter.special import Ellipsis
 from pypy.interpreter.pycode import PyCode
 from pypy.interpreter import unicodehelper
 from pypy.objspace.std.boolobject import W_BoolObject
-from pypy.objspace.std.bytesobject import W_BytesObject
+from pypy.objspace.std.bytesobject import W_AbstractBytesObject
 from pypy.objspace.std.complexobject import W_ComplexObject
 from pypy.objspace.std.dictmultiobject import W_DictMultiObject
 from pypy.objspace.std.intobject import W_IntObject
@@ -246,7 +246,7 @@ def unmarshal_complex_bin(space, u, tc):
     return space.newcomplex(real, imag)
 
 
-@marshaller(W_BytesObject)
+@marshaller(W_AbstractBytesObject)
 def marshal_bytes(space, w_str, m):
     s = space.bytes_w(w_str)
     if m.version >= 1 and space.is_interned_str(s):
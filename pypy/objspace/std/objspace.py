@@ -81,7 +81,8 @@ class StdObjSpace(ObjSpace):
             W_TypeObject.typedef: W_TypeObject,
             W_UnicodeObject.typedef: W_UnicodeObject,
         }
-        if self.config.objspace.std.withstrbuf:
+        if (self.config.objspace.std.withstrbuf or
+                self.config.objspace.std.withstrbuilder):
             builtin_type_classes[W_BytesObject.typedef] = W_AbstractBytesObject
 
         self.builtin_types = {}
@@ -558,6 +559,17 @@ class StdObjSpace(ObjSpace):
             raise oefmt(self.w_ValueError, "Expected tuple of length 3")
         return self.int_w(l_w[0]), self.int_w(l_w[1]), self.int_w(l_w[2])
 
+    _DescrOperation_inplace_add = inplace_add
+
+    def inplace_add(self, w_lhs, w_rhs):
+        # a shortcut for repeated 's += piece' on strings, see strbufobject.py
+        if self.config.objspace.std.withstrbuilder:
+            from pypy.objspace.std.strbufobject import inplace_add
+            w_result = inplace_add(self, w_lhs, w_rhs)
+            if w_result is not None:
+                return w_result
+        return self._DescrOperation_inplace_add(w_lhs, w_rhs)
+
     _DescrOperation_is_true = is_true
 
     def is_true(self, w_obj):
@@ -9,6 +9,11 @@ from pypy.interpreter.error import OperationError
 from rpython.rlib.rstring import StringBuilder
 
 
+# with withstrbuilder, 'x += y' only switches to a builder if the result is
+# at least that long: below, copying is cheap and the builder isn't worth it
+BUILDER_THRESHOLD = 64
+
+
 class W_StringBufferObject(W_AbstractBytesObject):
     w_str = None
 
@@ -37,12 +42,30 @@ class W_StringBufferObject(W_AbstractBytesObject):
     def str_w(self, space):
         return self.force()
 
+    charbuf_w = str_w
+
     def buffer_w(self, space, flags):
         return StringBuffer(self.force())
 
     def readbuf_w(self, space):
         return StringBuffer(self.force())
 
+    def ord(self, space):
+        self.force()
+        return self.w_str.ord(space)
+
+    def append(self, other):
+        """Return a W_StringBufferObject for self + other.  The builder is
+        shared with self if nothing was appended to it since self was made,
+        so that a chain of appends doesn't copy the string."""
+        if self.builder.getlength() != self.length:
+            builder = StringBuilder()
+            builder.append(self.force())
+        else:
+            builder = self.builder
+        builder.append(other)
+        return W_StringBufferObject(builder)
+
     def descr_len(self, space):
         return space.newint(self.length)
 
@@ -53,13 +76,7 @@ class W_StringBufferObject(W_AbstractBytesObject):
             if e.match(space, space.w_TypeError):
                 return space.w_NotImplemented
             raise
-        if self.builder.getlength() != self.length:
-            builder = StringBuilder()
-            builder.append(self.force())
-        else:
-            builder = self.builder
-        builder.append(other)
-        return W_StringBufferObject(builder)
+        return self.append(other)
 
     def descr_str(self, space):
         # you cannot get subclasses of W_StringBufferObject here
@@ -67,6 +84,23 @@ class W_StringBufferObject(W_AbstractBytesObject):
         return self
 
 
+def inplace_add(space, w_lhs, w_rhs):
+    """Shortcut for 'w_lhs += w_rhs' with withstrbuilder.  If w_lhs and
+    w_rhs are exact strs and the result is long enough, return a
+    W_StringBufferObject appending to a builder.  Return None if the
+    shortcut doesn't apply."""
+    if type(w_rhs) is W_BytesObject:
+        if type(w_lhs) is W_StringBufferObject:
+            return w_lhs.append(w_rhs._value)
+        if (type(w_lhs) is W_BytesObject and
+                len(w_lhs._value) + len(w_rhs._value) >= BUILDER_THRESHOLD):
+            builder = StringBuilder()
+            builder.append(w_lhs._value)
+            builder.append(w_rhs._value)
+            return W_StringBufferObject(builder)
+    return None
+
+
 delegation_dict = {}
 for key, value in W_BytesObject.typedef.rawdict.iteritems():
     if not isinstance(value, interp2app):
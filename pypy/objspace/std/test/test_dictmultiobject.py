@@ -1260,6 +1260,7 @@ class Config:
             withcelldict = False
             methodcachesizeexp = 11
             withmethodcachecounter = False
+            withunboxedattrs = False
 
 FakeSpace.config = Config()
 
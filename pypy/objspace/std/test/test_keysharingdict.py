@@ -0,0 +1,111 @@
+from pypy.objspace.std.test.test_dictmultiobject import FakeSpace
+from pypy.objspace.std.dictmultiobject import (
+    ObjectDictStrategy, UnicodeDictStrategy)
+from pypy.objspace.std.keysharingdict import *
+
+
+class FakeUnicodeSpace(FakeSpace):
+    w_unicode = unicode
+
+    def unicode_w(self, w_obj):
+        assert isinstance(w_obj, unicode)
+        return w_obj
+
+    def newunicode(self, u):
+        return u
+
+    def newlist_unicode(self, l):
+        return l
+
+space = FakeUnicodeSpace()
+
+def test_keymaps():
+    root = KeyMapTerminator()
+    m1 = root.get_next(u"a").get_next(u"b")
+    m2 = root.get_next(u"a").get_next(u"b")
+    assert m1 is m2
+    assert m1.length() == 2
+    assert m1.get_keys() == [u"a", u"b"]
+    assert m1.find_index(u"a") == 0
+    assert m1.find_index(u"b") == 1
+    assert m1.find_index(u"c") == -1
+    assert root.get_cached_next(u"a") is m1.back
+    assert root.get_cached_next(u"b") is None
+    assert root.get_next(u"b") is not m1
+
+def test_long_keymap():
+    keymap = KeyMapTerminator()
+    for i in range(SMALL_MAP * 2):
+        keymap = keymap.get_next(u"k%d" % i)
+    for i in range(SMALL_MAP * 2):
+        assert keymap.find_index(u"k%d" % i) == i
+    assert keymap.find_index(u"missing") == -1
+
+def test_dicts_share_keys():
+    root = KeyMapTerminator()
+    d1 = new_key_sharing_dict(space, root)
+    d2 = new_key_sharing_dict(space, root)
+    for d, values in [(d1, [1, 2, 3]), (d2, [4, 5, 6])]:
+        for key, value in zip([u"x", u"y", u"z"], values):
+            d.setitem(key, value)
+    strategy = d1.get_strategy()
+    storage1 = strategy.unerase(d1.dstorage)
+    storage2 = strategy.unerase(d2.dstorage)
+    assert storage1.keymap is storage2.keymap
+    assert storage1.values_w == [1, 2, 3]
+    assert storage2.values_w == [4, 5, 6]
+    assert d2.getitem(u"y") == 5
+    assert d2.getitem(u"w") is None
+    assert d2.w_keys() == [u"x", u"y", u"z"]
+    assert d2.values() == [4, 5, 6]
+
+def test_setitem_existing_key():
+    d = new_key_sharing_dict(space, KeyMapTerminator())
+    d.setitem(u"a", 1)
+    d.setitem(u"b", 2)
+    d.setitem(u"a", 3)
+    assert type(d.get_strategy()) is KeySharingDictStrategy
+    assert d.length() == 2
+    assert d.w_keys() == [u"a", u"b"]
+    assert d.values() == [3, 2]
+
+def test_switch_strategy():
+    d = new_key_sharing_dict(space, KeyMapTerminator())
+    d.setitem(u"a", 1)
+    d.setitem(u"b", 2)
+    d.delitem(u"a")
+    assert type(d.get_strategy()) is UnicodeDictStrategy
+    assert d.getitem(u"b") == 2
+    d = new_key_sharing_dict(space, KeyMapTerminator())
+    d.setitem(u"a", 1)
+    d.setitem(1.5, 2)
+    assert type(d.get_strategy()) is ObjectDictStrategy
+    assert d.getitem(u"a") == 1
+    assert d.getitem(1.5) == 2
+
+def test_too_many_keys():
+    d = new_key_sharing_dict(space, KeyMapTerminator())
+    for i in range(MAX_KEYS):
+        d.setitem(u"k%d" % i, i)
+    assert type(d.get_strategy()) is KeySharingDictStrategy
+    d.setitem(u"last", 42)
+    assert type(d.get_strategy()) is UnicodeDictStrategy
+    assert d.length() == MAX_KEYS + 1
+    assert d.getitem(u"k5") == 5
+    assert d.getitem(u"last") == 42
+
+def test_stop_growing():
+    root = KeyMapTerminator()
+    d1 = new_key_sharing_dict(space, root)
+    d1.setitem(u"a", 1)
+    d1.setitem(u"b", 2)
+    d2 = new_key_sharing_dict(space, root)
+    d2.setitem(u"a", 3)
+    root.stop_growing()
+    d2.setitem(u"b", 4)
+    assert type(d2.get_strategy()) is KeySharingDictStrategy
+    d2.setitem(u"c", 5)
+    assert type(d2.get_strategy()) is UnicodeDictStrategy
+    assert d2.getitem(u"b") == 4
+    assert d2.getitem(u"c") == 5
+    assert root.get_next(u"a").get_next(u"b").cache_next is None
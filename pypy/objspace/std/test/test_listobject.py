@@ -2,7 +2,7 @@
 import py
 import random
 from pypy.objspace.std.listobject import W_ListObject, SizeListStrategy,\
-     IntegerListStrategy, ObjectListStrategy
+     IntegerListStrategy, FloatListStrategy, ObjectListStrategy, vectorize_find
 from pypy.interpreter.error import OperationError
 from rpython.rlib.rarithmetic import is_valid_int
 
@@ -417,7 +417,9 @@ class TestW_ListObject(object):
         assert isinstance(w_lst.strategy, SizeListStrategy)
         assert w_lst.strategy.sizehint == 13
 
-    def test_find_fast_on_intlist(self, monkeypatch):
+    @py.test.mark.parametrize('vectorize', [False, True])
+    def test_find_fast_on_intlist(self, monkeypatch, vectorize):
+        monkeypatch.setattr(vectorize_find, "enabled", vectorize)
         monkeypatch.setattr(self.space, "eq_w", None)
         w = self.space.wrap
         intlist = W_ListObject(self.space, [w(1),w(2),w(3),w(4),w(5),w(6),w(7)])
@@ -430,6 +432,22 @@ class TestW_ListObject(object):
         with py.test.raises(ValueError):
             intlist.find(w(4), 0, 2)
 
+    @py.test.mark.parametrize('vectorize', [False, True])
+    def test_find_fast_on_floatlist(self, monkeypatch, vectorize):
+        monkeypatch.setattr(vectorize_find, "enabled", vectorize)
+        monkeypatch.setattr(self.space, "eq_w", None)
+        w = self.space.wrap
+        nan = float('nan')
+        floatlist = W_ListObject(self.space, [w(1.5), w(-0.0), w(nan),
+                                              w(4.5), w(4.5)])
+        assert isinstance(floatlist.strategy, FloatListStrategy)
+        assert floatlist.find(w(4.5), 0, 5) == 3
+        assert floatlist.find(w(4.5), 4, 100) == 4
+        assert floatlist.find(w(0.0), 0, 5) == 1
+        assert floatlist.find(w(nan), 0, 5) == 2
+        with py.test.raises(ValueError):
+            floatlist.find(w(4.5), 0, 3)
+
 
 class AppTestListObject(object):
     #spaceconfig = {"objspace.std.withliststrategies": True}  # it's the default
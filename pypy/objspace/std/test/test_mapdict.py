@@ -7,6 +7,7 @@ class Config:
             withcelldict = False
             methodcachesizeexp = 11
             withmethodcachecounter = False
+            withunboxedattrs = False
 
 space = FakeSpace()
 space.config = Config
@@ -503,6 +504,157 @@ def test_size_prediction():
                 obj.setdictvalue(space, a, 50)
         assert c.terminator.size_estimate() in [(i + 10) // 2, (i + 11) // 2]
 
+def test_unboxed_attributes(monkeypatch):
+    monkeypatch.setattr(Config.objspace.std, "withunboxedattrs", True)
+    import sys
+    from pypy.objspace.std.intobject import W_IntObject
+    from pypy.objspace.std.floatobject import W_FloatObject
+    monkeypatch.setattr(space, "newint", W_IntObject, raising=False)
+    monkeypatch.setattr(space, "newfloat", W_FloatObject, raising=False)
+    cls = Class()
+    obj = cls.instantiate()
+    obj.setdictvalue(space, "a", W_IntObject(1))
+    w_b = W_Root()
+    obj.setdictvalue(space, "b", w_b)
+    obj.setdictvalue(space, "c", W_FloatObject(2.5))
+    assert obj.map.length() == 2
+    assert isinstance(obj.map, UnboxedPlainAttribute)
+    assert obj.map.storageindex == 0
+    assert obj.map.listindex == 1
+    unboxed = obj.storage[0]
+    assert isinstance(unboxed, UnboxedStorage)
+    assert len(unboxed.values) == 2
+    assert obj.storage[1] is w_b
+    assert obj.getdictvalue(space, "a").intval == 1
+    assert obj.getdictvalue(space, "b") is w_b
+    assert obj.getdictvalue(space, "c").floatval == 2.5
+
+    for value in [-1, sys.maxint, -sys.maxint - 1]:
+        obj.setdictvalue(space, "a", W_IntObject(value))
+        assert obj.getdictvalue(space, "a").intval == value
+    obj.setdictvalue(space, "c", W_FloatObject(-0.5))
+    assert obj.storage[0] is unboxed
+    assert obj.getdictvalue(space, "c").floatval == -0.5
+
+    # the same map is used for objects with the same attribute types
+    obj2 = cls.instantiate()
+    obj2.setdictvalue(space, "a", W_IntObject(5))
+    obj2.setdictvalue(space, "b", w_b)
+    obj2.setdictvalue(space, "c", W_FloatObject(6.5))
+    assert obj2.map is obj.map
+    assert obj2.storage[0] is not unboxed
+
+    # writing a value of another type devolves to a boxed attribute
+    oldmap = obj.map
+    w_a = W_Root()
+    obj.setdictvalue(space, "a", w_a)
+    assert obj.map is not oldmap
+    assert obj.map.find_map_attr("a", DICT).kind == BOXED
+    assert obj.map.find_map_attr("c", DICT).kind == UNBOXED_FLOAT
+    assert obj.getdictvalue(space, "a") is w_a
+    assert obj.getdictvalue(space, "b") is w_b
+    assert obj.getdictvalue(space, "c").floatval == -0.5
+    # obj2 is not affected, but new objects use the boxed attribute
+    assert obj2.map is oldmap
+    assert obj2.getdictvalue(space, "a").intval == 5
+    obj3 = cls.instantiate()
+    obj3.setdictvalue(space, "a", W_IntObject(7))
+    assert obj3.map.kind == BOXED
+    assert obj3.getdictvalue(space, "a").intval == 7
+
+    # deleting an unboxed attribute
+    assert obj2.deldictvalue(space, "a")
+    assert obj2.getdictvalue(space, "a") is None
+    assert obj2.getdictvalue(space, "b") is w_b
+    assert obj2.getdictvalue(space, "c").floatval == 6.5
+
+def test_no_unboxed_attributes():
+    from pypy.objspace.std.intobject import W_IntObject
+    from pypy.objspace.std.floatobject import W_FloatObject
+    cls = Class()
+    obj = cls.instantiate()
+    w_a = W_IntObject(1)
+    w_b = W_FloatObject(2.5)
+    obj.setdictvalue(space, "a", w_a)
+    obj.setdictvalue(space, "b", w_b)
+    assert type(obj.map) is PlainAttribute
+    assert type(obj.map.back) is PlainAttribute
+    assert obj.getdictvalue(space, "a") is w_a
+    assert obj.getdictvalue(space, "b") is w_b
+
+def test_unboxed_attributes_specialized_class(monkeypatch):
+    monkeypatch.setattr(Config.objspace.std, "withunboxedattrs", True)
+    from pypy.objspace.std.mapdict import _make_storage_mixin_size_n
+    from pypy.objspace.std.objectobject import W_ObjectObject
+    from pypy.objspace.std.floatobject import W_FloatObject
+    monkeypatch.setattr(space, "newfloat", W_FloatObject, raising=False)
+    class objectcls(W_ObjectObject):
+        objectmodel.import_from_mixin(BaseUserClassMapdict)
+        objectmodel.import_from_mixin(MapdictDictSupport)
+        objectmodel.import_from_mixin(_make_storage_mixin_size_n(2))
+    cls = Class()
+    obj = objectcls()
+    obj.user_setup(space, cls)
+    names = "abcdefgh"
+    for i, name in enumerate(names):
+        obj.setdictvalue(space, name, W_FloatObject(i + 0.5))
+    assert obj.map.length() == 1
+    assert isinstance(obj._value0, UnboxedStorage)
+    for i, name in enumerate(names):
+        assert obj.getdictvalue(space, name).floatval == i + 0.5
+    w_x = W_Root()
+    obj.setdictvalue(space, "x", w_x)
+    assert obj.getdictvalue(space, "x") is w_x
+    assert obj.getdictvalue(space, "h").floatval == 7.5
+
+def test_unboxed_attributes_insert_different_orders(monkeypatch):
+    monkeypatch.setattr(Config.objspace.std, "withunboxedattrs", True)
+    from itertools import permutations
+    from pypy.objspace.std.mapdict import _make_storage_mixin_size_n
+    from pypy.objspace.std.objectobject import W_ObjectObject
+    from pypy.objspace.std.intobject import W_IntObject
+    from pypy.objspace.std.floatobject import W_FloatObject
+    monkeypatch.setattr(space, "newint", W_IntObject, raising=False)
+    monkeypatch.setattr(space, "newfloat", W_FloatObject, raising=False)
+    class objectcls(W_ObjectObject):
+        objectmodel.import_from_mixin(BaseUserClassMapdict)
+        objectmodel.import_from_mixin(MapdictDictSupport)
+        objectmodel.import_from_mixin(_make_storage_mixin_size_n(3))
+    class W_Box(W_Root):
+        def __init__(self, value):
+            self.value = value
+    def unwrap(w_value):
+        if isinstance(w_value, W_IntObject):
+            return w_value.intval
+        if isinstance(w_value, W_FloatObject):
+            return w_value.floatval
+        return w_value.value
+    makers = {"a": W_IntObject, "b": W_Box, "c": W_FloatObject,
+              "d": W_IntObject, "e": W_Box}
+    cls = Class()
+    for i, attributes in enumerate(permutations("abcde")):
+        obj = objectcls()
+        obj.user_setup(space, cls)
+        for j, attr in enumerate(attributes):
+            obj.setdictvalue(space, attr, makers[attr](i * 10 + j))
+            for k, attr in enumerate(attributes[:j + 1]):
+                assert unwrap(obj.getdictvalue(space, attr)) == i * 10 + k
+
+    # moving into the branch of an unboxed attribute that doesn't need a
+    # storage slot, while the object uses a storage list
+    makers = {"a": W_Box, "b": W_Box, "c": W_IntObject, "d": W_Box,
+              "e": W_FloatObject}
+    cls = Class()
+    for attributes in ["abce", "abcde"]:
+        obj = objectcls()
+        obj.user_setup(space, cls)
+        for j, attr in enumerate(attributes):
+            obj.setdictvalue(space, attr, makers[attr](j))
+    assert obj.map.name == "d"
+    assert obj.map.back.name == "e"
+    for j, attr in enumerate("abcde"):
+        assert unwrap(obj.getdictvalue(space, attr)) == j
+
 # ___________________________________________________________
 # dict tests
 
@@ -873,6 +1025,46 @@ class AppTestWithMapDict(object):
         d = x.__dict__
         assert list(__pypy__.reversed_dict(d)) == d.keys()[::-1]
 
+    def test_unboxed_attributes(self):
+        import sys
+        class A(object):
+            pass
+        class MyInt(int):
+            pass
+        a = A()
+        a.x = 1
+        a.y = 2.5
+        a.z = "z"
+        assert a.x == 1
+        assert type(a.x) is int
+        assert a.y == 2.5
+        assert a.__dict__ == {"x": 1, "y": 2.5, "z": "z"}
+        for value in [-1, sys.maxint, -sys.maxint - 1, True, MyInt(3),
+                      1.5, 2 ** 100, "x", None]:
+            a.x = value
+            assert a.x == value
+            assert type(a.x) is type(value)
+        a.y = float("inf")
+        assert a.y == float("inf")
+        a.y = -0.0
+        assert str(a.y) == "-0.0"
+        del a.y
+        assert not hasattr(a, "y")
+        assert a.z == "z"
+        b = A()
+        b.x = 3
+        b.y = 4.5
+        total = 0
+        for i in range(100):
+            total += b.x
+            b.x = i
+        assert total == 3 + sum(range(99))
+        assert b.y == 4.5
+
+
+class AppTestWithUnboxedAttrs(AppTestWithMapDict):
+    spaceconfig = {"objspace.std.withunboxedattrs": True}
+
 
 class AppTestWithMapDictAndCounters(object):
     spaceconfig = {"objspace.std.withmethodcachecounter": True}
@@ -1267,6 +1459,11 @@ class AppTestWithMapDictAndCounters(object):
 
 
 
+class AppTestWithUnboxedAttrsAndCounters(AppTestWithMapDictAndCounters):
+    spaceconfig = {"objspace.std.withmethodcachecounter": True,
+                   "objspace.std.withunboxedattrs": True}
+
+
 class AppTestGlobalCaching(AppTestWithMapDict):
     spaceconfig = {"objspace.std.withmethodcachecounter": True}
 
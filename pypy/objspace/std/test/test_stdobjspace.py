@@ -64,6 +64,16 @@ class TestW_StdObjSpace:
         cls = space._get_interplevel_cls(space.w_bytes)
         assert cls is W_AbstractBytesObject
 
+    def test_withstrbuilder_fastpath_isinstance(self):
+        from pypy.objspace.std.bytesobject import (
+            W_AbstractBytesObject, W_BytesObject)
+
+        space = gettestobjspace(withstrbuilder=True)
+        cls = space._get_interplevel_cls(space.w_bytes)
+        assert cls is W_AbstractBytesObject
+        space = gettestobjspace(withstrbuilder=False)
+        assert space._get_interplevel_cls(space.w_bytes) is W_BytesObject
+
     def test_wrap_various_unsigned_types(self):
         import sys
         from rpython.rlib.rarithmetic import r_uint
@@ -83,3 +83,102 @@ class AppTestStringObject(test_bytesobject.AppTestBytesObject):
         a = 'a'
         a += 'b'
         raises(TypeError, "a += 5")
+
+
+class AppTestStringBuilder(object):
+    spaceconfig = {"objspace.std.withstrbuilder": True}
+
+    def test_inplace_add_bytes(self):
+        import __pypy__
+        s = 'x' * 63
+        s += 'y'
+        assert 'W_StringBufferObject' in __pypy__.internal_repr(s)
+        for i in range(10):
+            s += str(i)
+        assert 'W_StringBufferObject' in __pypy__.internal_repr(s)
+        assert type(s) is str
+        assert len(s) == 74
+        assert s == 'x' * 63 + 'y0123456789'
+
+    def test_inplace_add_unicode(self):
+        import __pypy__
+        u = u'x' * 100
+        u += u'y'
+        assert 'W_UnicodeObject' in __pypy__.internal_repr(u)
+
+    def test_short_strings(self):
+        import __pypy__
+        s = 'a'
+        s += 'b'
+        assert 'W_BytesObject' in __pypy__.internal_repr(s)
+        s = 'x' * 100
+        t = s + 'y'
+        assert 'W_BytesObject' in __pypy__.internal_repr(t)
+
+    def test_methods_flatten(self):
+        s = 'x' * 70
+        s += 'yz'
+        assert s.upper() == 'X' * 70 + 'YZ'
+        assert s[69:] == 'xyz'
+        assert s.count('x') == 70
+        assert str.endswith(s, 'yz')
+        assert '%s!' % s == 'x' * 70 + 'yz!'
+        assert '{}!'.format(s) == 'x' * 70 + 'yz!'
+        assert s.decode('ascii') == u'x' * 70 + u'yz'
+        assert hash(s) == hash('x' * 70 + 'yz')
+        assert {'x' * 70 + 'yz': 42}[s] == 42
+        s += '!'
+        assert s == 'x' * 70 + 'yz!'
+
+    def test_shared_builder(self):
+        s = 'a' * 70
+        s += 'b'
+        t = s
+        s += 'c'
+        t += 'd'
+        assert s == 'a' * 70 + 'bc'
+        assert t == 'a' * 70 + 'bd'
+
+    def test_mixed_types(self):
+        s = 'x' * 70
+        s += u'y'
+        assert type(s) is unicode
+        assert s == u'x' * 70 + u'y'
+        s = 'x' * 70
+        s += 'y'
+        assert 'y' in s and u'y' in s
+        raises(TypeError, "s += 5")
+
+    def test_as_argument(self):
+        import marshal
+        s = '1' * 70
+        s += '2'
+        assert int(s) == int('1' * 70 + '2')
+        assert float(s) == float('1' * 70 + '2')
+        assert marshal.loads(marshal.dumps(s)) == '1' * 70 + '2'
+        assert type(marshal.loads(marshal.dumps(s))) is str
+        assert '-'.join([s, s]) == '-'.join(['1' * 70 + '2'] * 2)
+
+    def test_subclass(self):
+        class S(str):
+            def __iadd__(self, other):
+                return 42
+        s = S('x' * 70)
+        s += 'y'
+        assert s == 42
+        class T(str):
+            pass
+        s = T('x' * 70)
+        s += 'y'
+        assert type(s) is str
+        assert s == 'x' * 70 + 'y'
+
+
+class AppTestNoStringBuilder(object):
+    spaceconfig = {"objspace.std.withstrbuilder": False}
+
+    def test_inplace_add(self):
+        import __pypy__
+        s = 'x' * 100
+        s += 'y'
+        assert 'W_BytesObject' in __pypy__.internal_repr(s)
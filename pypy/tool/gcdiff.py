@@ -0,0 +1,269 @@
+#! /usr/bin/env python
+"""
+Compares two dumpfiles produced by gc.dump_rpy_heap(), and prints the
+growth of the memory per RPython type and per app-level class.
+
+Syntax:  gcdiff.py  [options]  <dumpfile1>  <dumpfile2>  [<typeids.txt>]
+
+By default, typeids.txt is loaded from the same dir as dumpfile2.  The
+names of the app-level classes are loaded from '<dumpfile>.classes',
+written next to the dump by gc.dump_rpy_heap(filename,
+write_classes=True); if it is missing, the
+classes are named after their address, which only makes sense to compare
+two dumps of the same process.
+
+The dumps are read in chunks, three times each, so that files larger
+than the memory can be processed.  Only the app-level classes and their
+maps are kept in memory.  The 'retained' size of an object is estimated
+as its own size plus the size of the objects it is the only one to
+reference (one level deep); the reference counts are approximated with
+a table of 2**hash_bits entries.
+
+Options:
+    --top=N             show the N entries that grew most (default 20)
+    --hash-bits=N       size of the reference counting table (default 22)
+"""
+import sys, array, os
+from pypy.tool.gcdump import Stat
+
+CHUNK_WORDS = 1024 * 1024
+MAX_COUNT = 255
+
+
+def read_objects(filename, chunk_words=CHUNK_WORDS):
+    """Iterate over the objects of a dump, as tuples (addr, typenum, size,
+    refs), reading the file in chunks.  The marker between the roots and
+    the other objects is skipped.
+    """
+    f = open(filename, 'rb')
+    try:
+        pending = []    # the words of the current object so far
+        last = None
+        while True:
+            a = array.array('l')
+            try:
+                a.fromfile(f, chunk_words)
+            except EOFError:
+                pass    # the end of the file, 'a' contains the rest
+            if len(a) == 0:
+                break
+            last = a[-1]
+            a = a.tolist()    # array.index() has no 'start' argument
+            i = 0
+            while i < len(a):
+                # the first three words of an object are never -1
+                try:
+                    j = a.index(-1, i + max(0, 3 - len(pending)))
+                except ValueError:
+                    pending.extend(a[i:])
+                    break
+                if pending:
+                    words = pending + a[i:j]
+                    pending = []
+                else:
+                    words = a[i:j]
+                if words[0] != 0:
+                    yield (words[0], words[1], words[2], words[3:])
+                i = j + 1
+        assert not pending and last == -1, (
+            "invalid or truncated dump file (or 32/64-bit mix): %s" % (
+                filename,))
+    finally:
+        f.close()
+
+
+def load_class_names(filename):
+    """Load the '<dumpfile>.classes' file: {class address: name}."""
+    names = {}
+    filename += '.classes'
+    if os.path.isfile(filename):
+        for line in open(filename):
+            words = line.split()
+            if len(words) == 2:
+                names[int(words[0])] = words[1]
+    return names
+
+
+class DumpStat(object):
+    """The statistics of one dump: for each RPython type number and each
+    app-level class, [count, total size, retained size].
+    """
+
+    def __init__(self, stat, hash_bits=22):
+        self.stat = stat      # the gcdump.Stat with the typeids
+        self.hash_bits = hash_bits
+        self.mask = (1 << hash_bits) - 1
+        self.find_special_types()
+
+    def find_special_types(self):
+        # the type numbers of the type objects, and of the maps of the
+        # instances of user classes, see pypy.objspace.std.mapdict
+        self.typeobject_nums = set()
+        self.terminator_nums = set()
+        self.attribute_nums = set()
+        for num, name in self.stat.typeids.items():
+            words = name.split()
+            if not words:
+                continue
+            name = words[0]
+            if name.endswith('.W_TypeObject'):
+                self.typeobject_nums.add(num)
+            elif '.mapdict.' in name:
+                if name.endswith('Terminator'):
+                    self.terminator_nums.add(num)
+                elif name.endswith('Attribute'):
+                    self.attribute_nums.add(num)
+
+    def _hash(self, addr):
+        return ((addr >> 3) ^ (addr >> (3 + self.hash_bits))) & self.mask
+
+    def summarize(self, filename, chunk_words=CHUNK_WORDS):
+        self.by_type = {}     # {typenum: [count, size, retained]}
+        self.by_class = {}    # {class name: [count, size, retained]}
+        class_names = load_class_names(filename)
+        print >> sys.stderr, 'reading %s...' % (filename,),
+        #
+        # Pass 1: find the class of each map
+        typeobjects = set()
+        terminators = {}
+        attributes = {}
+        for addr, typenum, size, refs in read_objects(filename, chunk_words):
+            if typenum in self.typeobject_nums:
+                typeobjects.add(addr)
+            elif typenum in self.terminator_nums:
+                terminators[addr] = list(refs)
+            elif typenum in self.attribute_nums:
+                attributes[addr] = list(refs)
+        map_classes = {}      # {map address: class name}
+        for addr, refs in terminators.items():
+            for ref in refs:
+                if ref in typeobjects:
+                    map_classes[addr] = class_names.get(
+                        ref, '<class at 0x%x>' % (ref,))
+                    break
+        for addr, refs in attributes.items():
+            for ref in refs:
+                if ref in terminators:
+                    if ref in map_classes:
+                        map_classes[addr] = map_classes[ref]
+                    break
+        del typeobjects, terminators, attributes
+        #
+        # Pass 2: count and size per type and per class, and count the
+        # references to each object, remembering who the referrer is.
+        # As the table is indexed by a hash of the address, the counts
+        # can only be too high: a count of 1 means a single referrer.
+        class_list = [None] + sorted(set(map_classes.values()))
+        class_index = dict([(cls, i) for i, cls in enumerate(class_list)])
+        counts = array.array('B', [0]) * (self.mask + 1)
+        owner_type = array.array('i', [0]) * (self.mask + 1)
+        owner_class = array.array('i', [0]) * (self.mask + 1)
+        for addr, typenum, size, refs in read_objects(filename, chunk_words):
+            self._add(self.by_type, typenum, size)
+            cls = 0
+            if typenum not in self.attribute_nums and (
+                    typenum not in self.terminator_nums):
+                for ref in refs:
+                    if ref in map_classes:
+                        cls = class_index[map_classes[ref]]
+                        self._add(self.by_class, class_list[cls], size)
+                        break
+            for ref in refs:
+                h = self._hash(ref)
+                if counts[h] < MAX_COUNT:
+                    counts[h] += 1
+                owner_type[h] = typenum
+                owner_class[h] = cls
+        #
+        # Pass 3: add the size of the objects with a single referrer to
+        # the retained size of the referrer.  The maps and the type objects
+        # are shared by the instances, so they are never counted as retained.
+        shared_nums = (self.typeobject_nums | self.terminator_nums |
+                       self.attribute_nums)
+        for addr, typenum, size, refs in read_objects(filename, chunk_words):
+            if typenum in shared_nums:
+                continue
+            h = self._hash(addr)
+            if counts[h] == 1:
+                self.by_type[owner_type[h]][2] += size
+                cls = owner_class[h]
+                if cls != 0:
+                    self.by_class[class_list[cls]][2] += size
+        print >> sys.stderr, 'done'
+
+    def _add(self, summary, key, size):
+        try:
+            entry = summary[key]
+        except KeyError:
+            entry = summary[key] = [0, 0, 0]
+        entry[0] += 1
+        entry[1] += size
+        entry[2] += size
+
+
+def diff(summary1, summary2):
+    """Return a list of (key, count1, count2, size1, size2, retained1,
+    retained2), sorted by decreasing growth of the retained size.
+    """
+    result = []
+    empty = [0, 0, 0]
+    for key in set(summary1) | set(summary2):
+        c1, s1, r1 = summary1.get(key, empty)
+        c2, s2, r2 = summary2.get(key, empty)
+        if (c1, s1, r1) != (c2, s2, r2):
+            result.append((key, c1, c2, s1, s2, r1, r2))
+    result.sort(key=lambda entry: (entry[6] - entry[5], entry[4] - entry[3]),
+                reverse=True)
+    return result
+
+
+def print_diff(title, entries, get_name, top):
+    print title
+    print '%10s %10s %12s %12s  %s' % ('count', 'delta', 'size', 'retained',
+                                       'name')
+    for key, c1, c2, s1, s2, r1, r2 in entries[:top]:
+        print '%10d %+10d %+11.2fM %+11.2fM  %s' % (
+            c2, c2 - c1, (s2 - s1) / (1024.0*1024.0),
+            (r2 - r1) / (1024.0*1024.0), get_name(key))
+    print
+
+
+def main(argv):
+    top = 20
+    hash_bits = 22
+    args = []
+    for arg in argv:
+        if arg.startswith('--top='):
+            top = int(arg[len('--top='):])
+        elif arg.startswith('--hash-bits='):
+            hash_bits = int(arg[len('--hash-bits='):])
+        else:
+            args.append(arg)
+    if len(args) not in (2, 3):
+        print >> sys.stderr, __doc__
+        sys.exit(2)
+    #
+    stat = Stat()
+    if len(args) > 2:
+        typeid_name = args[2]
+    else:
+        typeid_name = os.path.join(os.path.dirname(args[1]), 'typeids.txt')
+    if os.path.isfile(typeid_name):
+        stat.load_typeids(typeid_name)
+    else:
+        import zlib, gc
+        stat.load_typeids(zlib.decompress(gc.get_typeids_z()).split("\n"))
+    #
+    dump1 = DumpStat(stat, hash_bits)
+    dump1.summarize(args[0])
+    dump2 = DumpStat(stat, hash_bits)
+    dump2.summarize(args[1])
+    #
+    print_diff('Growth per RPython type:',
+               diff(dump1.by_type, dump2.by_type), stat.get_type_name, top)
+    print_diff('Growth per app-level class:',
+               diff(dump1.by_class, dump2.by_class), str, top)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
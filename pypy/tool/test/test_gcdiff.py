@@ -0,0 +1,93 @@
+import array
+import py
+from pypy.tool.gcdump import Stat
+from pypy.tool import gcdiff
+
+TYPEIDS = """\
+member0    ?
+member1    GcStruct pypy.objspace.std.typeobject.W_TypeObject { }
+member2    GcStruct pypy.objspace.std.mapdict.Terminator { }
+member3    GcStruct pypy.objspace.std.mapdict.PlainAttribute { }
+member4    GcStruct pypy.interpreter.typedef.W_ObjectObjectUserDict { }
+member5    GcArray of * GCREF
+member6    GcStruct rpy_string { }
+""".splitlines()
+
+CLASS_OBJECTS = [
+    (1000, 1, 400, []),           # the class C
+    (1100, 2, 40, [1000]),        # its terminator
+    (1200, 3, 40, [1100, 1100]),  # a map
+]
+
+def write_dump(tmpdir, name, objects, classes=None):
+    a = array.array('l')
+    for i, (addr, typenum, size, refs) in enumerate(objects):
+        a.extend([addr, typenum, size] + refs + [-1])
+        if i == 0:
+            a.extend([0, 0, 0, -1])     # the marker after the roots
+    filename = str(tmpdir.join(name))
+    f = open(filename, 'wb')
+    a.tofile(f)
+    f.close()
+    if classes is not None:
+        tmpdir.join(name + '.classes').write(classes)
+    return filename
+
+def make_stat():
+    stat = Stat()
+    stat.load_typeids(TYPEIDS)
+    return stat
+
+def test_read_objects(tmpdir):
+    objects = [(100, 4, 32, [200, 300]), (200, 5, 16, []),
+               (300, 6, 24, [100])]
+    filename = write_dump(tmpdir, 'dump', objects)
+    for chunk_words in [1, 2, 3, 5, 1000]:
+        result = [(addr, typenum, size, list(refs)) for (addr, typenum,
+                  size, refs) in gcdiff.read_objects(filename, chunk_words)]
+        assert result == objects
+    #
+    data = open(filename, 'rb').read()
+    open(filename, 'wb').write(data[:-8])
+    py.test.raises(AssertionError, list, gcdiff.read_objects(filename))
+
+def test_summarize(tmpdir):
+    objects = [(2000, 4, 32, [1200, 3000]), (3000, 5, 48, [4000])]
+    objects += CLASS_OBJECTS
+    objects.append((4000, 6, 100, []))
+    filename = write_dump(tmpdir, 'dump', objects, '1000 __main__.C\n')
+    dump = gcdiff.DumpStat(make_stat(), hash_bits=8)
+    dump.summarize(filename, chunk_words=7)
+    # the instance retains its storage, which retains the string
+    assert dump.by_type[4] == [1, 32, 32 + 48]
+    assert dump.by_type[5] == [1, 48, 48 + 100]
+    assert dump.by_type[6] == [1, 100, 100]
+    assert dump.by_class == {'__main__.C': [1, 32, 32 + 48]}
+
+def test_diff(tmpdir):
+    objects = [(2000, 4, 32, [1200, 3000]), (3000, 5, 48, [])]
+    objects += CLASS_OBJECTS
+    filename1 = write_dump(tmpdir, 'dump1', objects, '1000 __main__.C\n')
+    # two more instances, whose storages share a string
+    objects += [(2100, 4, 32, [1200, 3100]), (3100, 5, 48, [4000]),
+                (2200, 4, 32, [1200, 3200]), (3200, 5, 48, [4000]),
+                (4000, 6, 100, [])]
+    filename2 = write_dump(tmpdir, 'dump2', objects, '1000 __main__.C\n')
+    dump1 = gcdiff.DumpStat(make_stat(), hash_bits=8)
+    dump1.summarize(filename1)
+    dump2 = gcdiff.DumpStat(make_stat(), hash_bits=8)
+    dump2.summarize(filename2)
+    #
+    result = gcdiff.diff(dump1.by_type, dump2.by_type)
+    assert result == [(4, 1, 3, 32, 96, 80, 240),
+                      (6, 0, 1, 0, 100, 0, 100),
+                      (5, 1, 3, 48, 144, 48, 144)]
+    result = gcdiff.diff(dump1.by_class, dump2.by_class)
+    assert result == [('__main__.C', 1, 3, 32, 96, 80, 240)]
+
+def test_class_without_name(tmpdir):
+    objects = [(2000, 4, 32, [1200])] + CLASS_OBJECTS
+    filename = write_dump(tmpdir, 'dump', objects)
+    dump = gcdiff.DumpStat(make_stat())
+    dump.summarize(filename)
+    assert dump.by_class == {'<class at 0x3e8>': [1, 32, 32]}
@@ -950,11 +950,19 @@ class LLGraphCPU(model.AbstractCPU):
             count = self.vector_ext.vec_size() // descr.get_item_size_in_bytes()
             assert _count == count
             assert count > 0
-            adr = support.addr_add_bytes(struct, (offset * scale + disp))
-            a = support.cast_arg(lltype.Ptr(descr.A), adr)
-            array = a._obj
+            if descr.A._gckind == 'gc':
+                # a load from a GC array, with a byte offset from the
+                # first item
+                a = lltype.cast_opaque_ptr(lltype.Ptr(descr.A), struct)
+                array = a._obj
+                start = (offset * scale + disp) // descr.get_item_size_in_bytes()
+            else:
+                adr = support.addr_add_bytes(struct, (offset * scale + disp))
+                a = support.cast_arg(lltype.Ptr(descr.A), adr)
+                array = a._obj
+                start = 0
             for i in range(count):
-                val = support.cast_result(descr.A.OF, array.getitem(i))
+                val = support.cast_result(descr.A.OF, array.getitem(start + i))
                 values.append(val)
             return values
         return load
@@ -24,6 +24,8 @@ class AsmMemoryManager(object):
         self.free_blocks = {}      # map {start: stop}
         self.free_blocks_end = {}  # map {stop: start}
         self.blocks_by_size = [[] for i in range(self.num_indices)]
+        self.large_blocks = []     # list of (start, stop) from mmap()
+        self.frozen_blocks = []    # idem, but allocated before freeze()
 
     def get_stats(self):
         """Returns stats for rlib.jit.jit_hooks.stats_asmmemmgr_*()."""
@@ -48,7 +50,27 @@ class AsmMemoryManager(object):
         """Free a block (start, stop) returned by a previous malloc()."""
         if r_uint is not None:
             self.total_mallocs -= r_uint(stop - start)
-        self._add_free_block(start, stop)
+        if not self._is_frozen(start):
+            self._add_free_block(start, stop)
+
+    def freeze(self):
+        """Never write again into the memory allocated so far: forget
+        the free parts of it, and don't reuse the blocks freed later.
+        Meant to be called before fork(), so that the pages of machine
+        code stay shared between the processes.  (They are still written
+        to when a bridge is attached to one of these loops, as that
+        patches the guard in-place; only that page is copied then.)
+        """
+        for start, stop in self.free_blocks.items():
+            self._del_free_block(start, stop)
+        self.frozen_blocks.extend(self.large_blocks)
+        self.large_blocks = []
+
+    def _is_frozen(self, start):
+        for frozen_start, frozen_stop in self.frozen_blocks:
+            if frozen_start <= start < frozen_stop:
+                return True
+        return False
 
     def open_malloc(self, minsize):
         """Allocate at least minsize bytes.  Returns (start, stop)."""
@@ -84,6 +106,7 @@ class AsmMemoryManager(object):
                 rmmap.hint.pos += 0x80000000 - size
         self.total_memory_allocated += r_uint(size)
         data = rffi.cast(lltype.Signed, data)
+        self.large_blocks.append((data, data + size))
         return self._add_free_block(data, data + size)
 
     def _get_index(self, length):
@@ -154,6 +154,24 @@ class TestAsmMemoryManager:
                     assert new_total <= 147456
                     prev_total = new_total
 
+    def test_freeze(self):
+        mgr = self.asmmemmgr
+        (start1, stop1) = mgr.malloc(100, 100)
+        (start2, stop2) = mgr.malloc(100, 100)
+        assert mgr.total_memory_allocated == 8192
+        mgr.freeze()
+        assert mgr.free_blocks == {}
+        # new code doesn't go into the remaining part of the frozen block
+        (start3, stop3) = mgr.malloc(100, 100)
+        assert mgr.total_memory_allocated == 16384
+        assert not (start1 <= start3 < start1 + 8192)
+        # freed frozen memory is not reused, but non-frozen memory is
+        mgr.free(start1, stop1)
+        mgr.free(start3, stop3)
+        assert start1 not in mgr.free_blocks
+        assert mgr.malloc(100, 100) == (start3, stop3)
+        assert mgr.total_mallocs == (stop2 - start2) + (stop3 - start3)
+
     def test_insert_gcroot_marker(self):
         puts = []
         class FakeGcRootMap:
@@ -158,6 +158,12 @@ class AbstractCPU(object):
         """
         pass
 
+    def freeze_code(self):
+        """Called before fork(): from now on, don't write any more
+        into the memory that contains the machine code compiled so far,
+        apart from patching guards when attaching bridges."""
+        pass
+
     def sizeof(self, S):
         raise NotImplementedError
 
@@ -305,6 +311,14 @@ class CompiledLoopToken(object):
         debug_print("allocating Bridge #", self.bridges_count, "of Loop #", self.number)
         debug_stop("jit-mem-looptoken-alloc")
 
+    def get_code_size(self):
+        # the machine code and raw data of the loop and all its bridges
+        size = 0
+        if self.asmmemmgr_blocks is not None:
+            for rawstart, rawstop in self.asmmemmgr_blocks:
+                size += rawstop - rawstart
+        return size
+
     def update_frame_info(self, oldlooptoken, baseofs):
         new_fi = self.frame_info
         new_loop_tokens = []
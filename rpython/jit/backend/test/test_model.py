@@ -30,3 +30,10 @@ def test_redirect_loop_token():
     assert c.frame_info.jfi_frame_depth == 3
     assert c2.frame_info.jfi_frame_depth == 3
     
+
+def test_get_code_size():
+    cpu = FakeCPU()
+    c = CompiledLoopToken(cpu, 0)
+    assert c.get_code_size() == 0
+    c.asmmemmgr_blocks = [(1000, 1200), (5000, 5016)]
+    assert c.get_code_size() == 216
@@ -588,6 +588,10 @@ def send_loop_to_backend(greenkey, jitdriver_sd, metainterp_sd, loop, type,
     #
     if metainterp_sd.warmrunnerdesc is not None:    # for tests
         metainterp_sd.warmrunnerdesc.memory_manager.keep_loop_alive(original_jitcell_token)
+        loop_stats = metainterp_sd.warmrunnerdesc.loop_stats
+        if loop_stats.enabled:
+            loop_stats.loop_compiled(n,
+                jitdriver_sd.warmstate.get_location_str(greenkey, force=True))
 
 def send_bridge_to_backend(jitdriver_sd, metainterp_sd, faildescr, inputargs,
                            operations, original_loop_token, memo):
@@ -632,6 +636,11 @@ def send_bridge_to_backend(jitdriver_sd, metainterp_sd, faildescr, inputargs,
     metainterp_sd.logger_ops.log_bridge(inputargs, operations, None, faildescr,
                                         ops_offset, memo=memo)
     #
+    if metainterp_sd.warmrunnerdesc is not None:    # for tests
+        jd = original_loop_token.outermost_jitdriver_sd
+        if jd is not None:
+            jd.warmstate.bridge_compiled(original_loop_token)
+    #
     #if metainterp_sd.warmrunnerdesc is not None:    # for tests
     #    metainterp_sd.warmrunnerdesc.memory_manager.keep_loop_alive(
     #        original_loop_token)
@@ -734,6 +743,11 @@ class AbstractResumeGuardDescr(ResumeDescr):
     TY_FLOAT        = 0x06
 
     def handle_fail(self, deadframe, metainterp_sd, jitdriver_sd):
+        if metainterp_sd.warmrunnerdesc is not None:    # for tests
+            loop_stats = metainterp_sd.warmrunnerdesc.loop_stats
+            if loop_stats.enabled:
+                loop_stats.guard_failed(compute_unique_id(self),
+                                        self.rd_loop_token.number)
         if (self.must_compile(deadframe, metainterp_sd, jitdriver_sd)
                 and not rstack.stack_almost_full()):
             self.start_compiling()
@@ -811,7 +825,12 @@ class AbstractResumeGuardDescr(ResumeDescr):
                           intval * 1442968193)
         #
         increment = jitdriver_sd.warmstate.increment_trace_eagerness
-        return jitcounter.tick(hash, increment)
+        if not jitcounter.tick(hash, increment):
+            return False
+        if jitcounter.deferring:
+            jitcounter.defer(hash)
+            return False
+        return True
 
     def start_compiling(self):
         # start tracing and compiling from this guard.
@@ -66,6 +66,13 @@ class JitCounter:
     a fraction close to (but smaller than) 1.0, computed from the
     'decay' parameter.
 
+    'set_deferring(flag)' and 'defer(hash)' implement the
+    'defer_compilation' parameter: while it is set, the hashes that reach
+    their bound are only recorded with defer() instead of being traced;
+    when it is cleared again, all these hashes get a value just below 1.0
+    with change_current_fraction(), so that they are traced the next
+    time they are seen.
+
     'install_new_cell(hash, newcell)' adds the new JitCell to the
     celltable, at the index given by 'hash' (bits 21:32).  Unlike
     the timetable, the celltable stores a linked list of JitCells
@@ -102,6 +109,10 @@ class JitCounter:
         # The table of JitCell entries, recording already-compiled loops
         self.celltable = [None] * size
         #
+        # The hashes that reached their bound while 'deferring' is True
+        self.deferring = False
+        self.deferred = {}
+        #
         if translator is not None:
             class Glob:
                 step = 0
@@ -236,6 +247,16 @@ class JitCounter:
             if p_entry.subhashes[i] == subhash:
                 p_entry.times[i] = r_singlefloat(0.0)
 
+    def set_deferring(self, flag):
+        self.deferring = flag
+        if not flag and self.deferred:
+            for hash in self.deferred:
+                self.change_current_fraction(hash, 0.98)
+            self.deferred.clear()
+
+    def defer(self, hash):
+        self.deferred[hash] = None
+
     def lookup_chain(self, hash):
         return self.celltable[self._get_index(hash)]
 
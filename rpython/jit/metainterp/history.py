@@ -407,6 +407,7 @@ class JitCellToken(AbstractDescr):
     terminating = False # see TerminatingLoopToken in compile.py
     invalidated = False
     outermost_jitdriver_sd = None
+    jitcell = None      # see WarmEnterState.bridge_compiled()
     # and more data specified by the backend when the loop is compiled
     number = -1
     generation = r_int64(0)
@@ -178,5 +178,42 @@ class Profiler(BaseProfiler):
         debug_print(final)
 
 
+class LoopStats(object):
+    """Optional counters, enabled with jit_hooks.stats_set_loop_counters():
+    how many times each loop is entered from the interpreter, and how many
+    times each guard fails without a bridge, i.e. falls back to the
+    interpreter.  Loops are identified by their number, guards by their
+    unique id (as in the logs), and the location of the loops is recorded
+    when they are compiled.
+    """
+    enabled = False
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.loop_entries = {}       # loop number -> count
+        self.loop_locations = {}     # loop number -> location string
+        self.guard_failures = {}     # guard id -> count
+        self.guard_loops = {}        # guard id -> loop number
+
+    def set_enabled(self, flag):
+        if flag and not self.enabled:
+            self.clear()
+        self.enabled = flag
+
+    def loop_compiled(self, number, location):
+        self.loop_locations[number] = location
+        self.loop_entries[number] = 0
+
+    def loop_entered(self, number):
+        self.loop_entries[number] = self.loop_entries.get(number, 0) + 1
+
+    def guard_failed(self, guard_id, loop_number):
+        self.guard_failures[guard_id] = (
+            self.guard_failures.get(guard_id, 0) + 1)
+        self.guard_loops[guard_id] = loop_number
+
+
 class BrokenProfilerData(JitException):
     pass
@@ -2,6 +2,7 @@ import math
 from rpython.rlib.rarithmetic import r_int64
 from rpython.rlib.debug import debug_start, debug_print, debug_stop
 from rpython.rlib.objectmodel import we_are_translated
+from rpython.rlib.listsort import make_timsort_class
 
 #
 # Logic to decide which loops are old and not used any more.
@@ -19,6 +20,32 @@ from rpython.rlib.objectmodel import we_are_translated
 # 'generation' field is much smaller than the current generation, and
 # removed from the set.
 #
+# In addition, if 'max_bytes' is set, the total size of the machine code
+# of the loops in 'alive_loops' (including their bridges) is kept below
+# it: after each new loop or bridge, if the total is too large, the
+# least recently entered loops are removed from the set.  This is an
+# estimate: the machine code is only freed when the GC frees the
+# LoopToken, and a loop that is still referenced from elsewhere (e.g.
+# a bridge of another loop jumping to it) is counted in 'evicted_loops'
+# and 'evicted_bytes' while its code stays in memory.
+#
+# Finally, freeze() moves all loops currently alive to 'frozen_loops',
+# where they are kept alive forever (unless invalidated) and don't count
+# in 'max_bytes'.  This is meant to be called before fork(), together
+# with cpu.freeze_code(): the child processes keep using the machine
+# code compiled by the parent instead of each compiling its own copy.
+#
+
+def get_code_size(looptoken):
+    clt = looptoken.compiled_loop_token
+    if clt is None:
+        return 0
+    return clt.get_code_size()
+
+def _generation_lt(looptoken1, looptoken2):
+    return looptoken1.generation < looptoken2.generation
+
+GenerationSort = make_timsort_class(lt=_generation_lt)
 
 class MemoryManager(object):
 
@@ -38,6 +65,10 @@ class MemoryManager(object):
         self.current_generation = r_int64(1)
         self.next_check = r_int64(-1)
         self.alive_loops = {}
+        self.frozen_loops = {}
+        self.max_bytes = 0
+        self.evicted_loops = 0
+        self.evicted_bytes = 0
 
     def set_max_age(self, max_age, check_frequency=0):
         if max_age <= 0:
@@ -49,16 +80,27 @@ class MemoryManager(object):
             self.check_frequency = check_frequency
             self.next_check = self.current_generation + 1
 
+    def set_max_bytes(self, max_bytes):
+        self.max_bytes = max_bytes
+
     def next_generation(self):
         self.current_generation += 1
         if self.current_generation == self.next_check:
             self._kill_old_loops_now()
             self.next_check = self.current_generation + self.check_frequency
+        if self.max_bytes > 0:
+            self._evict_lru_loops_now()
 
     def keep_loop_alive(self, looptoken):
         if looptoken.generation != self.current_generation:
             looptoken.generation = self.current_generation
-            self.alive_loops[looptoken] = None
+            if looptoken not in self.frozen_loops:
+                self.alive_loops[looptoken] = None
+
+    def freeze(self):
+        for looptoken in self.alive_loops:
+            self.frozen_loops[looptoken] = None
+        self.alive_loops.clear()
 
     def _kill_old_loops_now(self):
         debug_start("jit-mem-collect")
@@ -71,13 +113,51 @@ class MemoryManager(object):
             if (0 <= looptoken.generation < max_generation or
                 looptoken.invalidated):
                 del self.alive_loops[looptoken]
+        for looptoken in self.frozen_loops.keys():
+            if looptoken.invalidated:
+                del self.frozen_loops[looptoken]
         newtotal = len(self.alive_loops)
         debug_print("Loop tokens freed: ", oldtotal - newtotal)
         debug_print("Loop tokens left:  ", newtotal)
         #print self.alive_loops.keys()
         if not we_are_translated() and oldtotal != newtotal:
             looptoken = None
-            from rpython.rlib import rgc
-            # a single one is not enough for all tests :-(
-            rgc.collect(); rgc.collect(); rgc.collect()
+            self._collect_for_tests()
         debug_stop("jit-mem-collect")
+
+    def _evict_lru_loops_now(self):
+        total = 0
+        for looptoken in self.alive_loops:
+            total += get_code_size(looptoken)
+        if total <= self.max_bytes:
+            return
+        debug_start("jit-mem-evict")
+        debug_print("Code size before:", total)
+        tokens = self.alive_loops.keys()
+        GenerationSort(tokens).sort()
+        # never evict the loops that were entered or compiled during the
+        # previous generation, i.e. most likely the one we just compiled
+        min_generation = self.current_generation - 1
+        count = 0
+        for looptoken in tokens:
+            if total <= self.max_bytes:
+                break
+            if looptoken.generation >= min_generation:
+                break
+            size = get_code_size(looptoken)
+            del self.alive_loops[looptoken]
+            total -= size
+            self.evicted_bytes += size
+            count += 1
+        self.evicted_loops += count
+        debug_print("Loop tokens evicted:", count)
+        debug_print("Code size after: ", total)
+        if not we_are_translated() and count > 0:
+            looptoken = tokens = None
+            self._collect_for_tests()
+        debug_stop("jit-mem-evict")
+
+    def _collect_for_tests(self):
+        from rpython.rlib import rgc
+        # a single one is not enough for all tests :-(
+        rgc.collect(); rgc.collect(); rgc.collect()
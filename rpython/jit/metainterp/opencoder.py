@@ -56,6 +56,19 @@ def frontend_tag_overflow():
     from rpython.rlib.jit import Counters
     raise history.SwitchToBlackhole(Counters.ABORT_TOO_LONG)
 
+def _can_skip_if_unused(opnum):
+    # the pure operations that don't teach the optimizer anything about
+    # their arguments, unlike e.g. STRGETITEM or ARRAYLEN_GC (bounds) or
+    # GETFIELD_GC (heap cache, non-null): nothing is lost if they are
+    # not seen at all when their result is not used
+    return (rop.is_always_pure(opnum) and opclasses[opnum].type != 'v' and
+            not opwithdescr[opnum] and
+            opnum not in (rop.STRLEN, rop.STRGETITEM, rop.UNICODELEN,
+                          rop.UNICODEGETITEM, rop.LOAD_FROM_GC_TABLE))
+
+skip_if_unused = [opclasses[opnum] is not None and _can_skip_if_unused(opnum)
+                  for opnum in range(len(opclasses))]
+
 class BaseTrace(object):
     pass
 
@@ -128,6 +141,10 @@ class TraceIterator(BaseTrace):
         self._index = start
         self.start_index = start
         self.end = end
+        self._number = start        # number of the op returned by next()
+        self._kill_index = start    # see kill_dead_boxes()
+        self._last_uses = None      # see skip_unused_operations()
+        self.skipped = 0
 
     def get_dead_ranges(self):
         return self.trace.get_dead_ranges()
@@ -136,6 +153,42 @@ class TraceIterator(BaseTrace):
         if pos:
             self._cache[pos] = None
 
+    def kill_dead_boxes(self, deadranges):
+        """ Forget the boxes that are dead after the operation returned
+        by the last next(), and after the operations skipped before it.
+        """
+        while self._kill_index <= self._number:
+            self.kill_cache_at(deadranges[self._kill_index])
+            self._kill_index += 1
+
+    def skip_unused_operations(self):
+        """ From now on, next() doesn't return the pure operations whose
+        result is not used later, neither by another operation nor by the
+        resume data of a guard (see _can_skip_if_unused()).  They are
+        skipped without building a ResOperation for them.
+        """
+        self._last_uses = self.trace.get_last_uses()
+        self._skip_unused()
+
+    def _skip_unused(self):
+        last_uses = self._last_uses
+        while self.pos < self.end:
+            opnum = rffi.cast(lltype.Signed, self.trace._ops[self.pos])
+            if (not skip_if_unused[opnum] or
+                    last_uses[self._index] != self._index):
+                return
+            self.pos += 1
+            if oparity[opnum] == -1:
+                argnum = self._next()
+            else:
+                argnum = oparity[opnum]
+            self.pos += argnum
+            if opwithdescr[opnum]:
+                self.pos += 1
+            self._index += 1
+            self._count += 1
+            self.skipped += 1
+
     def _get(self, i):
         res = self._cache[i]
         assert res is not None
@@ -193,6 +246,7 @@ class TraceIterator(BaseTrace):
         return index
 
     def next(self):
+        self._number = self._index
         opnum = self._next()
         if oparity[opnum] == -1:
             argnum = self._next()
@@ -221,6 +275,8 @@ class TraceIterator(BaseTrace):
             self._cache[self._index] = res
             self._index += 1
         self._count += 1
+        if self._last_uses is not None:
+            self._skip_unused()
         return res
 
 class CutTrace(BaseTrace):
@@ -242,6 +298,8 @@ class CutTrace(BaseTrace):
         iter._count = self.count
         iter.start_index = self.index
         iter._index = self.index
+        iter._number = self.index
+        iter._kill_index = self.index
         return iter
 
 def combine_uint(index1, index2):
@@ -269,7 +327,7 @@ class TopSnapshot(Snapshot):
         self.vref_array = vref_array
 
 class Trace(BaseTrace):
-    _deadranges = (-1, None)
+    _deadranges = (-1, None, None)
 
     def __init__(self, inputargs, metainterp_sd):
         self.metainterp_sd = metainterp_sd
@@ -464,6 +522,17 @@ class Trace(BaseTrace):
         such as for each index x, the number found there is for sure dead
         before x
         """
+        self._compute_ranges()
+        return self._deadranges[1]
+
+    def get_last_uses(self):
+        """ Same as get_live_ranges, but cached together with
+        get_dead_ranges()
+        """
+        self._compute_ranges()
+        return self._deadranges[2]
+
+    def _compute_ranges(self):
         def insert(ranges, pos, v):
             # XXX skiplist
             while ranges[pos]:
@@ -472,9 +541,8 @@ class Trace(BaseTrace):
                     return
             ranges[pos] = v
 
-        if self._deadranges != (-1, None):
-            if self._deadranges[0] == self._count:
-                return self._deadranges[1]
+        if self._deadranges[0] == self._count:
+            return
         liveranges = self.get_live_ranges()
         deadranges = [0] * (self._index + 2)
         assert len(deadranges) == len(liveranges) + 2
@@ -482,8 +550,7 @@ class Trace(BaseTrace):
             elem = liveranges[i]
             if elem:
                 insert(deadranges, elem + 1, i)
-        self._deadranges = (self._count, deadranges)
-        return deadranges
+        self._deadranges = (self._count, deadranges, liveranges)
 
     def unpack(self):
         iter = self.get_iter()
@@ -544,9 +544,10 @@ class Optimizer(Optimization):
     def propagate_all_forward(self, trace, call_pure_results=None, flush=True):
         self.trace = trace
         deadranges = trace.get_dead_ranges()
+        # operations whose result is never used are not even decoded
+        trace.skip_unused_operations()
         self.call_pure_results = call_pure_results
         last_op = None
-        i = 0
         while not trace.done():
             self._really_emitted_operation = None
             op = trace.next()
@@ -554,9 +555,7 @@ class Optimizer(Optimization):
                 last_op = op
                 break
             self.send_extra_operation(op)
-            trace.kill_cache_at(deadranges[i + trace.start_index])
-            if op.type != 'v':
-                i += 1
+            trace.kill_dead_boxes(deadranges)
         # accumulate counters
         if flush:
             self.flush()
@@ -2939,7 +2939,6 @@ class BaseTestOptimizeBasic(BaseTestBasic):
         """
         expected = """
         [i0]
-        i1 = int_lt(i0, 4)
         i2 = int_lt(i0, 5)
         jump(i2)
         """
@@ -4335,7 +4335,6 @@ class OptimizeOptTest(BaseTestWithUnroll):
         """
         preamble = """
         [i0]
-        i1 = int_lt(i0, 4)
         i2 = int_lt(i0, 5)
         jump(i2)
         """
@@ -5302,14 +5301,12 @@ class OptimizeOptTest(BaseTestWithUnroll):
         """
         preamble = """
         [i1, i2a, i2b, i2c]
-        i3 = int_is_zero(i1)
         i4 = int_gt(i2a, 7)
         guard_true(i4) []
         i6 = int_le(i2b, -7)
         guard_true(i6) []
         i8 = int_gt(i2c, -7)
         guard_true(i8) []
-        i9 = int_is_zero(i2c)
         jump(i1, i2a, i2b, i2c)
         """
         expected = """
@@ -5395,6 +5392,8 @@ class OptimizeOptTest(BaseTestWithUnroll):
         i4 = int_mul(2, i2)
         i5 = int_mul(i1, 32)
         i6 = int_mul(i1, i2)
+        escape_n(i3)
+        escape_n(i4)
         jump(i5, i6)
         """
         expected = """
@@ -5403,6 +5402,8 @@ class OptimizeOptTest(BaseTestWithUnroll):
         i4 = int_lshift(i2, 1)
         i5 = int_lshift(i1, 5)
         i6 = int_mul(i1, i2)
+        escape_n(i3)
+        escape_n(i4)
         jump(i5, i6)
         """
         self.optimize_loop(ops, expected)
@@ -5412,22 +5413,26 @@ class OptimizeOptTest(BaseTestWithUnroll):
         [i1, i2, i2b, i1b]
         i3 = int_lshift(i1, i2)
         i4 = int_rshift(i3, i2)
+        escape_n(i4)
         i5 = int_lshift(i1, 2)
         i6 = int_rshift(i5, 2)
         i6t= int_eq(i6, i1)
         guard_true(i6t) []
         i7 = int_lshift(i1, 100)
         i8 = int_rshift(i7, 100)
+        escape_n(i8)
         i9 = int_lt(i1b, 100)
         guard_true(i9) []
         i10 = int_gt(i1b, -100)
         guard_true(i10) []
         i13 = int_lshift(i1b, i2)
         i14 = int_rshift(i13, i2)
+        escape_n(i14)
         i15 = int_lshift(i1b, 2)
         i16 = int_rshift(i15, 2)
         i17 = int_lshift(i1b, 100)
         i18 = int_rshift(i17, 100)
+        escape_n(i18)
         i19 = int_eq(i1b, i16)
         guard_true(i19) []
         i20 = int_ne(i1b, i16)
@@ -5438,21 +5443,25 @@ class OptimizeOptTest(BaseTestWithUnroll):
         [i1, i2, i2b, i1b]
         i3 = int_lshift(i1, i2)
         i4 = int_rshift(i3, i2)
+        escape_n(i4)
         i5 = int_lshift(i1, 2)
         i6 = int_rshift(i5, 2)
         i6t= int_eq(i6, i1)
         guard_true(i6t) []
         i7 = int_lshift(i1, 100)
         i8 = int_rshift(i7, 100)
+        escape_n(i8)
         i9 = int_lt(i1b, 100)
         guard_true(i9) []
         i10 = int_gt(i1b, -100)
         guard_true(i10) []
         i13 = int_lshift(i1b, i2)
         i14 = int_rshift(i13, i2)
+        escape_n(i14)
         i15 = int_lshift(i1b, 2)
         i17 = int_lshift(i1b, 100)
         i18 = int_rshift(i17, 100)
+        escape_n(i18)
         jump(i2, i3, i1b, i2b)
         """
         self.optimize_loop(ops, expected)
@@ -7447,6 +7456,7 @@ class OptimizeOptTest(BaseTestWithUnroll):
         i1 = getfield_gc_i(p0, descr=valuedescr)
         i2 = getfield_gc_i(p1, descr=chardescr)
         i3 = int_add(i1, i2)
+        escape_n(i3)
         setfield_gc(p0, ii, descr=valuedescr)
         setfield_gc(p1, ii, descr=chardescr)
         i4 = getfield_gc_i(p0, descr=valuedescr)
@@ -7458,6 +7468,7 @@ class OptimizeOptTest(BaseTestWithUnroll):
         i1 = getfield_gc_i(p0, descr=valuedescr)
         i2 = getfield_gc_i(p1, descr=chardescr)
         i3 = int_add(i1, i2)
+        escape_n(i3)
         setfield_gc(p0, ii, descr=valuedescr)
         setfield_gc(p1, ii, descr=chardescr)
         i10 = same_as_i(ii)
@@ -7467,6 +7478,7 @@ class OptimizeOptTest(BaseTestWithUnroll):
         expected = """
         [p0, p1, i1, i2, i7, i8]
         i3 = int_add(i7, i8)
+        escape_n(i3)
         setfield_gc(p0, i1, descr=valuedescr)
         setfield_gc(p1, i1, descr=chardescr)
         jump(p0, p1, i2, i1, i1, i1)
@@ -113,6 +113,7 @@ class TestUnroll(BaseTestUnroll):
         loop = """
         [i0]
         i1 = int_add(i0, 1)
+        escape_n(i1)
         jump(i0)
         """
         es, loop, preamble = self.optimize(loop)
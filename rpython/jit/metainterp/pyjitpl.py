@@ -3070,43 +3070,65 @@ class MetaInterp(object):
         self.heapcache.replace_box(oldbox, newbox)
 
     def find_biggest_function(self):
-        start_stack = []
-        max_size = 0
-        max_key = None
-        max_jdsd = None
-        r = ''
-        debug_start("jit-abort-longest-function")
+        # Find the inlined portal call to blame for a trace that is too
+        # long.  Start from the biggest top-level one (including what it
+        # calls), then as long as one of the calls directly inside it
+        # accounts for more than half of its size, move to that call.
+        # This way, if f() calls g() which calls a huge h(), only h()
+        # stops being inlined, instead of f() and everything below.
+        jitdriver_sds = []
+        greenkeys = []
+        starts = []
+        sizes = []
+        parents = []
+        stack = []
         for elem in self.portal_trace_positions:
             jitdriver_sd, key, pos = elem
             if key is not None:
-                start_stack.append(elem)
+                if stack:
+                    parents.append(stack[-1])
+                else:
+                    parents.append(-1)
+                stack.append(len(greenkeys))
+                jitdriver_sds.append(jitdriver_sd)
+                greenkeys.append(key)
+                starts.append(pos[0])
+                sizes.append(0)
             else:
-                jitdriver_sd, greenkey, startpos = start_stack.pop()
-                warmstate = jitdriver_sd.warmstate
-                size = pos[0] - startpos[0]
-                if size > max_size:
-                    if warmstate is not None:
-                        r = warmstate.get_location_str(greenkey)
-                    debug_print("found new longest: %s %d" % (r, size))
-                    max_size = size
-                    max_jdsd = jitdriver_sd
-                    max_key = greenkey
-        if start_stack:
-            jitdriver_sd, key, pos = start_stack[0]
-            warmstate = jitdriver_sd.warmstate
-            size = self.history.get_trace_position()[0] - pos[0]
-            if size > max_size:
+                i = stack.pop()
+                sizes[i] = pos[0] - starts[i]
+        end = self.history.get_trace_position()[0]
+        for i in stack:     # calls that are still being traced
+            sizes[i] = end - starts[i]
+        #
+        r = ''
+        debug_start("jit-abort-longest-function")
+        best = -1
+        max_size = 0
+        for i in range(len(greenkeys)):
+            if parents[i] == -1 and sizes[i] > max_size:
+                warmstate = jitdriver_sds[i].warmstate
                 if warmstate is not None:
-                    r = warmstate.get_location_str(key)
-                debug_print("found new longest: %s %d" % (r, size))
-                max_size = size
-                max_jdsd = jitdriver_sd
-                max_key = key
+                    r = warmstate.get_location_str(greenkeys[i])
+                debug_print("found new longest: %s %d" % (r, sizes[i]))
+                max_size = sizes[i]
+                best = i
+        i = best + 1
+        while 0 <= best and i < len(greenkeys):
+            if parents[i] == best and sizes[i] * 2 > sizes[best]:
+                warmstate = jitdriver_sds[i].warmstate
+                if warmstate is not None:
+                    r = warmstate.get_location_str(greenkeys[i])
+                debug_print("found dominant callee: %s %d" % (r, sizes[i]))
+                best = i
+            i += 1
         if self.portal_trace_positions: # tests
             self.staticdata.logger_ops.log_abort_loop(self.history.trace,
                                        self.box_names_memo)
         debug_stop("jit-abort-longest-function")
-        return max_jdsd, max_key
+        if best < 0:
+            return None, None
+        return jitdriver_sds[best], greenkeys[best]
 
     def record_result_of_call_pure(self, op, argboxes, descr, patch_pos, opnum):
         """ Patch a CALL into a CALL_PURE.
@@ -128,3 +128,23 @@ def test_change_current_fraction():
     assert r is False
     r = jc.tick(index2hash(jc, 104), incr)
     assert r is True
+
+def test_defer():
+    jc = JitCounter()
+    incr = jc.compute_threshold(8)
+    jc.set_deferring(True)
+    jc.defer(index2hash(jc, 104))
+    jc.defer(index2hash(jc, 104))
+    jc.defer(index2hash(jc, 105))
+    assert len(jc.deferred) == 2
+    r = jc.tick(index2hash(jc, 104), incr)
+    assert r is False
+    # clearing the flag puts the deferred hashes just below the bound
+    jc.set_deferring(False)
+    assert jc.deferred == {}
+    r = jc.tick(index2hash(jc, 104), incr)
+    assert r is True
+    r = jc.tick(index2hash(jc, 105), incr)
+    assert r is True
+    r = jc.tick(index2hash(jc, 106), incr)
+    assert r is False
@@ -144,6 +144,66 @@ class JitHookInterfaceTests(object):
 
         self.meta_interp(main, [], ProfilerClass=Profiler)
 
+    def test_loop_counters(self):
+        driver = JitDriver(greens = [], reds = ['i', 's'],
+                           get_printable_location=lambda: 'the loop')
+
+        def loop(i):
+            s = 0
+            while i > 0:
+                driver.jit_merge_point(i=i, s=s)
+                if i % 2:
+                    s += 1
+                i -= 1
+                s+= 2
+            return s
+
+        def main(enable):
+            jit_hooks.stats_set_loop_counters(None, enable)
+            for k in range(5):
+                loop(30)
+            loops = jit_hooks.stats_get_loop_entries(None)
+            guards = jit_hooks.stats_get_guard_failures(None)
+            if not enable:
+                assert len(loops) == 0
+                assert len(guards) == 0
+                return
+            assert len(loops) == 1
+            number = loops[0].number
+            assert loops[0].entries >= 5
+            location = jit_hooks.stats_get_loop_location(None, number)
+            assert location == 'the loop'
+            assert jit_hooks.stats_get_loop_location(None, -1) is None
+            # the guard on 'i % 2' and the loop exit fail a few times
+            # before getting a bridge
+            assert len(guards) >= 2
+            for i in range(len(guards)):
+                assert guards[i].loop == number
+                assert guards[i].failures > 0
+
+        self.meta_interp(main, [True])
+        self.meta_interp(main, [False])
+
+    def test_freeze_jit_code(self):
+        from rpython.jit.metainterp import pyjitpl
+        driver = JitDriver(greens = ['flag'], reds = ['i'])
+
+        def loop(flag, i):
+            while i > 0:
+                driver.jit_merge_point(flag=flag, i=i)
+                i -= 1
+
+        def main():
+            loop(0, 30)
+            jit_hooks.freeze_jit_code(None)
+            loop(1, 30)
+
+        self.meta_interp(main, [], loop_longevity=1)
+        memmgr = pyjitpl._warmrunnerdesc.memory_manager
+        [frozen] = memmgr.frozen_loops.keys()
+        [alive] = memmgr.alive_loops.keys()
+        assert frozen is not alive
+
     def test_get_stats_empty(self):
         driver = JitDriver(greens = [], reds = ['i'])
         def loop(i):
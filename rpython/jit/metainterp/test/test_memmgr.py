@@ -21,6 +21,14 @@ from rpython.rlib import rgc
 class FakeLoopToken:
     generation = 0
     invalidated = False
+    compiled_loop_token = None
+
+class FakeCompiledLoopToken:
+    def __init__(self, size):
+        self.size = size
+
+    def get_code_size(self):
+        return self.size
 
 
 class _TestMemoryManager:
@@ -78,6 +86,73 @@ class _TestMemoryManager:
             else:
                 assert tokens[i] in memmgr.alive_loops
 
+    def test_max_bytes(self):
+        memmgr = MemoryManager()
+        memmgr.set_max_age(0)
+        memmgr.set_max_bytes(350)
+        tokens = [FakeLoopToken() for i in range(10)]
+        for token in tokens:
+            token.compiled_loop_token = FakeCompiledLoopToken(100)
+            memmgr.keep_loop_alive(token)
+            memmgr.next_generation()
+        assert memmgr.alive_loops == dict.fromkeys(tokens[7:])
+        assert memmgr.evicted_loops == 7
+        assert memmgr.evicted_bytes == 700
+
+    def test_max_bytes_lru(self):
+        memmgr = MemoryManager()
+        memmgr.set_max_age(0)
+        memmgr.set_max_bytes(350)
+        tokens = [FakeLoopToken() for i in range(10)]
+        for token in tokens:
+            token.compiled_loop_token = FakeCompiledLoopToken(100)
+            memmgr.keep_loop_alive(token)
+            memmgr.next_generation()
+            memmgr.keep_loop_alive(tokens[0])   # entered again
+        assert memmgr.alive_loops == dict.fromkeys([tokens[0]] + tokens[8:])
+        assert memmgr.evicted_loops == 7
+
+    def test_max_bytes_bridges(self):
+        memmgr = MemoryManager()
+        memmgr.set_max_age(0)
+        memmgr.set_max_bytes(350)
+        tokens = [FakeLoopToken() for i in range(3)]
+        for token in tokens:
+            token.compiled_loop_token = FakeCompiledLoopToken(100)
+            memmgr.keep_loop_alive(token)
+            memmgr.next_generation()
+        assert memmgr.evicted_loops == 0
+        # a bridge is attached to the last loop
+        tokens[2].compiled_loop_token.size = 200
+        memmgr.next_generation()
+        assert memmgr.alive_loops == dict.fromkeys(tokens[1:])
+        assert memmgr.evicted_bytes == 100
+
+    def test_freeze(self):
+        memmgr = MemoryManager()
+        memmgr.set_max_age(3, 1)
+        memmgr.set_max_bytes(150)
+        tokens = [FakeLoopToken() for i in range(3)]
+        for token in tokens:
+            token.compiled_loop_token = FakeCompiledLoopToken(100)
+        memmgr.keep_loop_alive(tokens[0])
+        memmgr.next_generation()
+        memmgr.freeze()
+        assert memmgr.alive_loops == {}
+        # the frozen loop is never freed, and doesn't count in max_bytes
+        for token in tokens[1:]:
+            memmgr.keep_loop_alive(token)
+            memmgr.keep_loop_alive(tokens[0])
+            memmgr.next_generation()
+        for i in range(5):
+            memmgr.next_generation()
+        assert memmgr.frozen_loops == {tokens[0]: None}
+        assert memmgr.evicted_loops == 1
+        # unless it is invalidated
+        tokens[0].invalidated = True
+        memmgr.next_generation()
+        assert memmgr.frozen_loops == {}
+
 
 class _TestIntegration(LLJitMixin):
     # See comments in TestMemoryManager.  To get temporarily the normal
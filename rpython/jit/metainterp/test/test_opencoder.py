@@ -206,6 +206,29 @@ class TestOpencoder(object):
         t.record_op(rop.FINISH, [i4])
         assert t.get_dead_ranges() == [0, 0, 0, 0, 0, 3, 4, 5]
 
+    def test_skip_unused_operations(self):
+        i0, i1 = IntFrontendOp(0), IntFrontendOp(0)
+        t = Trace([i0, i1], metainterp_sd)
+        t.record_op(rop.INT_ADD, [i0, i1])                  # unused
+        i3 = FakeOp(t.record_op(rop.INT_SUB, [i0, i1]))
+        i4 = FakeOp(t.record_op(rop.INT_MUL, [i3, i3]))     # in resume data
+        t.record_op(rop.GUARD_TRUE, [i0])
+        resume.capture_resumedata([], [i4], [], t)
+        t.record_op(rop.STRLEN, [i1])                       # unused, kept
+        t.record_op(rop.INT_NEG, [i3])                      # unused
+        t.record_op(rop.FINISH, [i1])
+        iter = t.get_iter()
+        iter.skip_unused_operations()
+        l = []
+        while not iter.done():
+            l.append(iter.next())
+        assert [op.getopnum() for op in l] == [rop.INT_SUB, rop.INT_MUL,
+                          rop.GUARD_TRUE, rop.STRLEN, rop.FINISH]
+        assert l[1].getarg(0) is l[0]
+        assert iter.skipped == 2
+        unpack_snapshot(iter, l[2], l[2].rd_resume_position)
+        assert l[2].virtualizables == [l[1]]
+
     def test_tag_overflow(self):
         t = Trace([], metainterp_sd)
         i0 = FakeOp(100000)
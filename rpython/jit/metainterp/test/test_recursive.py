@@ -6,6 +6,7 @@ from rpython.rlib.debug import fatalerror
 from rpython.jit.metainterp.test.support import LLJitMixin
 from rpython.jit.codewriter.policy import StopAtXPolicy
 from rpython.rtyper.annlowlevel import hlstr
+from rpython.rtyper.lltypesystem import lltype, rstr
 from rpython.jit.metainterp.warmspot import get_stats
 from rpython.jit.backend.llsupport import codemap
 
@@ -396,6 +397,53 @@ class RecursiveTests:
         res = self.meta_interp(loop, [100], trace_limit=TRACE_LIMIT)
         assert res == 80
 
+    def test_trace_limit_blames_innermost_callee(self):
+        def p(pc, code):
+            code = hlstr(code)
+            return "%s %d %s" % (code, pc, code[pc])
+        myjitdriver = JitDriver(greens=['pc', 'code'], reds=['n'],
+                                get_printable_location=p,
+                                is_recursive=True)
+
+        def f(code, n):
+            pc = 0
+            while pc < len(code):
+
+                myjitdriver.jit_merge_point(n=n, code=code, pc=pc)
+                op = code[pc]
+                if op == "-":
+                    n -= 1
+                elif op == "a":
+                    n = f('-b-', n)
+                elif op == "b":
+                    n = f('------------------------------', n)
+                elif op == "l":
+                    if n > 0:
+                        myjitdriver.can_enter_jit(n=n, code=code, pc=0)
+                        pc = 0
+                        continue
+                else:
+                    assert 0
+                pc += 1
+            return n
+        def g(m):
+            set_param(None, 'inlining', True)
+            set_param(None, 'threshold', 3)
+            set_param(None, 'trace_limit', 60)
+            result = 0
+            for i in range(m):
+                result += f('-a-l', i + 1000)
+            return result
+        self.meta_interp(g, [10], backendopt=True)
+        self.check_aborted_count(1)
+        # inlining is disabled only for the innermost function, which
+        # makes most of the trace; '-b-' is still inlined in the loop
+        [greenkey] = get_stats().aborted_keys
+        STR = lltype.Ptr(rstr.STR)
+        code = lltype.cast_opaque_ptr(STR, greenkey[1].getref_base())
+        assert hlstr(code) == '------------------------------'
+        self.check_resops(call_assembler_i=2)
+
     def test_max_failure_args(self):
         FAILARGS_LIMIT = 10
         jitdriver = JitDriver(greens = [], reds = ['i', 'n', 'o'])
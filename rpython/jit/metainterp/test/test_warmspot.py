@@ -109,6 +109,67 @@ class TestLLWarmspot(LLJitMixin):
         assert res == 0
         self.check_resops(new_with_vtable=0)
 
+    def test_defer_compilation(self):
+        myjitdriver = JitDriver(greens = [], reds = ['n'])
+
+        def g(n):
+            while n > 0:
+                myjitdriver.can_enter_jit(n=n)
+                myjitdriver.jit_merge_point(n=n)
+                n -= 1
+            return n
+        def f(n, resume):
+            set_param(None, 'defer_compilation', 1)
+            g(n)
+            if resume:
+                set_param(None, 'defer_compilation', 0)
+            return g(n)
+
+        res = self.meta_interp(f, [20, 0])
+        assert res == 0
+        self.check_trace_count(0)
+        # the loop is traced as soon as it runs again
+        res = self.meta_interp(f, [20, 1])
+        assert res == 0
+        self.check_trace_count(1)
+
+    def test_max_bridges(self):
+        myjitdriver = JitDriver(greens = [], reds = ['i', 'n', 'total'])
+
+        def g(n):
+            i = 0
+            total = 0
+            while i < n:
+                myjitdriver.can_enter_jit(i=i, n=n, total=total)
+                myjitdriver.jit_merge_point(i=i, n=n, total=total)
+                x = i % 4
+                if x == 1:
+                    total += 1
+                elif x == 2:
+                    total += 10
+                elif x == 3:
+                    total += 100
+                i += 1
+            return total
+        def f(n, max_bridges):
+            set_param(None, 'trace_eagerness', 1)
+            set_param(None, 'max_bridges', max_bridges)
+            total = 0
+            for k in range(4):
+                total += g(n)
+            return total
+
+        res = self.meta_interp(f, [40, 0])
+        assert res == 4 * 10 * 111
+        self.check_jitcell_token_count(1)
+        assert not get_stats().invalidated_token_numbers
+        # with a limit of 2 bridges, the loop is traced a second time
+        # when g() is called again, but not a third time
+        res = self.meta_interp(f, [40, 2])
+        assert res == 4 * 10 * 111
+        self.check_jitcell_token_count(2)
+        assert len(get_stats().invalidated_token_numbers) == 1
+
     def test_unwanted_loops(self):
         mydriver = JitDriver(reds = ['n', 'total', 'm'], greens = [])
 
@@ -585,6 +585,32 @@ class VectorizeTests(object):
         res = self.meta_interp(f, [128], vec=True, vec_all=True)
         assert res == f(128)
 
+    @py.test.mark.parametrize('value,vec', [(42, True), (4.5, True),
+                                            (42, False)])
+    def test_list_find(self, value, vec):
+        # the search loop of list.index() on a list of ints or floats
+        myjitdriver = JitDriver(greens = [], reds = 'auto', vectorize=True)
+        def find(l, obj):
+            i = 0
+            stop = len(l)
+            while i < stop:
+                myjitdriver.jit_merge_point()
+                if l[i] == obj:
+                    return i
+                i += 1
+            return -1
+        def f(d, at):
+            l = []
+            for i in range(d):
+                l.append(value * 0)
+            l[at] = value
+            return find(l, value)
+        res = self.meta_interp(f, [100, 77], vec=vec)
+        assert res == f(100, 77) == 77
+        names = [op.getopname() for loop in get_stats().get_all_loops()
+                                for op in loop.operations]
+        assert ('vec_load_i' in names or 'vec_load_f' in names) == vec
+
 
     def combinations(types, operators):
         import itertools
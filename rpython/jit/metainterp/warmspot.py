@@ -20,7 +20,7 @@ from rpython.translator.unsimplify import call_final_function
 
 from rpython.jit.metainterp import history, pyjitpl, gc, memmgr, jitexc
 from rpython.jit.metainterp.pyjitpl import MetaInterpStaticData
-from rpython.jit.metainterp.jitprof import Profiler, EmptyProfiler
+from rpython.jit.metainterp.jitprof import Profiler, EmptyProfiler, LoopStats
 from rpython.jit.metainterp.jitdriver import JitDriverStaticData
 from rpython.jit.codewriter import support, codewriter
 from rpython.jit.codewriter.policy import JitPolicy
@@ -228,6 +228,7 @@ class WarmRunnerDesc(object):
         pyjitpl._warmrunnerdesc = self   # this is a global for debugging only!
         self.set_translator(translator)
         self.memory_manager = memmgr.MemoryManager()
+        self.loop_stats = LoopStats()
         self.build_cpu(CPUClass, **kwds)
         self.inline_inlineable_portals()
         self.find_portals()
@@ -835,7 +836,8 @@ class WarmRunnerDesc(object):
         # make sure we make a copy of function so it no longer belongs
         # to extregistry
         func = op.args[1].value
-        if func.func_name.startswith('stats_'):
+        if (func.func_name.startswith('stats_') or
+                getattr(func, '_with_warmrunnerdesc_', False)):
             # get special treatment since we rewrite it to a call that accepts
             # jit driver
             assert len(op.args) >= 3, ("%r must have a first argument "
@@ -138,6 +138,7 @@ JC_TRACING         = 0x01
 JC_DONT_TRACE_HERE = 0x02
 JC_TEMPORARY       = 0x04
 JC_TRACING_OCCURRED= 0x08
+JC_REOPTIMIZED     = 0x10
 
 class BaseJitCell(object):
     """Subclasses of BaseJitCell are used in tandem with the single
@@ -184,6 +185,12 @@ class BaseJitCell(object):
         this particular function.  (We only set this flag when aborting
         due to a trace too long, so we use the same flag as a hint to
         also mean "please trace from here as soon as possible".)
+
+        JC_REOPTIMIZED: the procedure_token got too many bridges (see
+        the 'max_bridges' parameter) and was invalidated, so that the
+        loop is traced again from scratch.  The invalidated token stays
+        in 'wref_procedure_token' until the new one is attached, and
+        the new one is never discarded again in the same way.
     """
     flags = 0     # JC_xxx flags
     wref_procedure_token = None
@@ -196,6 +203,11 @@ class BaseJitCell(object):
                 return token
         return None
 
+    def get_invalidated_procedure_token(self):
+        if self.wref_procedure_token is not None:
+            return self.wref_procedure_token()
+        return None
+
     def has_seen_a_procedure_token(self):
         return self.wref_procedure_token is not None
 
@@ -220,6 +232,10 @@ class BaseJitCell(object):
             # we no longer have one, then remove me.  this prevents this
             # JitCell from being immortal.
             return self.has_seen_a_procedure_token()     # i.e. dead weakref
+        if self.flags & JC_REOPTIMIZED:
+            # keep the flag as long as the invalidated procedure_token
+            # (or, later, the new one) is alive
+            return self.get_invalidated_procedure_token() is None
         return True   # Other JitCells can be removed.
 
 # ____________________________________________________________
@@ -289,6 +305,19 @@ class WarmEnterState(object):
             self.warmrunnerdesc.memory_manager is not None):   # all for tests
             self.warmrunnerdesc.memory_manager.set_max_age(value)
 
+    def set_param_jit_code_max_bytes(self, value):
+        # note: it's a global parameter, not a per-jitdriver one
+        if (self.warmrunnerdesc is not None and
+            self.warmrunnerdesc.memory_manager is not None):   # all for tests
+            self.warmrunnerdesc.memory_manager.set_max_bytes(value)
+
+    def set_param_defer_compilation(self, value):
+        # note: it's a global parameter, not a per-jitdriver one
+        self.warmrunnerdesc.jitcounter.set_deferring(bool(value))
+
+    def set_param_max_bridges(self, value):
+        self.max_bridges = value
+
     def set_param_retrace_limit(self, value):
         if self.warmrunnerdesc:
             if self.warmrunnerdesc.memory_manager:
@@ -329,6 +358,11 @@ class WarmEnterState(object):
     def attach_procedure_to_interp(self, greenkey, procedure_token):
         cell = self.JitCell.ensure_jit_cell_at_key(greenkey)
         old_token = cell.get_procedure_token()
+        if cell.flags & JC_REOPTIMIZED:
+            if old_token is None:
+                old_token = cell.get_invalidated_procedure_token()
+        else:
+            procedure_token.jitcell = cell      # see bridge_compiled()
         cell.set_procedure_token(procedure_token)
         if old_token is not None:
             self.cpu.redirect_call_assembler(old_token, procedure_token)
@@ -337,6 +371,35 @@ class WarmEnterState(object):
             # is a pointless optimization (it is tiny).
             old_token.record_jump_to(procedure_token)
 
+    def bridge_compiled(self, procedure_token):
+        """Called after a bridge was attached to the loop
+        'procedure_token'.  If it has at least 'max_bridges' bridges
+        now, invalidate it: it will be traced again from scratch the
+        next time the interpreter reaches the loop header, and the new
+        loop replaces it in attach_procedure_to_interp().
+        """
+        if self.max_bridges <= 0:
+            return
+        clt = procedure_token.compiled_loop_token
+        if clt is None or clt.bridges_count < self.max_bridges:
+            return
+        cell = procedure_token.jitcell
+        if cell is None:
+            return
+        procedure_token.jitcell = None
+        if cell.get_procedure_token() is not procedure_token:
+            return
+        debug_start("jit-reoptimize")
+        debug_print("loop", procedure_token.number, "has",
+                    clt.bridges_count, "bridges, invalidating it")
+        debug_stop("jit-reoptimize")
+        cell.flags |= JC_REOPTIMIZED
+        procedure_token.invalidated = True
+        self.cpu.invalidate_loop(procedure_token)
+        if not we_are_translated():
+            self.cpu.stats.invalidated_token_numbers.add(
+                procedure_token.number)
+
     # ----------
 
     def make_entry_point(self):
@@ -390,6 +453,8 @@ class WarmEnterState(object):
             # Record in the memmgr that we just ran this loop,
             # so that it will keep it alive for a longer time
             warmrunnerdesc.memory_manager.keep_loop_alive(loop_token)
+            if warmrunnerdesc.loop_stats.enabled:
+                warmrunnerdesc.loop_stats.loop_entered(loop_token.number)
             #
             # Handle the failure
             fail_descr = cpu.get_latest_descr(deadframe)
@@ -415,6 +480,9 @@ class WarmEnterState(object):
         def bound_reached(hash, cell, *args):
             if not confirm_enter_jit(*args):
                 return
+            if jitcounter.deferring:
+                jitcounter.defer(hash)
+                return
             jitcounter.decay_all_counters()
             if rstack.stack_almost_full():
                 return
@@ -728,7 +796,7 @@ class WarmEnterState(object):
         printable_loc_ptr = self.jitdriver_sd._get_printable_location_ptr
         if printable_loc_ptr is None:
             missing = '(%s: no get_printable_location)' % drivername
-            def get_location_str(greenkey):
+            def get_location_str(greenkey, force=False):
                 return missing
         else:
             unwrap_greenkey = self.make_unwrap_greenkey()
@@ -738,8 +806,8 @@ class WarmEnterState(object):
             missing = ('(%s: get_printable_location '
                        'disabled, no debug_print)' % drivername)
             #
-            def get_location_str(greenkey):
-                if not have_debug_prints_for("jit-"):
+            def get_location_str(greenkey, force=False):
+                if not force and not have_debug_prints_for("jit-"):
                     return missing
                 greenargs = unwrap_greenkey(greenkey)
                 fn = support.maybe_on_top_of_llinterp(rtyper, printable_loc_ptr)
@@ -2,6 +2,7 @@ from rpython.rtyper.lltypesystem import lltype, llmemory, llarena, rffi
 from rpython.rtyper.lltypesystem.lloperation import llop
 from rpython.rlib.debug import ll_assert
 from rpython.memory.gcheader import GCHeaderBuilder
+from rpython.memory.gc.hook import GcHooks
 from rpython.memory.support import DEFAULT_CHUNK_SIZE
 from rpython.memory.support import get_address_stack, get_address_deque
 from rpython.memory.support import AddressDict, null_address_dict
@@ -24,7 +25,7 @@ class GCBase(object):
     gcflag_extra = 0   # or a real GC flag that is always 0 when not collecting
 
     def __init__(self, config, chunk_size=DEFAULT_CHUNK_SIZE,
-                 translated_to_c=True):
+                 translated_to_c=True, hooks=None):
         self.gcheaderbuilder = GCHeaderBuilder(self.HDR)
         self.AddressStack = get_address_stack(chunk_size)
         self.AddressDeque = get_address_deque(chunk_size)
@@ -33,6 +34,9 @@ class GCBase(object):
         self.config = config
         assert isinstance(translated_to_c, bool)
         self.translated_to_c = translated_to_c
+        if hooks is None:
+            hooks = GcHooks()
+        self.hooks = hooks
 
     def setup(self):
         # all runtime mutable values' setup should happen here
@@ -184,6 +188,13 @@ class GCBase(object):
     def can_move(self, addr):
         return False
 
+    def collect_step(self):
+        """Do a single step of a major collection and return True if
+        the major collection cycle is complete.  For GCs that are not
+        incremental, this is just a full collection."""
+        self.collect()
+        return True
+
     def malloc_fixed_or_varsize_nonmovable(self, typeid, length):
         raise MemoryError
 
@@ -199,6 +210,20 @@ class GCBase(object):
     def set_max_heap_size(self, size):
         raise NotImplementedError
 
+    def get_stats(self, stats_no):
+        """Return one of the statistics listed in rpython.rlib.rgc,
+        or 0 if this GC doesn't track it."""
+        return 0
+
+    def get_size_class_stats(self, size_class, stats_no):
+        """Return one of the SIZE_CLASS_* statistics listed in
+        rpython.rlib.rgc, or 0 if this GC doesn't track it."""
+        return 0
+
+    def set_alloc_sample_period(self, period):
+        """Allocation sampling, see rpython.rlib.rgc.  Ignored by the
+        GCs that don't support it."""
+
     def trace(self, obj, callback, arg):
         """Enumerate the locations inside the given obj that can contain
         GC pointers.  For each such location, callback(pointer, arg) is
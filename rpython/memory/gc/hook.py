@@ -0,0 +1,108 @@
+from rpython.rlib import rgc
+from rpython.rlib.rarithmetic import r_uint
+
+class GcHooks(object):
+    """
+    Base class to write your own GC hooks.
+
+    Subclasses are expected to override the on_* methods.  Note that such
+    methods can do only simple stuff such as updating statistics and/or
+    setting a flag: in particular, they cannot do anything which can
+    possibly trigger a GC collection, because they are called from the
+    middle of one.  Anything more complicated should be done later, e.g.
+    by using an AsyncAction on the PyPy side.
+
+    The is_*_enabled() methods are called before invoking the corresponding
+    hook, so that the GC can avoid computing the hook arguments when it is
+    not needed.
+    """
+
+    def is_gc_minor_enabled(self):
+        return False
+
+    def is_gc_collect_step_enabled(self):
+        return False
+
+    def is_gc_collect_enabled(self):
+        return False
+
+    def is_gc_alloc_sample_enabled(self):
+        return False
+
+    def on_gc_minor(self, duration, total_memory_used, pinned_objects,
+                    surviving_size):
+        """
+        Called after a minor collection.  'duration' is in seconds,
+        'surviving_size' is the number of bytes moved out of the nursery.
+        """
+
+    def on_gc_collect_step(self, duration, oldstate, newstate):
+        """
+        Called after each individual step of a major collection, in case the
+        GC is incremental.
+
+        'oldstate' and 'newstate' are integers which indicate the GC
+        state; for incminimark, see incminimark.STATE_* and
+        incminimark.GC_STATES.
+        """
+
+    def on_gc_collect(self, num_major_collects,
+                      arenas_count_before, arenas_count_after,
+                      arenas_bytes, rawmalloc_bytes_before,
+                      rawmalloc_bytes_after):
+        """
+        Called after a major collection is fully done
+        """
+
+    def on_gc_alloc_sample(self, size):
+        """
+        Called in allocation sampling mode (see
+        rgc.set_alloc_sample_period()), each time the given number of bytes
+        has been allocated in the nursery.  'size' is the size of the
+        object which is being allocated.
+        """
+
+    # the fire_* methods are meant to be called from the GC and should NOT be
+    # overridden
+
+    @rgc.no_collect
+    def fire_gc_minor(self, duration, total_memory_used, pinned_objects,
+                      surviving_size):
+        if self.is_gc_minor_enabled():
+            self.on_gc_minor(duration, total_memory_used, pinned_objects,
+                             surviving_size)
+
+    @rgc.no_collect
+    def fire_gc_collect_step(self, duration, oldstate, newstate):
+        if self.is_gc_collect_step_enabled():
+            self.on_gc_collect_step(duration, oldstate, newstate)
+
+    @rgc.no_collect
+    def fire_gc_collect(self, num_major_collects,
+                        arenas_count_before, arenas_count_after,
+                        arenas_bytes, rawmalloc_bytes_before,
+                        rawmalloc_bytes_after):
+        if self.is_gc_collect_enabled():
+            self.on_gc_collect(num_major_collects,
+                               arenas_count_before, arenas_count_after,
+                               arenas_bytes, rawmalloc_bytes_before,
+                               rawmalloc_bytes_after)
+
+    @rgc.no_collect
+    def fire_gc_alloc_sample(self, size):
+        if self.is_gc_alloc_sample_enabled():
+            self.on_gc_alloc_sample(size)
+
+    def get_annotation_entry_point(self):
+        """NOT_RPYTHON: return a function calling all the fire_*() methods,
+        and the types of its arguments.  The translation driver annotates
+        it together with the rest of the program, so that the annotations
+        of the hooks are known before the GC itself is annotated.
+        """
+        hooks = self
+        def annotate_gc_hooks(duration, num, size):
+            hooks.fire_gc_minor(duration, size, num, num)
+            hooks.fire_gc_collect_step(duration, num, num)
+            hooks.fire_gc_collect(num, num, num, size, size, size)
+            hooks.fire_gc_alloc_sample(num)
+        return annotate_gc_hooks, [float, int, r_uint]
@@ -52,6 +52,39 @@ Environment variables can be used to fine-tune the following parameters:
                          in time.  Defaults to a conservative value depending
                          on nursery size and maximum object size inside the
                          nursery.  Useful for debugging by setting it to 0.
+
+ PYPY_GC_MAX_PAUSE       Soft real-time mode.  If set, the time taken by
+                         each GC pause (a minor collection followed by a
+                         major collection step) is measured, and the amount
+                         of work done in the next major collection steps is
+                         adapted so that the pauses stay below this number
+                         of microseconds.  Try values like '2000'.  This is
+                         only a target: scanning the roots and running the
+                         finalizers cannot be split into smaller steps, and
+                         if objects survive faster than the smaller steps
+                         can process them, more steps are done in the same
+                         pause to avoid growing the heap without bound.
+
+ PYPY_GC_COMPACT         Fragmentation threshold, between 0.0 and 1.0,
+                         above which a major collection is followed by a
+                         compaction of the sparsely used pages of the
+                         arenas, which can then be returned to the OS.
+                         The fragmentation is the fraction of the blocks
+                         of the pages in use that are free.  Try values
+                         like '0.5'.  Defaults to 0 (never compact
+                         automatically; see gc.collect(compact=True)).
+
+ PYPY_GC_NURSERY_MAX     Adaptive nursery mode.  If set to more than the
+                         nursery size, the nursery grows up to this size
+                         when only a small fraction of it survives the
+                         minor collections, and shrinks back towards the
+                         initial size when a large fraction survives.
+
+ PYPY_GC_ARENA_RETAIN    The arenas that become completely empty are
+                         returned to the OS.  If set, up to this amount
+                         of memory of them is kept for reuse instead, as
+                         long as they get reused before the end of the
+                         next major collection.  Defaults to 0.
 """
 # XXX Should find a way to bound the major collection threshold by the
 # XXX total addressable size.  Maybe by keeping some minimarkpage arenas
@@ -72,7 +105,8 @@ from rpython.rlib.rarithmetic import ovfcheck, LONG_BIT, intmask, r_uint
 from rpython.rlib.rarithmetic import LONG_BIT_SHIFT
 from rpython.rlib.debug import ll_assert, debug_print, debug_start, debug_stop
 from rpython.rlib.objectmodel import specialize
-from rpython.memory.gc.minimarkpage import out_of_memory
+from rpython.rlib import rgc, rtime
+from rpython.memory.gc.minimarkpage import out_of_memory, WORD_POWER_2
 
 #
 # Handles the objects in 2 generations:
@@ -160,7 +194,13 @@ GCFLAG_IGNORE_FINALIZER = first_gcflag << 10
 # It does not need an additional copy in trace out
 GCFLAG_SHADOW_INITIALIZED   = first_gcflag << 11
 
-_GCFLAG_FIRST_UNUSED = first_gcflag << 12    # the first unused bit
+# The following flag is set on objects whose address may have been
+# exposed: their id() or identityhash() was taken, can_move() returned
+# False, or they are linked to a PyObject by rawrefcount.  Such objects
+# are never moved by compact_arenas().
+GCFLAG_NO_COMPACT   = first_gcflag << 12
+
+_GCFLAG_FIRST_UNUSED = first_gcflag << 13    # the first unused bit
 
 
 # States for the incremental GC
@@ -182,6 +222,16 @@ STATE_FINALIZING = 3
 
 GC_STATES = ['SCANNING', 'MARKING', 'SWEEPING', 'FINALIZING']
 
+# In soft real-time mode, the smallest fraction of the default amount of
+# work that we still do in a single major collection step.
+MIN_PAUSE_STEP_FACTOR = 1.0 / 1024
+
+# In adaptive nursery mode, the nursery size is doubled when the average
+# fraction of the nursery surviving a minor collection is below the first
+# number, and halved when it is above the second number.
+NURSERY_GROW_SURVIVAL = 0.05
+NURSERY_SHRINK_SURVIVAL = 0.25
+
 
 FORWARDSTUB = lltype.GcStruct('forwarding_stub',
                               ('forw', llmemory.Address))
@@ -280,6 +330,7 @@ class IncrementalMiniMarkGC(MovingGCBase):
                  growth_rate_max=2.5,   # for tests
                  card_page_indices=0,
                  large_object=8*WORD,
+                 nursery_max_size=0,
                  ArenaCollectionClass=None,
                  **kwds):
         "NOT_RPYTHON"
@@ -292,6 +343,13 @@ class IncrementalMiniMarkGC(MovingGCBase):
         self.major_collection_threshold = major_collection_threshold
         self.growth_rate_max = growth_rate_max
         self.num_major_collects = 0
+        self.num_minor_collects = 0
+        self.total_minor_time = 0.0
+        self.total_major_time = 0.0
+        # the collections are only timed once get_stats() was asked for
+        # the times, or while a hook wants them: reading the clock twice
+        # per collection is not free
+        self.time_collections = False
         self.min_heap_size = 0.0
         self.max_heap_size = 0.0
         self.max_heap_size_already_raised = False
@@ -315,6 +373,16 @@ class IncrementalMiniMarkGC(MovingGCBase):
         self.debug_rotating_nurseries = lltype.nullptr(NURSARRAY)
         self.extra_threshold = 0
         #
+        # Allocation sampling, see set_alloc_sample_period().  While
+        # 'alloc_sample_top' is not NULL, 'nursery_top' was lowered to
+        # the next sample point and its real value is 'alloc_sample_top'.
+        # The bytes allocated since 'alloc_sample_start' are not yet
+        # counted in 'alloc_sample_countdown'.
+        self.alloc_sample_period = 0
+        self.alloc_sample_countdown = 0
+        self.alloc_sample_start = llmemory.NULL
+        self.alloc_sample_top = llmemory.NULL
+        #
         # The ArenaCollection() handles the nonmovable objects allocation.
         if ArenaCollectionClass is None:
             from rpython.memory.gc import minimarkpage
@@ -357,6 +425,35 @@ class IncrementalMiniMarkGC(MovingGCBase):
         # for more details.
         self.size_objects_made_old = r_uint(0)
         self.threshold_objects_made_old = r_uint(0)
+        #
+        # Soft real-time mode, enabled with PYPY_GC_MAX_PAUSE.  The amount
+        # of work done in a major collection step is multiplied by
+        # 'pause_step_factor', which is adapted after every pause.  All
+        # times are in seconds.
+        self.max_pause = 0.0        # 0.0 means "disabled"
+        self.pause_step_factor = 1.0
+        self.last_pause = 0.0
+        self.longest_pause = 0.0
+        #
+        # Compaction of the arenas, see compact_arenas().  The pages in
+        # which at most 'compact_max_fill' of the blocks are used are
+        # evacuated.  If 'compact_threshold' is not zero, compact_arenas()
+        # is called at the end of every major collection which leaves a
+        # fragmentation above this threshold (PYPY_GC_COMPACT).
+        self.compact_threshold = 0.0
+        self.compact_max_fill = 0.5
+        self.num_compactions = 0
+        self.compact_moved_objects = 0
+        #
+        # Adaptive nursery mode, enabled with PYPY_GC_NURSERY_MAX.  The
+        # nursery is allocated with 'nursery_max_size' bytes, but only
+        # the first 'nursery_size' bytes are used, which is adapted
+        # between 'nursery_min_size' and 'nursery_max_size' after every
+        # minor collection.  See adapt_nursery_size().
+        self.nursery_max_size = nursery_max_size   # 0 means "disabled"
+        self.nursery_min_size = 0
+        self.nursery_survival_rate = 0.0
+        self.num_nursery_resizes = 0
 
 
     def setup(self):
@@ -371,6 +468,11 @@ class IncrementalMiniMarkGC(MovingGCBase):
         self.old_rawmalloced_objects = self.AddressStack()
         self.raw_malloc_might_sweep = self.AddressStack()
         self.rawmalloced_total_size = r_uint(0)
+        #
+        # memory usage at the start of the last sweeping phase, used
+        # only to report statistics to the GC hooks
+        self.stat_ac_arenas_count = 0
+        self.stat_rawmalloced_total_size = r_uint(0)
 
         self.gc_state = STATE_SCANNING
         #
@@ -484,6 +586,22 @@ class IncrementalMiniMarkGC(MovingGCBase):
             else:
                 self.gc_increment_step = newsize * 4
             #
+            max_pause = env.read_float_from_env('PYPY_GC_MAX_PAUSE')
+            if max_pause > 0.0:
+                self.max_pause = max_pause * 0.000001   # in microseconds
+            #
+            compact_threshold = env.read_float_from_env('PYPY_GC_COMPACT')
+            if compact_threshold > 0.0:
+                self.compact_threshold = compact_threshold
+            #
+            arena_retain = env.read_from_env('PYPY_GC_ARENA_RETAIN')
+            if arena_retain > 0:
+                self.ac.set_arena_retain(arena_retain)
+            #
+            nursery_max_size = env.read_from_env('PYPY_GC_NURSERY_MAX')
+            if nursery_max_size > newsize and self.debug_tiny_nursery < 0:
+                self.nursery_max_size = nursery_max_size & ~(WORD-1)
+            #
             nursery_debug = env.read_uint_from_env('PYPY_GC_NURSERY_DEBUG')
             if nursery_debug > 0:
                 self.gc_nursery_debug = True
@@ -494,6 +612,10 @@ class IncrementalMiniMarkGC(MovingGCBase):
             self.nursery_size = newsize
             self.allocate_nursery()
         #
+        if self.nursery_max_size <= self.nursery_size:
+            self.nursery_max_size = 0
+        self.nursery_min_size = self.nursery_size
+        #
         env_max_number_of_pinned_objects = os.environ.get('PYPY_GC_MAX_PINNED')
         if env_max_number_of_pinned_objects:
             try:
@@ -510,7 +632,7 @@ class IncrementalMiniMarkGC(MovingGCBase):
 
     def _nursery_memory_size(self):
         extra = self.nonlarge_max + 1
-        return self.nursery_size + extra
+        return max(self.nursery_size, self.nursery_max_size) + extra
 
     def _alloc_nursery(self):
         # the start of the nursery: we actually allocate a bit more for
@@ -740,7 +862,8 @@ class IncrementalMiniMarkGC(MovingGCBase):
 
     def collect(self, gen=2):
         """Do a minor (gen=0), start a major (gen=1), or do a full
-        major (gen>=2) collection."""
+        major (gen>=2) collection.  With gen=3, the full major
+        collection is followed by a compaction of the arenas."""
         if gen < 0:
             self._minor_collection()   # dangerous! no major GC cycle progress
         elif gen <= 1:
@@ -749,15 +872,39 @@ class IncrementalMiniMarkGC(MovingGCBase):
                 self.major_collection_step()
         else:
             self.minor_and_major_collection()
+            if gen == 3:
+                # the finalizers may have allocated objects in the nursery
+                self._minor_collection()
+                self.compact_arenas()
+        self.rrc_invoke_callback()
+
+    def collect_step(self):
+        """
+        Do a minor collection followed by a single major collection
+        step, starting a new major collection cycle if none is in
+        progress.  Return True if this step completed the major
+        collection cycle.  This lets the program choose when to do the
+        major collection work (e.g. while idle between requests)
+        instead of having it spread over the following allocations.
+        """
+        self._minor_collection()
+        self.major_collection_step()
         self.rrc_invoke_callback()
+        return self.gc_state == STATE_SCANNING
 
 
-    def minor_collection_with_major_progress(self, extrasize=0):
+    def minor_collection_with_major_progress(self, extrasize=0,
+                                             nursery_full=False):
         """Do a minor collection.  Then, if there is already a major GC
         in progress, run at least one major collection step.  If there is
         no major GC but the threshold is reached, start a major GC.
         """
+        pause_start = 0.0
+        if self.max_pause > 0.0:
+            pause_start = rtime.time()
         self._minor_collection()
+        if nursery_full and self.nursery_max_size > 0:
+            self.adapt_nursery_size()
 
         # If the gc_state is STATE_SCANNING, we're not in the middle
         # of an incremental major collection.  In that case, wait
@@ -768,10 +915,15 @@ class IncrementalMiniMarkGC(MovingGCBase):
         #
         # Within a major collection cycle, every call to
         # major_collection_step() increments
-        # 'threshold_objects_made_old' by nursery_size/2.
+        # 'threshold_objects_made_old' by nursery_size/2 (or less, in
+        # soft real-time mode).
 
         if self.gc_state != STATE_SCANNING or self.threshold_reached(extrasize):
             self.major_collection_step(extrasize)
+            if self.max_pause > 0.0:
+                # only time one step: the extra steps done below when the
+                # GC falls behind must not make the next steps smaller
+                self.adapt_step_factor(rtime.time() - pause_start)
 
             # See documentation in major_collection_step() for target invariants
             while self.gc_state != STATE_SCANNING:    # target (A1)
@@ -788,6 +940,158 @@ class IncrementalMiniMarkGC(MovingGCBase):
 
         self.rrc_invoke_callback()
 
+    def adapt_step_factor(self, pause):
+        """Soft real-time mode: called after a pause made of a minor
+        collection and one major collection step.  If the pause was too long,
+        reduce the work done in the following steps proportionally; if
+        it was much shorter than needed, increase it again slowly (but
+        never above the amount of work done by default).
+        """
+        debug_start("gc-adapt-step")
+        self.last_pause = pause
+        if pause > self.longest_pause:
+            self.longest_pause = pause
+        factor = self.pause_step_factor
+        if pause > self.max_pause:
+            factor *= max(self.max_pause / pause, 0.25)
+            if factor < MIN_PAUSE_STEP_FACTOR:
+                factor = MIN_PAUSE_STEP_FACTOR
+        elif pause < self.max_pause * 0.5:
+            factor *= 1.25
+            if factor > 1.0:
+                factor = 1.0
+        self.pause_step_factor = factor
+        debug_print("pause:", int(pause * 1000000.0), "us",
+                    "target:", int(self.max_pause * 1000000.0), "us",
+                    "new step factor:", factor)
+        debug_stop("gc-adapt-step")
+
+    def adapt_nursery_size(self):
+        """Adaptive nursery mode: called after a minor collection caused
+        by the nursery being full.  If only a small fraction of the
+        nursery survives on average, minor collections are mostly
+        overhead: double the size of the nursery, to do fewer of them.
+        If a large fraction survives, a bigger nursery doesn't help:
+        halve it, so that it fits better in the cache.
+        """
+        rate = float(self.nursery_surviving_size) / self.nursery_size
+        self.nursery_survival_rate = (self.nursery_survival_rate * 0.75 +
+                                      rate * 0.25)
+        #
+        # The nursery can only be resized while it is empty, and the
+        # extra nurseries of PYPY_GC_DEBUG are of the maximum size.
+        if self.pinned_objects_in_nursery > 0:
+            return
+        newsize = self.nursery_size
+        if self.nursery_survival_rate < NURSERY_GROW_SURVIVAL:
+            newsize = min(newsize * 2, self.nursery_max_size)
+        elif self.nursery_survival_rate > NURSERY_SHRINK_SURVIVAL:
+            newsize = max(newsize // 2, self.nursery_min_size)
+        if newsize == self.nursery_size:
+            return
+        #
+        debug_start("gc-adapt-nursery")
+        debug_print("survival rate:", int(self.nursery_survival_rate * 100.0),
+                    "%", "old nursery size:", self.nursery_size,
+                    "new nursery size:", newsize)
+        if newsize < self.nursery_size:
+            # give the part of the nursery that we stop using back to the OS
+            llarena.arena_reset(self.nursery + newsize,
+                                self.nursery_size - newsize, 4)
+        if self.alloc_sample_period > 0:
+            self._alloc_sample_update()
+        self.nursery_size = newsize
+        self.nursery_top = self.nursery + newsize
+        self.num_nursery_resizes += 1
+        if self.alloc_sample_period > 0:
+            self._alloc_sample_rearm()
+        debug_stop("gc-adapt-nursery")
+
+    def scale_step(self, limit):
+        """Scale the amount of work 'limit' for a single major collection
+        step.  Only has an effect in soft real-time mode."""
+        if self.max_pause > 0.0:
+            limit = int(limit * self.pause_step_factor)
+            if limit < 1:
+                limit = 1
+        return limit
+
+    def marking_step_budget(self):
+        estimate = self.scale_step(intmask(self.gc_increment_step))
+        # not scaled: marking must keep up with the objects that the minor
+        # collections make old, or the major collection would never end
+        estimate_from_nursery = self.nursery_surviving_size * 2
+        if estimate_from_nursery > estimate:
+            estimate = estimate_from_nursery
+        return intmask(estimate)
+
+    def sweeping_step_budget(self):
+        # Number of arena pages to sweep in one step.  Visit at most
+        # '3 * nursery_size' bytes, by default.
+        return self.scale_step(3 * self.nursery_size // self.ac.page_size)
+
+    def get_stats(self, stats_no):
+        if stats_no == rgc.MAX_PAUSE_TARGET:
+            return int(self.max_pause * 1000000.0)
+        elif stats_no == rgc.LAST_PAUSE:
+            return int(self.last_pause * 1000000.0)
+        elif stats_no == rgc.LONGEST_PAUSE:
+            return int(self.longest_pause * 1000000.0)
+        elif stats_no == rgc.MARKING_STEP_BUDGET:
+            return self.marking_step_budget()
+        elif stats_no == rgc.SWEEPING_STEP_BUDGET:
+            return self.sweeping_step_budget()
+        elif stats_no == rgc.NURSERY_SIZE:
+            return self.nursery_size
+        elif stats_no == rgc.NURSERY_USED:
+            return self.nursery_free - self.nursery
+        elif stats_no == rgc.ARENA_PAGE_SIZE:
+            return self.ac.page_size
+        elif stats_no == rgc.ARENA_PAGES_USED:
+            return self.ac.count_pages_used()
+        elif stats_no == rgc.ARENA_PAGES_FREE:
+            return self.ac.total_arena_pages - self.ac.count_pages_used()
+        elif stats_no == rgc.RAWMALLOCED_TOTAL:
+            return intmask(self.rawmalloced_total_size)
+        elif stats_no == rgc.TOTAL_MEMORY_USED:
+            return intmask(self.get_total_memory_used())
+        elif stats_no == rgc.NUM_MINOR_COLLECTS:
+            return self.num_minor_collects
+        elif stats_no == rgc.NUM_MAJOR_COLLECTS:
+            return self.num_major_collects
+        elif stats_no == rgc.TOTAL_MINOR_TIME:
+            self.time_collections = True
+            return int(self.total_minor_time * 1000000.0)
+        elif stats_no == rgc.TOTAL_MAJOR_TIME:
+            self.time_collections = True
+            return int(self.total_major_time * 1000000.0)
+        elif stats_no == rgc.NUM_SIZE_CLASSES:
+            return self.small_request_threshold >> WORD_POWER_2
+        elif stats_no == rgc.ARENA_BYTES_RETAINED:
+            return self.ac.num_retained_arenas * self.ac.arena_size
+        elif stats_no == rgc.ARENA_BYTES_RELEASED:
+            return self.ac.arena_bytes_released
+        elif stats_no == rgc.NURSERY_MAX_SIZE:
+            return self.nursery_max_size
+        elif stats_no == rgc.NURSERY_SURVIVAL_RATE:
+            return int(self.nursery_survival_rate * 1000000.0)
+        elif stats_no == rgc.NUM_NURSERY_RESIZES:
+            return self.num_nursery_resizes
+        return 0
+
+    def get_size_class_stats(self, size_class, stats_no):
+        if size_class < 1 or size_class > (self.small_request_threshold >>
+                                           WORD_POWER_2):
+            return 0
+        pages = self.ac.pages_for_size[size_class]
+        if stats_no == rgc.SIZE_CLASS_PAGES:
+            return pages
+        elif stats_no == rgc.SIZE_CLASS_USED_BLOCKS:
+            return self.ac.used_blocks_for_size[size_class]
+        elif stats_no == rgc.SIZE_CLASS_TOTAL_BLOCKS:
+            return pages * self.ac.nblocks_for_size[size_class]
+        return 0
+
 
     def collect_and_reserve(self, totalsize):
         """To call when nursery_free overflows nursery_top.
@@ -797,8 +1101,26 @@ class IncrementalMiniMarkGC(MovingGCBase):
         major collection, and finally reserve totalsize bytes.
         """
 
+        if self.alloc_sample_period > 0:
+            # maybe 'nursery_top' was only lowered to take a sample.  The
+            # caller already added 'totalsize' to 'nursery_free', undo that.
+            result = self.nursery_free - totalsize
+            self.nursery_free = result
+            self._alloc_sample_update()
+            size = llmemory.raw_malloc_usage(totalsize)
+            if size > self.alloc_sample_countdown:
+                self.hooks.fire_gc_alloc_sample(size)
+                self.alloc_sample_countdown = self.alloc_sample_period + size
+            if result + totalsize <= self.nursery_top:
+                self.alloc_sample_start = result
+                self.nursery_free = result + totalsize
+                self._alloc_sample_rearm()
+                return result
+        #
         minor_collection_count = 0
         while True:
+            if self.alloc_sample_period > 0:
+                self._alloc_sample_update()
             self.nursery_free = llmemory.NULL      # debug: don't use me
             # note: no "raise MemoryError" between here and the next time
             # we initialize nursery_free!
@@ -838,7 +1160,8 @@ class IncrementalMiniMarkGC(MovingGCBase):
             else:
                 minor_collection_count += 1
                 if minor_collection_count == 1:
-                    self.minor_collection_with_major_progress()
+                    self.minor_collection_with_major_progress(
+                        nursery_full=True)
                 else:
                     # Nursery too full again.  This is likely because of
                     # execute_finalizers() or rrc_invoke_callback().
@@ -862,6 +1185,10 @@ class IncrementalMiniMarkGC(MovingGCBase):
             # Tried to do something about nursery_free overflowing
             # nursery_top before this point. Try to reserve totalsize now.
             # If this succeeds break out of loop.
+            if self.alloc_sample_period > 0:
+                # check against the real 'nursery_top', not a sample point
+                self._alloc_sample_update()
+                self.alloc_sample_start = self.nursery_free
             result = self.nursery_free
             if self.nursery_free + totalsize <= self.nursery_top:
                 self.nursery_free = result + totalsize
@@ -869,6 +1196,9 @@ class IncrementalMiniMarkGC(MovingGCBase):
                 break
             #
         #
+        if self.alloc_sample_period > 0:
+            self._alloc_sample_rearm()
+        #
         if self.debug_tiny_nursery >= 0:   # for debugging
             if self.nursery_top - self.nursery_free > self.debug_tiny_nursery:
                 self.nursery_free = self.nursery_top - self.debug_tiny_nursery
@@ -876,6 +1206,41 @@ class IncrementalMiniMarkGC(MovingGCBase):
         return result
     collect_and_reserve._dont_inline_ = True
 
+    def set_alloc_sample_period(self, period):
+        """Allocation sampling mode: call the hook on_gc_alloc_sample()
+        each time 'period' bytes have been allocated in the nursery, or
+        stop doing so if 'period' is 0.  The fast path of the allocations
+        is not slowed down: 'nursery_top' is lowered to the next sample
+        point, so that collect_and_reserve() is called there.
+        """
+        if self.alloc_sample_period > 0:
+            self._alloc_sample_update()
+        self.alloc_sample_period = period
+        self.alloc_sample_countdown = period
+        if period > 0:
+            self._alloc_sample_rearm()
+
+    def _alloc_sample_update(self):
+        # count the bytes allocated since 'alloc_sample_start', and give
+        # 'nursery_top' its real value again
+        if self.alloc_sample_start:
+            self.alloc_sample_countdown -= (self.nursery_free -
+                                            self.alloc_sample_start)
+            self.alloc_sample_start = llmemory.NULL
+        if self.alloc_sample_top:
+            self.nursery_top = self.alloc_sample_top
+            self.alloc_sample_top = llmemory.NULL
+
+    def _alloc_sample_rearm(self):
+        # start counting from 'nursery_free' again, and lower 'nursery_top'
+        # if the next sample point is before it
+        self._alloc_sample_update()
+        self.alloc_sample_start = self.nursery_free
+        countdown = max(self.alloc_sample_countdown, 0)
+        if countdown < self.nursery_top - self.nursery_free:
+            self.alloc_sample_top = self.nursery_top
+            self.nursery_top = self.nursery_free + countdown
+
 
     # XXX kill alloc_young and make it always True
     def external_malloc(self, typeid, length, alloc_young):
@@ -1031,6 +1396,8 @@ class IncrementalMiniMarkGC(MovingGCBase):
         if self.next_major_collection_threshold < 0:
             # cannot trigger a full collection now, but we can ensure
             # that one will occur very soon
+            if self.alloc_sample_period > 0:
+                self._alloc_sample_update()
             self.nursery_free = self.nursery_top
 
     def can_optimize_clean_setarrayitems(self):
@@ -1040,7 +1407,11 @@ class IncrementalMiniMarkGC(MovingGCBase):
 
     def can_move(self, obj):
         """Overrides the parent can_move()."""
-        return self.is_in_nursery(obj)
+        if self.is_in_nursery(obj):
+            return True
+        # the caller will rely on 'obj' not moving
+        self.header(obj).tid |= GCFLAG_NO_COMPACT
+        return False
 
     def pin(self, obj):
         if self.pinned_objects_in_nursery >= self.max_number_of_pinned_objects:
@@ -1619,8 +1990,16 @@ class IncrementalMiniMarkGC(MovingGCBase):
         """Perform a minor collection: find the objects from the nursery
         that remain alive and move them out."""
         #
+        timed = self.time_collections or self.hooks.is_gc_minor_enabled()
+        start = 0.0
+        if timed:
+            start = rtime.time()
+        #
         debug_start("gc-minor")
         #
+        if self.alloc_sample_period > 0:
+            self._alloc_sample_update()
+        #
         # All nursery barriers are invalid from this point on.  They
         # are evaluated anew as part of the minor collection.
         self.nursery_barriers.delete()
@@ -1797,6 +2176,8 @@ class IncrementalMiniMarkGC(MovingGCBase):
         #
         self.nursery_free = self.nursery
         self.nursery_top = self.nursery_barriers.popleft()
+        if self.alloc_sample_period > 0:
+            self._alloc_sample_rearm()
         #
         # clear GCFLAG_PINNED_OBJECT_PARENT_KNOWN from all parents in the list.
         self.old_objects_pointing_to_pinned.foreach(
@@ -1816,6 +2197,17 @@ class IncrementalMiniMarkGC(MovingGCBase):
         self.root_walker.finished_minor_collection()
         #
         debug_stop("gc-minor")
+        self.num_minor_collects += 1
+        duration = 0.0
+        if timed:
+            duration = rtime.time() - start
+            self.total_minor_time += duration
+        if self.hooks.is_gc_minor_enabled():
+            self.hooks.fire_gc_minor(
+                duration=duration,
+                total_memory_used=self.get_total_memory_used(),
+                pinned_objects=self.pinned_objects_in_nursery,
+                surviving_size=self.nursery_surviving_size)
 
     def _reset_flag_old_objects_pointing_to_pinned(self, obj, ignore):
         ll_assert(self.header(obj).tid & GCFLAG_PINNED_OBJECT_PARENT_KNOWN != 0,
@@ -2209,6 +2601,12 @@ class IncrementalMiniMarkGC(MovingGCBase):
     # Note - minor collections seem fast enough so that one
     # is done before every major collection step
     def major_collection_step(self, reserving_size=0):
+        timed = (self.time_collections or
+                 self.hooks.is_gc_collect_step_enabled())
+        start = 0.0
+        if timed:
+            start = rtime.time()
+        oldstate = self.gc_state
         debug_start("gc-collect-step")
         debug_print("starting gc state: ", GC_STATES[self.gc_state])
         # Debugging checks
@@ -2232,7 +2630,8 @@ class IncrementalMiniMarkGC(MovingGCBase):
         #  (A2)  size_objects_made_old <= threshold_objects_made_old
         #
         # Every call to major_collection_step() adds nursery_size//2
-        # to 'threshold_objects_made_old'.
+        # to 'threshold_objects_made_old' (scaled like the work done
+        # by the step in soft real-time mode, see scale_step()).
         # In the common case, this is larger than the size of all
         # objects that survive a minor collection.  After a few
         # minor collections (each followed by one call to
@@ -2252,7 +2651,8 @@ class IncrementalMiniMarkGC(MovingGCBase):
         #   collection steps must be done immediately, until we
         #   restore the target invariant (A2).
         #
-        self.threshold_objects_made_old += r_uint(self.nursery_size // 2)
+        self.threshold_objects_made_old += r_uint(
+            self.scale_step(self.nursery_size // 2))
 
 
         if self.gc_state == STATE_SCANNING:
@@ -2270,11 +2670,7 @@ class IncrementalMiniMarkGC(MovingGCBase):
                         self.objects_to_trace.length(),
                         "plus",
                         self.more_objects_to_trace.length())
-            estimate = self.gc_increment_step
-            estimate_from_nursery = self.nursery_surviving_size * 2
-            if estimate_from_nursery > estimate:
-                estimate = estimate_from_nursery
-            estimate = intmask(estimate)
+            estimate = self.marking_step_budget()
             remaining = self.visit_all_objects_step(estimate)
             #
             if remaining >= estimate // 2:
@@ -2328,6 +2724,8 @@ class IncrementalMiniMarkGC(MovingGCBase):
                 if self.old_objects_with_destructors.non_empty():
                     self.deal_with_old_objects_with_destructors()
                 # objects_to_trace processed fully, can move on to sweeping
+                self.stat_ac_arenas_count = self.ac.arenas_count
+                self.stat_rawmalloced_total_size = self.rawmalloced_total_size
                 self.ac.mass_free_prepare()
                 self.start_free_rawmalloc_objects()
                 #
@@ -2356,15 +2754,16 @@ class IncrementalMiniMarkGC(MovingGCBase):
                 # This limit is conservatively high enough to guarantee that
                 # a total object size of at least '3 * nursery_size' bytes
                 # is processed.
-                limit = 3 * self.nursery_size // self.small_request_threshold
+                limit = self.scale_step(
+                    3 * self.nursery_size // self.small_request_threshold)
                 self.free_unvisited_rawmalloc_objects_step(limit)
                 done = False    # the 2nd half below must still be done
             else:
                 # Ask the ArenaCollection to visit a fraction of the objects.
                 # Free the ones that have not been visited above, and reset
                 # GCFLAG_VISITED on the others.  Visit at most '3 *
-                # nursery_size' bytes.
-                limit = 3 * self.nursery_size // self.ac.page_size
+                # nursery_size' bytes, by default.
+                limit = self.sweeping_step_budget()
                 done = self.ac.mass_free_incremental(self._free_if_unvisited,
                                                      limit)
             # XXX tweak the limits above
@@ -2402,6 +2801,21 @@ class IncrementalMiniMarkGC(MovingGCBase):
                     raise MemoryError
 
                 self.gc_state = STATE_FINALIZING
+                if self.hooks.is_gc_collect_enabled():
+                    self.hooks.fire_gc_collect(
+                        num_major_collects=self.num_major_collects,
+                        arenas_count_before=self.stat_ac_arenas_count,
+                        arenas_count_after=self.ac.arenas_count,
+                        arenas_bytes=self.ac.total_memory_used,
+                        rawmalloc_bytes_before=self.stat_rawmalloced_total_size,
+                        rawmalloc_bytes_after=self.rawmalloced_total_size)
+                #
+                # Compact the arenas if they are too fragmented.  Compaction
+                # only helps if some arenas can be freed afterwards.
+                if (self.compact_threshold > 0.0 and
+                        self.ac.arenas_count > 1 and
+                        self.ac.get_fragmentation() > self.compact_threshold):
+                    self.compact_arenas()
             # FINALIZING not yet incrementalised
             # but it seems safe to allow mutator to run after sweeping and
             # before finalizers are called. This is because run_finalizers
@@ -2422,6 +2836,15 @@ class IncrementalMiniMarkGC(MovingGCBase):
 
         debug_print("stopping, now in gc state: ", GC_STATES[self.gc_state])
         debug_stop("gc-collect-step")
+        duration = 0.0
+        if timed:
+            duration = rtime.time() - start
+            self.total_major_time += duration
+        if self.hooks.is_gc_collect_step_enabled():
+            self.hooks.fire_gc_collect_step(
+                duration=duration,
+                oldstate=oldstate,
+                newstate=self.gc_state)
 
     def _sweep_old_objects_pointing_to_pinned(self, obj, new_list):
         if self.header(obj).tid & GCFLAG_VISITED:
@@ -2587,11 +3010,158 @@ class IncrementalMiniMarkGC(MovingGCBase):
         totalsize = size_gc_header + self.get_size(obj)
         return raw_malloc_usage(totalsize)
 
+    # ----------
+    # Compaction
+
+    def compact_arenas(self):
+        """Move the objects out of the sparsely used pages of the
+        ArenaCollection, and update all the references to them.  The
+        pages emptied in this way are freed, and so are the arenas that
+        become completely empty.  Must be called between two major
+        collections, when the nursery only contains pinned objects.
+        The objects with GCFLAG_NO_COMPACT are not moved.
+        """
+        ll_assert(self.gc_state == STATE_SCANNING or
+                  self.gc_state == STATE_FINALIZING,
+                  "compact_arenas() called during a major collection")
+        ll_assert(not self.old_objects_pointing_to_young.non_empty(),
+                  "compact_arenas() called with a non-empty nursery")
+        debug_start("gc-compact")
+        arenas_before = self.ac.arenas_count
+        #
+        # Copy the objects and leave a forwarding stub at their old
+        # location, like in the nursery during a minor collection.
+        self.compact_moved_objects = 0
+        npages = self.ac.compact(self.compact_max_fill, self._compact_move)
+        if self.compact_moved_objects > 0:
+            self._compact_update_references()
+            # Free the stubs, which frees the pages that only contained
+            # moved objects, and then the arenas that became empty.
+            self.ac.mass_free(self._compact_free_if_forwarded)
+        self.num_compactions += 1
+        #
+        debug_print("evacuated pages:", npages)
+        debug_print("moved objects:  ", self.compact_moved_objects)
+        debug_print("arenas before:  ", arenas_before)
+        debug_print("arenas after:   ", self.ac.arenas_count)
+        debug_stop("gc-compact")
+        self.debug_check_consistency()
+
+    def _compact_move(self, hdr):
+        size_gc_header = self.gcheaderbuilder.size_gc_header
+        obj = hdr + size_gc_header
+        if self.header(obj).tid & GCFLAG_NO_COMPACT:
+            return
+        totalsize = size_gc_header + self.get_size(obj)
+        if (raw_malloc_usage(totalsize) <
+                raw_malloc_usage(self.minimal_size_in_nursery)):
+            return     # no room for the forwarding address
+        newhdr = self.ac.malloc(totalsize)
+        llmemory.raw_memcopy(hdr, newhdr, totalsize)
+        #
+        # Set the old object's tid to -42 and replace its content with
+        # the target address, as done by _trace_drag_out().
+        llarena.arena_reset(hdr, totalsize, 0)
+        llarena.arena_reserve(hdr,
+                              size_gc_header + llmemory.sizeof(FORWARDSTUB))
+        self.header(obj).tid = -42
+        newobj = newhdr + size_gc_header
+        llmemory.cast_adr_to_ptr(obj, FORWARDSTUBPTR).forw = newobj
+        self.compact_moved_objects += 1
+
+    def _compact_is_forwarded(self, obj):
+        """Like is_forwarded(), but for an old object during compaction.
+        GCFLAG_FINALIZATION_ORDERING is never set outside the marking
+        phase, so finding it means that tid == -42.
+        """
+        tid = self.header(obj).tid
+        result = (tid & GCFLAG_FINALIZATION_ORDERING != 0)
+        if result:
+            ll_assert(tid == -42, "bogus header for compacted obj")
+        return result
+
+    def _compact_forwarding_address(self, obj):
+        # an object can move twice if its copy was allocated in a page
+        # that was evacuated afterwards
+        while self._compact_is_forwarded(obj):
+            obj = self.get_forwarding_address(obj)
+        return obj
+
+    def _compact_update_root(self, root):
+        obj = root.address[0]
+        if self._compact_is_forwarded(obj):
+            root.address[0] = self._compact_forwarding_address(obj)
+
+    def _compact_update_ref(self, root, ignored):
+        self._compact_update_root(root)
+
+    def _compact_update_obj(self, obj, ignored):
+        self.trace(obj, self._compact_update_ref, None)
+
+    def _compact_update_block(self, hdr):
+        obj = hdr + self.gcheaderbuilder.size_gc_header
+        if not self._compact_is_forwarded(obj):
+            self.trace(obj, self._compact_update_ref, None)
+
+    def _compact_update_stack(self, stack):
+        new = self.AddressStack()
+        while stack.non_empty():
+            new.append(self._compact_forwarding_address(stack.pop()))
+        stack.delete()
+        return new
+
+    def _compact_update_weakref(self, obj, ignored):
+        offset = self.weakpointer_offset(self.get_type_id(obj))
+        pointing_to = (obj + offset).address[0]
+        if pointing_to:
+            (obj + offset).address[0] = (
+                self._compact_forwarding_address(pointing_to))
+
+    def _compact_update_references(self):
+        # The roots.  Note that the pinned objects left in the nursery
+        # cannot contain GC pointers, so they don't need to be updated.
+        self.root_walker.walk_roots(
+            IncrementalMiniMarkGC._compact_update_root,  # stack roots
+            IncrementalMiniMarkGC._compact_update_root,  # static roots
+            None)
+        self.prebuilt_root_objects.foreach(self._compact_update_obj, None)
+        self.copy_pending_finalizers(self._compact_forwarding_address)
+        #
+        # All the other objects that can contain GC pointers.
+        self.ac.walk_all_blocks(self._compact_update_block)
+        self.old_rawmalloced_objects.foreach(self._compact_update_obj, None)
+        #
+        # The lists of old objects.
+        self.old_objects_with_destructors = self._compact_update_stack(
+            self.old_objects_with_destructors)
+        self.old_objects_pointing_to_pinned = self._compact_update_stack(
+            self.old_objects_pointing_to_pinned)
+        self.old_objects_with_weakrefs = self._compact_update_stack(
+            self.old_objects_with_weakrefs)
+        self.old_objects_with_weakrefs.foreach(
+            self._compact_update_weakref, None)
+        #
+        new_with_finalizers = self.AddressDeque()
+        while self.old_objects_with_finalizers.non_empty():
+            obj = self.old_objects_with_finalizers.popleft()
+            fq_nr = self.old_objects_with_finalizers.popleft()
+            new_with_finalizers.append(self._compact_forwarding_address(obj))
+            new_with_finalizers.append(fq_nr)
+        self.old_objects_with_finalizers.delete()
+        self.old_objects_with_finalizers = new_with_finalizers
+
+    def _compact_free_if_forwarded(self, hdr):
+        obj = hdr + self.gcheaderbuilder.size_gc_header
+        return self._compact_is_forwarded(obj)
+
     # ----------
     # id() and identityhash() support
 
     @specialize.arg(2)
     def _allocate_shadow(self, obj, copy=False):
+        # the address of the shadow is exposed: it must not be moved
+        # by compact_arenas().  The flag is copied to the shadow below.
+        self.header(obj).tid |= GCFLAG_NO_COMPACT
         size_gc_header = self.gcheaderbuilder.size_gc_header
         size = self.get_size(obj)
         shadowhdr = self._malloc_out_of_nursery(size_gc_header +
@@ -2646,6 +3216,8 @@ class IncrementalMiniMarkGC(MovingGCBase):
         if self.is_valid_gc_object(obj):
             if self.is_in_nursery(obj):
                 obj = self._find_shadow(obj)
+            else:
+                self.header(obj).tid |= GCFLAG_NO_COMPACT
         return llmemory.cast_adr_to_int(obj)
     id_or_identityhash._always_inline_ = True
 
@@ -2936,6 +3508,7 @@ class IncrementalMiniMarkGC(MovingGCBase):
     def rawrefcount_create_link_pypy(self, gcobj, pyobject):
         ll_assert(self.rrc_enabled, "rawrefcount.init not called")
         obj = llmemory.cast_ptr_to_adr(gcobj)
+        self.header(obj).tid |= GCFLAG_NO_COMPACT
         objint = llmemory.cast_adr_to_int(obj, "symbolic")
         self._pyobj(pyobject).ob_pypy_link = objint
         #
@@ -2952,6 +3525,7 @@ class IncrementalMiniMarkGC(MovingGCBase):
     def rawrefcount_create_link_pyobj(self, gcobj, pyobject):
         ll_assert(self.rrc_enabled, "rawrefcount.init not called")
         obj = llmemory.cast_ptr_to_adr(gcobj)
+        self.header(obj).tid |= GCFLAG_NO_COMPACT
         if self.is_young_object(obj):
             self.rrc_o_list_young.append(pyobject)
         else:
@@ -113,6 +113,15 @@ class ArenaCollection(object):
         for i in range(1, length):
             self.nblocks_for_size[i] = (page_size - self.hdrsize) // (WORD * i)
         #
+        # statistics: for each size class, the number of pages in use
+        # and the number of blocks allocated in them
+        self.pages_for_size = lltype.malloc(rffi.CArray(lltype.Signed),
+                                            length, flavor='raw', zero=True,
+                                            immortal=True)
+        self.used_blocks_for_size = lltype.malloc(rffi.CArray(lltype.Signed),
+                                                  length, flavor='raw',
+                                                  zero=True, immortal=True)
+        #
         self.max_pages_per_arena = arena_size // page_size
         self.arenas_lists = lltype.malloc(rffi.CArray(ARENA_PTR),
                                           self.max_pages_per_arena,
@@ -137,11 +146,46 @@ class ArenaCollection(object):
         # part of current_arena might still contain uninitialized pages
         self.num_uninitialized_pages = 0
         #
+        # the number of arenas currently allocated, and the total
+        # number of pages in them
+        self.arenas_count = 0
+        self.total_arena_pages = 0
+        #
+        # the arenas that became completely empty are not freed at once
+        # if 'max_retained_arenas' > 0: up to this number of them are kept
+        # in 'retained_arenas' for reuse.  At the end of every major
+        # collection, the arenas that were not reused since the previous
+        # one are moved to 'old_retained_arenas', and the ones that were
+        # already there are freed.  See set_arena_retain().
+        self.max_retained_arenas = 0
+        self.num_retained_arenas = 0
+        self.retained_arenas = ARENA_NULL
+        self.old_retained_arenas = ARENA_NULL
+        #
+        # the total size of the arenas returned to the OS so far
+        self.arena_bytes_released = 0
+        #
         # the total memory used, counting every block in use, without
         # the additional bookkeeping stuff.
         self.total_memory_used = r_uint(0)
 
 
+    def set_arena_retain(self, nbytes):
+        """Keep up to 'nbytes' of completely empty arenas for reuse,
+        instead of returning them to the OS immediately."""
+        self.max_retained_arenas = nbytes // self.arena_size
+
+
+    def count_pages_used(self):
+        """Return the number of pages currently holding objects."""
+        total = 0
+        size_class = self.small_request_threshold >> WORD_POWER_2
+        while size_class >= 1:
+            total += self.pages_for_size[size_class]
+            size_class -= 1
+        return total
+
+
     def _new_page_ptr_list(self, length):
         return lltype.malloc(rffi.CArray(PAGE_PTR), length,
                              flavor='raw', zero=True,
@@ -158,6 +202,7 @@ class ArenaCollection(object):
         #
         # Get the page to use from the size
         size_class = nsize >> WORD_POWER_2
+        self.used_blocks_for_size[size_class] += 1
         page = self.page_for_size[size_class]
         if page == PAGE_NULL:
             page = self.allocate_new_page(size_class)
@@ -240,6 +285,7 @@ class ArenaCollection(object):
         ll_assert(self.page_for_size[size_class] == PAGE_NULL,
                   "allocate_new_page() called but a page is already waiting")
         self.page_for_size[size_class] = page
+        self.pages_for_size[size_class] += 1
         return page
 
 
@@ -285,7 +331,12 @@ class ArenaCollection(object):
         if self._pick_next_arena():
             return
         #
-        # No more arena with any free page.  We must allocate a new arena.
+        # No more arena with any free page.  Reuse an empty arena, if
+        # we kept one.
+        if self._pick_retained_arena():
+            return
+        #
+        # We must allocate a new arena.
         if not we_are_translated():
             for a in self._all_arenas():
                 assert a.nfreepages == 0
@@ -311,10 +362,58 @@ class ArenaCollection(object):
         arena.freepages = firstpage
         self.num_uninitialized_pages = npages
         self.current_arena = arena
+        self.arenas_count += 1
+        self.total_arena_pages += npages
         #
     allocate_new_arena._dont_inline_ = True
 
 
+    def _pick_retained_arena(self):
+        arena = self.retained_arenas
+        if arena != ARENA_NULL:
+            self.retained_arenas = arena.nextarena
+        else:
+            arena = self.old_retained_arenas
+            if arena == ARENA_NULL:
+                return False
+            self.old_retained_arenas = arena.nextarena
+        self.num_retained_arenas -= 1
+        arena.nextarena = ARENA_NULL
+        self.current_arena = arena
+        return True
+
+
+    def _retain_or_free_arena(self, arena):
+        if self.num_retained_arenas < self.max_retained_arenas:
+            arena.nextarena = self.retained_arenas
+            self.retained_arenas = arena
+            self.num_retained_arenas += 1
+        else:
+            self._free_arena(arena)
+
+
+    def _free_arena(self, arena):
+        self.total_arena_pages -= arena.totalpages
+        llarena.arena_reset(arena.base, self.arena_size, 4)   # madvise
+        llarena.arena_free(arena.base)
+        lltype.free(arena, flavor='raw', track_allocation=False)
+        self.arenas_count -= 1
+        self.arena_bytes_released += self.arena_size
+
+
+    def _age_retained_arenas(self):
+        # Free the arenas that stayed unused for a whole major collection,
+        # and start aging the ones that were retained since the previous one.
+        arena = self.old_retained_arenas
+        while arena != ARENA_NULL:
+            nextarena = arena.nextarena
+            self._free_arena(arena)
+            self.num_retained_arenas -= 1
+            arena = nextarena
+        self.old_retained_arenas = self.retained_arenas
+        self.retained_arenas = ARENA_NULL
+
+
     def mass_free_prepare(self):
         """Prepare calls to mass_free_incremental(): moves the chained lists
         into 'self.old_xxx'.
@@ -358,10 +457,12 @@ class ArenaCollection(object):
             size_class -= 1
         #
         if size_class >= 0:
+            self._age_retained_arenas()
             self._rehash_arenas_lists()
             self.size_class_with_old_pages = -1
         #
         return True
+    mass_free_incremental._annspecialcase_ = 'specialize:arg(1)'
 
 
     def mass_free(self, ok_to_free_func):
@@ -372,6 +473,7 @@ class ArenaCollection(object):
         #
         res = self.mass_free_incremental(ok_to_free_func, sys.maxint)
         ll_assert(res, "non-incremental mass_free_in_pages() returned False")
+    mass_free._annspecialcase_ = 'specialize:arg(1)'
 
 
     def _rehash_arenas_lists(self):
@@ -394,10 +496,9 @@ class ArenaCollection(object):
                 #
                 if arena.nfreepages == arena.totalpages:
                     #
-                    # The whole arena is empty.  Free it.
-                    llarena.arena_reset(arena.base, self.arena_size, 4)
-                    llarena.arena_free(arena.base)
-                    lltype.free(arena, flavor='raw', track_allocation=False)
+                    # The whole arena is empty.  Free it, or keep it for
+                    # reuse if we are below the retention watermark.
+                    self._retain_or_free_arena(arena)
                     #
                 else:
                     # Insert 'arena' in the correct arenas_lists[n]
@@ -453,6 +554,7 @@ class ArenaCollection(object):
                 else:
                     # No object survives; free the page.
                     self.free_page(page)
+                    self.pages_for_size[size_class] -= 1
 
                 #
                 max_pages -= 1
@@ -474,6 +576,7 @@ class ArenaCollection(object):
         self.page_for_size[size_class] = remaining_partial_pages
         self.full_page_for_size[size_class] = remaining_full_pages
         return max_pages
+    mass_free_in_pages._annspecialcase_ = 'specialize:arg(2)'
 
 
     def free_page(self, page):
@@ -505,6 +608,7 @@ class ArenaCollection(object):
         obj = llarena.getfakearenaaddress(llmemory.cast_ptr_to_adr(page))
         obj += self.hdrsize
         surviving = 0    # initially
+        freed = 0
         skip_free_blocks = page.nfree
         #
         while True:
@@ -542,6 +646,7 @@ class ArenaCollection(object):
                     #
                     # Update the number of free objects in the page.
                     page.nfree += 1
+                    freed += 1
                     #
                 else:
                     # The object survives.
@@ -551,9 +656,148 @@ class ArenaCollection(object):
         #
         # Update the global total size of objects.
         self.total_memory_used += r_uint(surviving * block_size)
+        self.used_blocks_for_size[block_size >> WORD_POWER_2] -= freed
         #
         # Return the number of surviving objects.
         return surviving
+    walk_page._annspecialcase_ = 'specialize:arg(3)'
+
+
+    # ----------
+    # Compaction support
+
+    def get_fragmentation(self):
+        """Return the fraction of the blocks in the pages in use which
+        are free, between 0.0 and 1.0."""
+        used = 0
+        total = 0
+        size_class = self.small_request_threshold >> WORD_POWER_2
+        while size_class >= 1:
+            used += self.used_blocks_for_size[size_class]
+            total += (self.pages_for_size[size_class] *
+                      self.nblocks_for_size[size_class])
+            size_class -= 1
+        if total == 0:
+            return 0.0
+        return 1.0 - float(used) / float(total)
+
+
+    def compact(self, max_fill, move_func):
+        """Try to empty the non-full pages in which at most a fraction
+        'max_fill' of the blocks are in use.  For each block in these
+        pages, move_func(block) is called: it can copy the object
+        elsewhere with malloc(), or leave it there if it cannot move.
+        The blocks are not freed here: this is left to the next
+        mass_free().  Returns the number of pages that were evacuated.
+        """
+        ll_assert(self.size_class_with_old_pages < 0,
+                  "compact() called during mass_free_incremental()")
+        npages = 0
+        size_class = self.small_request_threshold >> WORD_POWER_2
+        while size_class >= 1:
+            #
+            # It is pointless to empty a page if it is the only non-full
+            # page of its size class: its objects would just move to a
+            # new page.
+            page = self.page_for_size[size_class]
+            if page != PAGE_NULL and page.nextpage != PAGE_NULL:
+                npages += self._compact_size_class(size_class, max_fill,
+                                                   move_func)
+            size_class -= 1
+        return npages
+    compact._annspecialcase_ = 'specialize:arg(2)'
+
+
+    def _compact_size_class(self, size_class, max_fill, move_func):
+        block_size = size_class * WORD
+        max_used = int(self.nblocks_for_size[size_class] * max_fill)
+        #
+        # Split the chained list of non-full pages in two: the pages to
+        # evacuate, and the other ones.  The latter remain in
+        # 'page_for_size', so that malloc() will allocate the copies
+        # there or in new pages, but never in the pages to evacuate.
+        evacuate = PAGE_NULL
+        remaining = PAGE_NULL
+        page = self.page_for_size[size_class]
+        while page != PAGE_NULL:
+            nextpage = page.nextpage
+            if self._count_used_blocks(page, block_size) <= max_used:
+                page.nextpage = evacuate
+                evacuate = page
+            else:
+                page.nextpage = remaining
+                remaining = page
+            page = nextpage
+        self.page_for_size[size_class] = remaining
+        #
+        npages = 0
+        lastpage = PAGE_NULL
+        page = evacuate
+        while page != PAGE_NULL:
+            self._walk_page_blocks(page, block_size, move_func)
+            npages += 1
+            lastpage = page
+            page = page.nextpage
+        #
+        # Put the evacuated pages back in the chained list.  They are
+        # still considered in use until the next mass_free().
+        if lastpage != PAGE_NULL:
+            lastpage.nextpage = self.page_for_size[size_class]
+            self.page_for_size[size_class] = evacuate
+        return npages
+    _compact_size_class._annspecialcase_ = 'specialize:arg(3)'
+
+
+    def walk_all_blocks(self, callback):
+        """Call callback(block) for each block in use in all the pages."""
+        ll_assert(self.size_class_with_old_pages < 0,
+                  "walk_all_blocks() called during mass_free_incremental()")
+        size_class = self.small_request_threshold >> WORD_POWER_2
+        while size_class >= 1:
+            block_size = size_class * WORD
+            page = self.full_page_for_size[size_class]
+            while page != PAGE_NULL:
+                self._walk_page_blocks(page, block_size, callback)
+                page = page.nextpage
+            page = self.page_for_size[size_class]
+            while page != PAGE_NULL:
+                self._walk_page_blocks(page, block_size, callback)
+                page = page.nextpage
+            size_class -= 1
+    walk_all_blocks._annspecialcase_ = 'specialize:arg(1)'
+
+
+    def _walk_page_blocks(self, page, block_size, callback):
+        # Like walk_page(), but read-only: 'callback' must not free the
+        # blocks, nor allocate new ones in the same page.
+        freeblock = page.freeblock
+        skip_free_blocks = page.nfree
+        obj = llarena.getfakearenaaddress(llmemory.cast_ptr_to_adr(page))
+        obj += self.hdrsize
+        while True:
+            if obj == freeblock:
+                if skip_free_blocks == 0:
+                    break     # first uninitialized block, or end of page
+                skip_free_blocks -= 1
+                freeblock = obj.address[0]
+            else:
+                callback(obj)
+            obj += block_size
+    _walk_page_blocks._annspecialcase_ = 'specialize:arg(3)'
+
+
+    def _count_used_blocks(self, page, block_size):
+        # Follow the chained list of free blocks to find the first
+        # uninitialized block; all blocks before it are in use, except
+        # the free ones.
+        freeblock = page.freeblock
+        i = page.nfree
+        while i > 0:
+            freeblock = freeblock.address[0]
+            i -= 1
+        pageaddr = llarena.getfakearenaaddress(llmemory.cast_ptr_to_adr(page))
+        ninitialized = (freeblock - (pageaddr + self.hdrsize)) // block_size
+        return ninitialized - page.nfree
 
 
     def _nuninitialized(self, page, size_class):
@@ -20,6 +20,12 @@ class SimpleArenaCollection(object):
         self.small_request_threshold = small_request_threshold
         self.all_objects = []
         self.total_memory_used = 0
+        self.arenas_count = 0
+        self.num_retained_arenas = 0
+        self.arena_bytes_released = 0
+
+    def set_arena_retain(self, nbytes):
+        pass
 
     def malloc(self, size):
         nsize = raw_malloc_usage(size)
@@ -56,3 +62,17 @@ class SimpleArenaCollection(object):
         self.mass_free_prepare()
         res = self.mass_free_incremental(ok_to_free_func, sys.maxint)
         assert res
+
+    def get_fragmentation(self):
+        return 0.0
+
+    def compact(self, max_fill, move_func):
+        # every object is alone in its "page": try to move all of them
+        objects = self.all_objects[:]
+        for rawobj, nsize in objects:
+            move_func(rawobj)
+        return len(objects)
+
+    def walk_all_blocks(self, callback):
+        for rawobj, nsize in self.all_objects[:]:
+            callback(rawobj)
@@ -748,3 +748,119 @@ class TestIncrementalMiniMarkGCFull(DirectGCTest):
                 assert elem.next == lltype.nullptr(S)
 
             
+
+    def test_compact_arenas(self):
+        for i in range(60):
+            p = self.malloc(S)
+            p.x = i
+            self.stackroots.append(p)
+        self.gc.collect()
+        # keep only one object out of three alive, and chain them
+        del self.stackroots[1::3]
+        del self.stackroots[1::2]
+        assert [p.x for p in self.stackroots] == range(0, 60, 3)
+        for i in range(len(self.stackroots) - 1):
+            self.write(self.stackroots[i], 'next', self.stackroots[i + 1])
+        self.gc.collect()
+        pages_before = self.gc.ac.count_pages_used()
+        arenas_before = self.gc.ac.arenas_count
+        #
+        self.gc.collect(3)
+        assert self.gc.num_compactions == 1
+        assert self.gc.compact_moved_objects > 0
+        assert self.gc.ac.count_pages_used() < pages_before
+        assert self.gc.ac.arenas_count < arenas_before
+        for i, p in enumerate(self.stackroots):
+            assert p.x == i * 3
+            if i < len(self.stackroots) - 1:
+                assert p.next == self.stackroots[i + 1]
+        self.gc.debug_check_consistency()
+
+    def test_compact_does_not_move_exposed_objects(self):
+        for i in range(30):
+            p = self.malloc(S)
+            p.x = i
+            self.stackroots.append(p)
+        self.gc.collect()
+        del self.stackroots[1::2]
+        del self.stackroots[1::2]
+        self.gc.collect()
+        hashes = [self.gc.identityhash(p) for p in self.stackroots]
+        addresses = [llmemory.cast_ptr_to_adr(p) for p in self.stackroots]
+        self.gc.collect(3)
+        assert self.gc.compact_moved_objects == 0
+        assert [llmemory.cast_ptr_to_adr(p)
+                for p in self.stackroots] == addresses
+        assert [self.gc.identityhash(p) for p in self.stackroots] == hashes
+
+    def test_adaptive_nursery_size(self):
+        assert self.gc.nursery_min_size == 32*WORD
+        # nothing survives: the nursery grows up to its maximum size
+        for i in range(200):
+            self.malloc(S)
+        assert self.gc.nursery_size == 128*WORD
+        assert self.gc.num_nursery_resizes == 2
+        # everything survives: it shrinks back to its initial size
+        for i in range(200):
+            self.stackroots.append(self.malloc(S))
+        assert self.gc.nursery_size == 32*WORD
+        assert self.gc.num_nursery_resizes == 4
+        assert self.gc.nursery_top - self.gc.nursery <= 32*WORD
+    test_adaptive_nursery_size.GC_PARAMS = {'nursery_max_size': 128*WORD}
+
+    def test_adaptive_nursery_size_not_full(self):
+        # minor collections that are not caused by a full nursery, like
+        # the ones of external_malloc(), don't count
+        self.malloc(S)
+        for i in range(10):
+            self.gc.minor_collection_with_major_progress()
+        assert self.gc.nursery_survival_rate == 0.0
+        assert self.gc.nursery_size == 32*WORD
+        assert self.gc.num_nursery_resizes == 0
+    test_adaptive_nursery_size_not_full.GC_PARAMS = {
+        'nursery_max_size': 128*WORD}
+
+    def test_max_pause_heap_bounded(self):
+        # with a pause target that can never be met, the major collection
+        # steps do very little work, but the GC must still keep up with
+        # the objects that survive the minor collections
+        self.gc.max_pause = 0.000000000001
+        for i in range(20):
+            self.stackroots.append(self.malloc(S))
+        peaks = []
+        for i in range(1600):
+            if i % 400 == 0:
+                peaks.append(0)
+            self.stackroots[i % 20] = self.malloc(S)
+            peaks[-1] = max(peaks[-1], self.gc.get_total_memory_used())
+        assert self.gc.pause_step_factor == incminimark.MIN_PAUSE_STEP_FACTOR
+        assert self.gc.num_major_collects > 0
+        assert max(peaks) <= peaks[0] * 1.5
+
+    def test_collect_step_stages(self):
+        p = self.malloc(S)
+        p.x = 42
+        self.stackroots.append(p)
+        for i in range(50):
+            self.malloc(S)
+        self.gc.collect()
+        memory_used = self.gc.get_total_memory_used()
+        for i in range(50):
+            self.stackroots.append(self.malloc(S))
+        self.gc.collect()
+        assert self.gc.get_total_memory_used() > memory_used
+        del self.stackroots[1:]
+        #
+        assert self.gc.gc_state == incminimark.STATE_SCANNING
+        states = []
+        while not self.gc.collect_step():
+            states.append(self.gc.gc_state)
+            assert len(states) < 1000
+        assert self.gc.gc_state == incminimark.STATE_SCANNING
+        # the steps went through the stages in order
+        assert states[0] == incminimark.STATE_MARKING
+        assert incminimark.STATE_SWEEPING in states
+        assert states == sorted(states)
+        # the cycle freed the 50 objects dropped before it started
+        assert self.gc.get_total_memory_used() <= memory_used
+        assert self.stackroots[0].x == 42
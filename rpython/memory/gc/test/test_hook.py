@@ -0,0 +1,213 @@
+from rpython.rtyper.lltypesystem import llmemory
+from rpython.rlib import rgc
+from rpython.memory.gc.incminimark import WORD
+from rpython.memory.gc.hook import GcHooks
+from rpython.memory.gc.test.test_direct import BaseDirectGCTest, S
+from rpython.memory.gc import incminimark as m
+
+
+class MyGcHooks(GcHooks):
+
+    def __init__(self):
+        self.gc_minor_enabled = False
+        self.gc_collect_step_enabled = False
+        self.gc_collect_enabled = False
+        self.gc_alloc_sample_enabled = False
+        self.reset()
+
+    def reset(self):
+        self.minors = []
+        self.steps = []
+        self.collects = []
+        self.alloc_samples = []
+        self.durations = []
+
+    def is_gc_minor_enabled(self):
+        return self.gc_minor_enabled
+
+    def is_gc_collect_step_enabled(self):
+        return self.gc_collect_step_enabled
+
+    def is_gc_collect_enabled(self):
+        return self.gc_collect_enabled
+
+    def is_gc_alloc_sample_enabled(self):
+        return self.gc_alloc_sample_enabled
+
+    def on_gc_minor(self, duration, total_memory_used, pinned_objects,
+                    surviving_size):
+        self.durations.append(duration)
+        self.minors.append({
+            'total_memory_used': total_memory_used,
+            'pinned_objects': pinned_objects,
+            'surviving_size': surviving_size})
+
+    def on_gc_collect_step(self, duration, oldstate, newstate):
+        self.durations.append(duration)
+        self.steps.append({
+            'oldstate': oldstate,
+            'newstate': newstate})
+
+    def on_gc_collect(self, num_major_collects,
+                      arenas_count_before, arenas_count_after,
+                      arenas_bytes, rawmalloc_bytes_before,
+                      rawmalloc_bytes_after):
+        self.collects.append({
+            'num_major_collects': num_major_collects,
+            'arenas_count_before': arenas_count_before,
+            'arenas_count_after': arenas_count_after,
+            'arenas_bytes': arenas_bytes,
+            'rawmalloc_bytes_before': rawmalloc_bytes_before,
+            'rawmalloc_bytes_after': rawmalloc_bytes_after})
+
+    def on_gc_alloc_sample(self, size):
+        self.alloc_samples.append(size)
+
+
+class TestIncMiniMarkHooks(BaseDirectGCTest):
+    from rpython.memory.gc.incminimark import IncrementalMiniMarkGC as GCClass
+
+    def setup_method(self, meth):
+        self.GC_PARAMS = {'hooks': MyGcHooks()}
+        BaseDirectGCTest.setup_method(self, meth)
+        size = llmemory.sizeof(S) + self.gc.gcheaderbuilder.size_gc_header
+        self.size_of_S = llmemory.raw_malloc_usage(size)
+
+    def test_on_gc_minor(self):
+        self.gc.hooks.gc_minor_enabled = True
+        self.malloc(S)
+        self.gc._minor_collection()
+        assert self.gc.hooks.minors == [
+            {'total_memory_used': 0,
+             'pinned_objects': 0,
+             'surviving_size': 0}
+            ]
+        assert self.gc.hooks.durations[0] >= 0.
+        self.gc.hooks.reset()
+        #
+        # these objects survive, so the total_memory_used is > 0
+        self.stackroots.append(self.malloc(S))
+        self.stackroots.append(self.malloc(S))
+        self.gc._minor_collection()
+        assert self.gc.hooks.minors == [
+            {'total_memory_used': self.size_of_S*2,
+             'pinned_objects': 0,
+             'surviving_size': self.size_of_S*2}
+            ]
+
+    def test_on_gc_collect(self):
+        self.gc.hooks.gc_collect_step_enabled = True
+        self.gc.hooks.gc_collect_enabled = True
+        self.malloc(S)
+        self.gc.collect()
+        assert self.gc.hooks.steps == [
+            {'oldstate': m.STATE_SCANNING, 'newstate': m.STATE_MARKING},
+            {'oldstate': m.STATE_MARKING, 'newstate': m.STATE_SWEEPING},
+            {'oldstate': m.STATE_SWEEPING, 'newstate': m.STATE_FINALIZING},
+            {'oldstate': m.STATE_FINALIZING, 'newstate': m.STATE_SCANNING}
+        ]
+        assert len(self.gc.hooks.durations) == 4 # 4 steps
+        for d in self.gc.hooks.durations:
+            assert d >= 0.0
+        assert self.gc.hooks.collects == [
+            {'num_major_collects': 1,
+             'arenas_count_before': 0,
+             'arenas_count_after': 0,
+             'arenas_bytes': 0,
+             'rawmalloc_bytes_after': 0,
+             'rawmalloc_bytes_before': 0}
+            ]
+        self.gc.hooks.reset()
+        #
+        self.stackroots.append(self.malloc(S))
+        self.gc.collect()
+        assert self.gc.hooks.collects == [
+            {'num_major_collects': 2,
+             'arenas_count_before': 1,
+             'arenas_count_after': 1,
+             'arenas_bytes': self.size_of_S,
+             'rawmalloc_bytes_after': 0,
+             'rawmalloc_bytes_before': 0}
+            ]
+
+    def test_on_gc_alloc_sample(self):
+        self.gc.hooks.gc_alloc_sample_enabled = True
+        self.gc.set_alloc_sample_period(10 * self.size_of_S)
+        for i in range(35):
+            self.malloc(S)
+        # the 11th, 22nd and 33rd objects are past a sample point
+        assert self.gc.hooks.alloc_samples == [self.size_of_S] * 3
+        #
+        # sampling continues across minor collections
+        self.gc.hooks.reset()
+        self.gc._minor_collection()
+        for i in range(20):
+            self.malloc(S)
+        self.gc.collect(0)
+        for i in range(15):
+            self.malloc(S)
+        assert self.gc.hooks.alloc_samples == [self.size_of_S] * 3
+        #
+        self.gc.hooks.reset()
+        self.gc.set_alloc_sample_period(0)
+        assert self.gc.nursery_top == self.gc.nursery + self.gc.nursery_size
+        for i in range(35):
+            self.malloc(S)
+        assert self.gc.hooks.alloc_samples == []
+
+    def test_on_gc_alloc_sample_after_minor_collection(self):
+        # a minor collection not caused by a full nursery, e.g. from
+        # external_malloc(), keeps the next sample point
+        self.gc.set_alloc_sample_period(5 * self.size_of_S)
+        for i in range(3):
+            self.malloc(S)
+        self.gc.minor_collection_with_major_progress()
+        assert self.gc.nursery_top == (self.gc.nursery +
+                                       2 * self.size_of_S)
+
+    def test_on_gc_alloc_sample_adaptive_nursery(self):
+        self.gc.hooks.gc_alloc_sample_enabled = True
+        self.gc.set_alloc_sample_period(10 * self.size_of_S)
+        for i in range(205):
+            self.malloc(S)
+        # the nursery was resized, and there was still a sample every
+        # 11 objects
+        assert self.gc.num_nursery_resizes > 0
+        assert self.gc.hooks.alloc_samples == [self.size_of_S] * 18
+    test_on_gc_alloc_sample_adaptive_nursery.GC_PARAMS = {
+        'nursery_max_size': 256 * WORD}
+
+    def test_hook_disabled(self):
+        self.gc._minor_collection()
+        self.gc.collect()
+        assert self.gc.hooks.minors == []
+        assert self.gc.hooks.steps == []
+        assert self.gc.hooks.collects == []
+
+    def test_collections_not_timed(self, monkeypatch):
+        clock = []
+        def fake_time():
+            clock.append(None)
+            return float(len(clock))
+        monkeypatch.setattr(m.rtime, 'time', fake_time)
+        self.gc._minor_collection()
+        self.gc.collect()
+        assert clock == []
+        assert self.gc.total_minor_time == self.gc.total_major_time == 0.0
+        #
+        # the hooks get the durations
+        self.gc.hooks.gc_minor_enabled = True
+        self.gc.hooks.gc_collect_step_enabled = True
+        self.gc._minor_collection()
+        self.gc.major_collection_step()
+        assert self.gc.hooks.durations == [1.0, 1.0]
+        self.gc.hooks.gc_minor_enabled = False
+        self.gc.hooks.gc_collect_step_enabled = False
+        #
+        # and get_stats() starts timing when the times are asked for
+        self.gc.get_stats(rgc.TOTAL_MINOR_TIME)
+        del clock[:]
+        total_minor_time = self.gc.total_minor_time
+        self.gc._minor_collection()
+        assert len(clock) == 2
+        assert self.gc.total_minor_time == total_minor_time + 1.0
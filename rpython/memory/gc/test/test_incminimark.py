@@ -1,4 +1,5 @@
 from rpython.rtyper.lltypesystem import llmemory
+from rpython.memory.gc import incminimark
 from rpython.memory.gc.incminimark import IncrementalMiniMarkGC
 from rpython.rlib.rarithmetic import LONG_BIT
 
@@ -68,3 +69,34 @@ def test_set_major_threshold():
     b = gc.set_major_threshold_from(42.7)
     assert b is False
     assert gc.next_major_collection_threshold == 100.0
+
+def test_adapt_step_factor():
+    gc = IncrementalMiniMarkGC(None)
+    assert gc.scale_step(1000) == 1000      # soft real-time mode disabled
+    gc.max_pause = 0.002
+    assert gc.scale_step(1000) == 1000
+    # a pause of twice the target halves the work done in the next steps
+    gc.adapt_step_factor(0.004)
+    assert gc.pause_step_factor == 0.5
+    assert gc.scale_step(1000) == 500
+    assert gc.last_pause == gc.longest_pause == 0.004
+    # a very long pause divides it by at most 4 at once
+    gc.adapt_step_factor(1.0)
+    assert gc.pause_step_factor == 0.125
+    assert gc.longest_pause == 1.0
+    # a pause close to the target doesn't change anything
+    gc.adapt_step_factor(0.0015)
+    assert gc.pause_step_factor == 0.125
+    assert gc.last_pause == 0.0015
+    assert gc.longest_pause == 1.0
+    # short pauses slowly increase the factor again, up to 1.0
+    gc.adapt_step_factor(0.0001)
+    assert gc.pause_step_factor == 0.125 * 1.25
+    for i in range(20):
+        gc.adapt_step_factor(0.0001)
+    assert gc.pause_step_factor == 1.0
+    # there is a lower bound, and we always do at least a bit of work
+    for i in range(20):
+        gc.adapt_step_factor(1.0)
+    assert gc.pause_step_factor == incminimark.MIN_PAUSE_STEP_FACTOR
+    assert gc.scale_step(10) == 1
@@ -477,3 +477,96 @@ def test_random(incremental=False):
 
 def test_random_incremental():
     test_random(incremental=True)
+
+def test_size_class_stats():
+    pagesize = hdrsize + 8*WORD
+    ac = ArenaCollection(SHIFT + pagesize*3, pagesize, 4*WORD)
+    assert ac.count_pages_used() == 0
+    objs = [ac.malloc(2*WORD) for i in range(5)]
+    obj3 = ac.malloc(3*WORD)
+    assert ac.pages_for_size[2] == 2      # 4 blocks per page
+    assert ac.used_blocks_for_size[2] == 5
+    assert ac.pages_for_size[3] == 1
+    assert ac.used_blocks_for_size[3] == 1
+    assert ac.count_pages_used() == 3
+    assert ac.total_arena_pages == 3
+    assert ac.arenas_count == 1
+    #
+    # free all the objects of size 2 except the first one
+    keep = (objs[0].arena, objs[0].offset)
+    def ok_to_free(obj):
+        if obj.arena is obj3.arena and obj.offset == obj3.offset:
+            return False
+        return (obj.arena, obj.offset) != keep
+    ac.mass_free(ok_to_free)
+    assert ac.pages_for_size[2] == 1
+    assert ac.used_blocks_for_size[2] == 1
+    assert ac.pages_for_size[3] == 1
+    assert ac.used_blocks_for_size[3] == 1
+    assert ac.count_pages_used() == 2
+
+def test_compact():
+    pagesize = hdrsize + 8*WORD
+    ac = ArenaCollection(SHIFT + pagesize*8, pagesize, 4*WORD)
+    objs = [ac.malloc(2*WORD) for i in range(12)]      # 3 pages
+    assert ac.pages_for_size[2] == 3
+    # keep objs 0, 4, 8, 9 and 10: the first two pages become sparse
+    keep = [(objs[i].arena, objs[i].offset) for i in (0, 4, 8, 9, 10)]
+    ac.mass_free(lambda obj: (obj.arena, obj.offset) not in keep)
+    assert ac.used_blocks_for_size[2] == 5
+    assert ac.get_fragmentation() == 1.0 - 5.0 / 12.0
+    #
+    moved = {}
+    def move(obj):
+        newobj = ac.malloc(2*WORD)
+        moved[(obj.arena, obj.offset)] = newobj
+    npages = ac.compact(0.5, move)
+    assert npages == 2
+    assert sorted(moved) == sorted(keep[:2])
+    # the copies went into the free block of the third page, and
+    # into a new page
+    newoffsets = sorted([newobj.offset for newobj in moved.values()])
+    assert newoffsets[0] == objs[11].offset
+    assert newoffsets[1] > objs[11].offset
+    #
+    seen = []
+    ac.walk_all_blocks(lambda obj: seen.append((obj.arena, obj.offset)))
+    assert len(seen) == 7
+    ac.mass_free(lambda obj: (obj.arena, obj.offset) in moved)
+    assert ac.pages_for_size[2] == 2
+    assert ac.used_blocks_for_size[2] == 5
+    assert ac.count_pages_used() == 2
+
+def test_arena_retain():
+    pagesize = hdrsize + 4*WORD
+    arenasize = SHIFT + pagesize*2
+    ac = ArenaCollection(arenasize, pagesize, 4*WORD)
+    ac.set_arena_retain(arenasize)
+    objs = [ac.malloc(4*WORD) for i in range(6)]       # 3 full arenas
+    assert ac.arenas_count == 3
+    assert not ac.current_arena
+    ac.mass_free(lambda obj: True)
+    # one empty arena is kept, the other two are freed
+    assert ac.arenas_count == 1
+    assert ac.num_retained_arenas == 1
+    assert ac.arena_bytes_released == 2 * arenasize
+    retained = ac.retained_arenas
+    #
+    # the retained arena is reused before allocating a new one
+    obj = ac.malloc(4*WORD)
+    assert ac.current_arena == retained
+    assert ac.arenas_count == 1
+    assert ac.num_retained_arenas == 0
+    obj = ac.malloc(4*WORD)
+    ac.mass_free(lambda obj: True)
+    assert ac.num_retained_arenas == 1
+    #
+    # if it is not reused, it is freed at the end of the next major
+    # collection but one
+    ac.mass_free(lambda obj: True)
+    assert ac.num_retained_arenas == 1
+    assert ac.arenas_count == 1
+    ac.mass_free(lambda obj: True)
+    assert ac.num_retained_arenas == 0
+    assert ac.arenas_count == 0
+    assert ac.arena_bytes_released == 3 * arenasize
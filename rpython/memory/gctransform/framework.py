@@ -116,7 +116,7 @@ def find_clean_setarrayitems(collect_analyzer, graph):
 class BaseFrameworkGCTransformer(GCTransformer):
     root_stack_depth = None    # for tests to override
 
-    def __init__(self, translator):
+    def __init__(self, translator, gchooks=None):
         from rpython.memory.gc.base import choose_gc_from_config
 
         super(BaseFrameworkGCTransformer, self).__init__(translator,
@@ -162,7 +162,8 @@ class BaseFrameworkGCTransformer(GCTransformer):
         self.finalizer_queue_indexes = {}
         self.finalizer_handlers = []
 
-        gcdata.gc = GCClass(translator.config.translation, **GC_PARAMS)
+        gcdata.gc = GCClass(translator.config.translation, hooks=gchooks,
+                            **GC_PARAMS)
         root_walker = self.build_root_walker()
         root_walker.finished_minor_collection_func = finished_minor_collection
         self.root_walker = root_walker
@@ -308,6 +309,8 @@ class BaseFrameworkGCTransformer(GCTransformer):
 
         self.collect_ptr = getfn(GCClass.collect.im_func,
             [s_gc, annmodel.SomeInteger()], annmodel.s_None)
+        self.collect_step_ptr = getfn(GCClass.collect_step.im_func, [s_gc],
+                                      annmodel.SomeBool())
         self.can_move_ptr = getfn(GCClass.can_move.im_func,
                                   [s_gc, SomeAddress()],
                                   annmodel.SomeBool())
@@ -464,6 +467,16 @@ class BaseFrameworkGCTransformer(GCTransformer):
                                            [s_gc,
                                             annmodel.SomeInteger(nonneg=True)],
                                            annmodel.s_None)
+        self.get_stats_ptr = getfn(GCClass.get_stats.im_func,
+                                   [s_gc, annmodel.SomeInteger()],
+                                   annmodel.SomeInteger())
+        self.get_size_class_stats_ptr = getfn(
+            GCClass.get_size_class_stats.im_func,
+            [s_gc, annmodel.SomeInteger(), annmodel.SomeInteger()],
+            annmodel.SomeInteger())
+        self.set_alloc_sample_period_ptr = getfn(
+            GCClass.set_alloc_sample_period.im_func,
+            [s_gc, annmodel.SomeInteger()], annmodel.s_None)
 
         if hasattr(GCClass, 'rawrefcount_init'):
             self.rawrefcount_init_ptr = getfn(
@@ -840,6 +853,13 @@ class BaseFrameworkGCTransformer(GCTransformer):
                   resultvar=op.result)
         self.pop_roots(hop, livevars)
 
+    def gct_gc__collect_step(self, hop):
+        op = hop.spaceop
+        livevars = self.push_roots(hop)
+        hop.genop("direct_call", [self.collect_step_ptr, self.c_const_gc],
+                  resultvar=op.result)
+        self.pop_roots(hop, livevars)
+
     def gct_gc_can_move(self, hop):
         op = hop.spaceop
         v_addr = hop.genop('cast_ptr_to_adr',
@@ -1122,6 +1142,25 @@ class BaseFrameworkGCTransformer(GCTransformer):
                                   self.c_const_gc,
                                   v_size])
 
+    def gct_gc_get_stats(self, hop):
+        [v_stats_no] = hop.spaceop.args
+        hop.genop("direct_call", [self.get_stats_ptr, self.c_const_gc,
+                                  v_stats_no],
+                  resultvar=hop.spaceop.result)
+
+    def gct_gc_set_alloc_sample_period(self, hop):
+        [v_nbytes] = hop.spaceop.args
+        hop.genop("direct_call", [self.set_alloc_sample_period_ptr,
+                                  self.c_const_gc,
+                                  v_nbytes])
+
+    def gct_gc_get_size_class_stats(self, hop):
+        [v_size_class, v_stats_no] = hop.spaceop.args
+        hop.genop("direct_call", [self.get_size_class_stats_ptr,
+                                  self.c_const_gc,
+                                  v_size_class, v_stats_no],
+                  resultvar=hop.spaceop.result)
+
     def gct_gc_pin(self, hop):
         if not hasattr(self, 'pin_ptr'):
             c_false = rmodel.inputconst(lltype.Bool, False)
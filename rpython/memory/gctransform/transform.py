@@ -381,6 +381,26 @@ class BaseGCTransformer(object):
         # this assumes a non-moving GC.  Moving GCs need to override this
         hop.rename('cast_ptr_to_int')
 
+    def gct_gc__collect_step(self, hop):
+        # non-incremental GCs: do a full collection, and return True
+        hop.genop("gc__collect", [])
+        hop.genop("same_as",
+                  [rmodel.inputconst(lltype.Bool, True)],
+                  resultvar=hop.spaceop.result)
+
+    def gct_gc_get_stats(self, hop):
+        hop.genop("same_as",
+                  [rmodel.inputconst(lltype.Signed, 0)],
+                  resultvar=hop.spaceop.result)
+
+    def gct_gc_get_size_class_stats(self, hop):
+        hop.genop("same_as",
+                  [rmodel.inputconst(lltype.Signed, 0)],
+                  resultvar=hop.spaceop.result)
+
+    def gct_gc_set_alloc_sample_period(self, hop):
+        pass
+
     def gct_gc_heap_stats(self, hop):
         from rpython.memory.gc.base import ARRAY_TYPEID_MAP
 
@@ -135,6 +135,18 @@ class GCManagedHeap(object):
     def collect(self, *gen):
         self.gc.collect(*gen)
 
+    def collect_step(self):
+        return self.gc.collect_step()
+
+    def get_stats(self, stats_no):
+        return self.gc.get_stats(stats_no)
+
+    def get_size_class_stats(self, size_class, stats_no):
+        return self.gc.get_size_class_stats(size_class, stats_no)
+
+    def set_alloc_sample_period(self, nbytes):
+        self.gc.set_alloc_sample_period(nbytes)
+
     def can_move(self, addr):
         return self.gc.can_move(addr)
 
@@ -39,6 +39,22 @@ class TestIncrementalMiniMarkGC(test_minimark_gc.TestMiniMarkGC):
         res = self.interpret(f, [])
         assert res == True
 
+    def test_collect_step(self):
+        class A(object):
+            pass
+        def f():
+            a = A()
+            a.x = 5
+            llop.gc__collect(lltype.Void)   # make everything old
+            n = 1
+            while not rgc.collect_step():
+                n += 1
+            assert a.x == 5
+            return n
+        res = self.interpret(f, [])
+        # at least SCANNING, MARKING, SWEEPING and FINALIZING
+        assert res >= 4
+
     def test_pin_weakref_not_implemented(self):
         import weakref
         class A:
@@ -7,8 +7,10 @@ from rpython.annotator import model as annmodel
 from rpython.rtyper.llannotation import SomePtr
 from rpython.rtyper.lltypesystem import lltype, llmemory, rffi, llgroup
 from rpython.memory.gctransform import framework, shadowstack
+from rpython.memory.gc.hook import GcHooks
 from rpython.rtyper.lltypesystem.lloperation import llop, void
 from rpython.rlib.objectmodel import compute_unique_id, we_are_translated
+from rpython.rlib.nonconst import NonConstant
 from rpython.rlib.debug import ll_assert
 from rpython.rlib import rgc
 from rpython.conftest import option
@@ -46,6 +48,7 @@ ARGS = lltype.FixedSizeArray(lltype.Signed, 3)
 
 class GCTest(object):
     gcpolicy = None
+    gchooks = None
     GC_CAN_MOVE = False
     taggedpointers = False
 
@@ -112,7 +115,8 @@ class GCTest(object):
                 fixup(t)
 
         cbuild = CStandaloneBuilder(t, entrypoint, config=t.config,
-                                    gcpolicy=cls.gcpolicy)
+                                    gcpolicy=cls.gcpolicy,
+                                    gchooks=cls.gchooks)
         cbuild.make_entrypoint_wrapper = False
         db = cbuild.build_database()
         entrypointptr = cbuild.getentrypointptr()
@@ -1388,8 +1392,58 @@ class TestMiniMarkGC(TestHybridGC):
         assert res([]) == 0
 
 
+class GcHooksStats(object):
+    minors = 0
+    steps = 0
+    collects = 0
+    alloc_samples = 0
+
+    def reset(self):
+        # the NonConstant are needed so that the annotator annotates the
+        # fields as a generic SomeInteger(), instead of a constant 0.
+        self.minors = NonConstant(0)
+        self.steps = NonConstant(0)
+        self.collects = NonConstant(0)
+        self.alloc_samples = NonConstant(0)
+
+
+class MyGcHooks(GcHooks):
+
+    def __init__(self, stats=None):
+        self.stats = stats or GcHooksStats()
+
+    def is_gc_minor_enabled(self):
+        return True
+
+    def is_gc_collect_step_enabled(self):
+        return True
+
+    def is_gc_collect_enabled(self):
+        return True
+
+    def is_gc_alloc_sample_enabled(self):
+        return True
+
+    def on_gc_minor(self, duration, total_memory_used, pinned_objects,
+                    surviving_size):
+        self.stats.minors += 1
+
+    def on_gc_collect_step(self, duration, oldstate, newstate):
+        self.stats.steps += 1
+
+    def on_gc_collect(self, num_major_collects,
+                      arenas_count_before, arenas_count_after,
+                      arenas_bytes, rawmalloc_bytes_before,
+                      rawmalloc_bytes_after):
+        self.stats.collects += 1
+
+    def on_gc_alloc_sample(self, size):
+        self.stats.alloc_samples += 1
+
+
 class TestIncrementalMiniMarkGC(TestMiniMarkGC):
     gcname = "incminimark"
+    gchooks = MyGcHooks()
 
     class gcpolicy(gc.BasicFrameworkGcPolicy):
         class transformerclass(shadowstack.ShadowStackFrameworkGCTransformer):
@@ -1438,6 +1492,146 @@ class TestIncrementalMiniMarkGC(TestMiniMarkGC):
         res = run([])
         assert res
 
+    def define_collect_step(cls):
+        class A(object):
+            pass
+        def f():
+            a = A()
+            a.x = 42
+            n = 1
+            while not rgc.collect_step():
+                n += 1
+            return a.x * 1000 + n
+        return f
+
+    def test_collect_step(self):
+        run = self.runner("collect_step")
+        res = run([])
+        assert res // 1000 == 42
+        assert res % 1000 >= 4
+
+    def define_get_stats(cls):
+        def f():
+            return (rgc.get_stats(rgc.MARKING_STEP_BUDGET) > 0 and
+                    rgc.get_stats(rgc.SWEEPING_STEP_BUDGET) > 0 and
+                    rgc.get_stats(rgc.MAX_PAUSE_TARGET) == 0)
+        return f
+
+    def test_get_stats(self):
+        run = self.runner("get_stats")
+        res = run([])
+        assert res
+
+    def define_get_memory_stats(cls):
+        S = lltype.GcStruct('S', ('x', lltype.Signed))
+        def f():
+            lst = [lltype.malloc(S) for i in range(100)]
+            llop.gc__collect(lltype.Void)
+            nclasses = rgc.get_stats(rgc.NUM_SIZE_CLASSES)
+            pages = 0
+            used = 0
+            total = 0
+            for i in range(1, nclasses + 1):
+                pages += rgc.get_size_class_stats(i, rgc.SIZE_CLASS_PAGES)
+                used += rgc.get_size_class_stats(i,
+                                                 rgc.SIZE_CLASS_USED_BLOCKS)
+                total += rgc.get_size_class_stats(i,
+                                                  rgc.SIZE_CLASS_TOTAL_BLOCKS)
+            return (len(lst) == 100 and nclasses > 0 and
+                    pages == rgc.get_stats(rgc.ARENA_PAGES_USED) and
+                    pages > 0 and used >= 100 and used <= total and
+                    rgc.get_stats(rgc.ARENA_PAGES_FREE) >= 0 and
+                    rgc.get_stats(rgc.NURSERY_SIZE) > 0 and
+                    rgc.get_stats(rgc.NUM_MAJOR_COLLECTS) >= 1 and
+                    rgc.get_stats(rgc.NUM_MINOR_COLLECTS) >= 1 and
+                    rgc.get_stats(rgc.TOTAL_MEMORY_USED) > 0)
+        return f
+
+    def test_get_memory_stats(self):
+        run = self.runner("get_memory_stats")
+        res = run([])
+        assert res
+
+    def define_compact(cls):
+        import weakref
+        class A(object):
+            pass
+        def f():
+            lst = []
+            for i in range(200):
+                a = A()
+                a.x = i
+                lst.append(a)
+            llop.gc__collect(lltype.Void)
+            keep = [lst[i] for i in range(0, 200, 10)]
+            lst = None
+            for i in range(len(keep) - 1):
+                keep[i].next = keep[i + 1]
+            ref = weakref.ref(keep[3])
+            h = compute_identity_hash(keep[5])
+            rgc.collect_and_compact()
+            ok = (ref() is keep[3] and
+                  compute_identity_hash(keep[5]) == h and
+                  rgc.get_stats(rgc.NUM_MAJOR_COLLECTS) >= 1)
+            for i in range(len(keep)):
+                ok = ok and keep[i].x == i * 10
+                if i < len(keep) - 1:
+                    ok = ok and keep[i].next is keep[i + 1]
+            return ok
+        return f
+
+    def test_compact(self):
+        run = self.runner("compact")
+        res = run([])
+        assert res
+
+    def define_gc_hooks(cls):
+        gchooks = cls.gchooks
+        # it is important that we fish .stats OUTSIDE f(); we cannot see
+        # gchooks from within RPython code
+        stats = gchooks.stats
+        def f():
+            # start from a known state, in case an earlier test left a
+            # major collection in progress
+            llop.gc__collect(lltype.Void)
+            stats.reset()
+            # trigger two major collections
+            llop.gc__collect(lltype.Void)
+            llop.gc__collect(lltype.Void)
+            return (10000 * stats.collects +
+                      100 * stats.steps +
+                        1 * stats.minors)
+        return f
+
+    def test_gc_hooks(self):
+        run = self.runner("gc_hooks")
+        count = run([])
+        assert count == (2 * 10000) + (8 * 100) + 8
+
+    def define_alloc_sample(cls):
+        stats = cls.gchooks.stats
+        S = lltype.GcStruct('S', ('x', lltype.Signed))
+        def f():
+            stats.reset()
+            size = llmemory.raw_malloc_usage(llmemory.sizeof(S)) + WORD
+            rgc.set_alloc_sample_period(10 * size)
+            for i in range(100):
+                lltype.malloc(S)
+            rgc.set_alloc_sample_period(0)
+            samples = stats.alloc_samples
+            for i in range(50):
+                lltype.malloc(S)
+            return samples * 100 + stats.alloc_samples
+        return f
+
+    def test_alloc_sample(self):
+        run = self.runner("alloc_sample")
+        res = run([])
+        # one sample every 11 objects; there are a few extra allocations
+        # around the loop
+        assert res // 100 == res % 100
+        assert 9 <= res % 100 <= 10
+
 # ________________________________________________________________
 # tagged pointers
 
@@ -545,6 +545,16 @@ PARAMETER_DOCS = {
     'trace_limit': 'number of recorded operations before we abort tracing with ABORT_TOO_LONG',
     'inlining': 'inline python functions or not (1/0)',
     'loop_longevity': 'a parameter controlling how long loops will be kept before being freed, an estimate',
+    'jit_code_max_bytes': 'if not 0, the size of machine code above which '
+                          'the least recently entered loops are freed '
+                          '(an estimate: a loop that is still referenced, '
+                          'e.g. as the target of a bridge, is counted as '
+                          'freed but its code is kept)',
+    'defer_compilation': 'if 1, loops and bridges that become hot are not '
+                         'traced until it is set back to 0 (1/0)',
+    'max_bridges': 'if not 0, the number of bridges attached to a loop '
+                   'after which the loop is discarded and traced again '
+                   '(only once per loop)',
     'retrace_limit': 'how many times we can try retracing before giving up',
     'max_retrace_guards': 'number of extra guards a retrace can cause',
     'max_unroll_loops': 'number of extra unrollings a loop can cause',
@@ -566,6 +576,9 @@ PARAMETERS = {'threshold': 1039, # just above 1024, prime
               'trace_limit': 6000,
               'inlining': 1,
               'loop_longevity': 1000,
+              'jit_code_max_bytes': 0,
+              'defer_compilation': 0,
+              'max_bridges': 0,
               'retrace_limit': 0,
               'max_retrace_guards': 15,
               'max_unroll_loops': 0,
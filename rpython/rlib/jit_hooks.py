@@ -9,8 +9,13 @@ from rpython.flowspace.model import Constant
 from rpython.rtyper import rclass
 
 
-def register_helper(s_result):
+def register_helper(s_result, with_warmrunnerdesc=False):
+    """Helpers whose name starts with 'stats_', or registered with
+    'with_warmrunnerdesc=True', are called with the warmrunnerdesc as
+    their first argument; callers pass None for it."""
     def wrapper(helper):
+        if with_warmrunnerdesc:
+            helper._with_warmrunnerdesc_ = True
         class Entry(ExtRegistryEntry):
             _about_ = helper
 
@@ -137,6 +142,60 @@ def stats_asmmemmgr_allocated(warmrunnerdesc):
 def stats_asmmemmgr_used(warmrunnerdesc):
     return warmrunnerdesc.metainterp_sd.cpu.asmmemmgr.get_stats()[1]
 
+LOOP_STATS_CONTAINER = lltype.GcArray(lltype.Struct('loop_stats',
+                                                    ('number', lltype.Signed),
+                                                    ('entries', lltype.Signed)))
+
+GUARD_STATS_CONTAINER = lltype.GcArray(lltype.Struct('guard_stats',
+                                                     ('guard', lltype.Signed),
+                                                     ('loop', lltype.Signed),
+                                                     ('failures', lltype.Signed)))
+
+@register_helper(annmodel.s_None)
+def stats_set_loop_counters(warmrunnerdesc, flag):
+    warmrunnerdesc.loop_stats.set_enabled(flag)
+
+@register_helper(lltype.Ptr(LOOP_STATS_CONTAINER))
+def stats_get_loop_entries(warmrunnerdesc):
+    d = warmrunnerdesc.loop_stats.loop_entries
+    l = lltype.malloc(LOOP_STATS_CONTAINER, len(d))
+    i = 0
+    for number, entries in d.iteritems():
+        l[i].number = number
+        l[i].entries = entries
+        i += 1
+    return l
+
+@register_helper(annmodel.SomeString(can_be_None=True))
+def stats_get_loop_location(warmrunnerdesc, number):
+    return llstr(warmrunnerdesc.loop_stats.loop_locations.get(number, None))
+
+@register_helper(lltype.Ptr(GUARD_STATS_CONTAINER))
+def stats_get_guard_failures(warmrunnerdesc):
+    loop_stats = warmrunnerdesc.loop_stats
+    d = loop_stats.guard_failures
+    l = lltype.malloc(GUARD_STATS_CONTAINER, len(d))
+    i = 0
+    for guard, failures in d.iteritems():
+        l[i].guard = guard
+        l[i].loop = loop_stats.guard_loops[guard]
+        l[i].failures = failures
+        i += 1
+    return l
+
+@register_helper(annmodel.SomeInteger())
+def stats_memmgr_evicted_loops(warmrunnerdesc):
+    return warmrunnerdesc.memory_manager.evicted_loops
+
+@register_helper(annmodel.SomeInteger())
+def stats_memmgr_evicted_bytes(warmrunnerdesc):
+    return warmrunnerdesc.memory_manager.evicted_bytes
+
+@register_helper(annmodel.s_None, with_warmrunnerdesc=True)
+def freeze_jit_code(warmrunnerdesc):
+    warmrunnerdesc.memory_manager.freeze()
+    warmrunnerdesc.metainterp_sd.cpu.freeze_code()
+
 # ---------------------- jitcell interface ----------------------
 
 def _new_hook(name, resulttype):
@@ -14,11 +14,40 @@ from rpython.rtyper.lltypesystem import lltype, llmemory
 
 collect = gc.collect
 
+def collect_step():
+    """
+    If the GC is incremental, run a single gc-collect-step.  Return True
+    when this step completes a major collection cycle, i.e. when the GC
+    is back to the state where no major collection is in progress.
+
+    If the GC is not incremental, do a full collection and return True.
+    """
+    collect()
+    return True
+
+def collect_and_compact():
+    """
+    Do a full collection, then move the surviving objects out of the
+    sparsely used pages of memory, so that these pages can be returned
+    to the OS.  Objects whose address was exposed, e.g. because their
+    id() or identityhash() was taken, are never moved.
+
+    If the GC doesn't support compaction, this is just a full collection.
+    """
+    collect()
+
 def set_max_heap_size(nbytes):
     """Limit the heap size to n bytes.
     """
     pass
 
+def set_alloc_sample_period(nbytes):
+    """Allocation sampling: call the GC hook on_gc_alloc_sample() each
+    time 'nbytes' have been allocated in the nursery, or stop doing so if
+    'nbytes' is 0.  Ignored by the GCs that don't support it.
+    """
+    pass
+
 # for test purposes we allow objects to be pinned and use
 # the following list to keep track of the pinned objects
 _pinned_objects = []
@@ -124,6 +153,104 @@ class CollectEntry(ExtRegistryEntry):
             args_v = hop.inputargs(lltype.Signed)
         return hop.genop('gc__collect', args_v, resulttype=hop.r_result)
 
+# The statistics that can be asked with get_stats().  Times are
+# in microseconds, sizes in bytes.
+(MAX_PAUSE_TARGET,          # the target of PYPY_GC_MAX_PAUSE, or 0
+ LAST_PAUSE,                # soft real-time mode: duration of the last pause
+ LONGEST_PAUSE,             # soft real-time mode: longest pause so far
+ MARKING_STEP_BUDGET,       # bytes marked in one major collection step
+ SWEEPING_STEP_BUDGET,      # arena pages swept in one major collection step
+ NURSERY_SIZE,              # size of the nursery
+ NURSERY_USED,              # bytes currently allocated in the nursery
+ ARENA_PAGE_SIZE,           # size of the pages holding small old objects
+ ARENA_PAGES_USED,          # number of pages holding small old objects
+ ARENA_PAGES_FREE,          # number of free pages in the allocated arenas
+ RAWMALLOCED_TOTAL,         # total size of the large old objects
+ TOTAL_MEMORY_USED,         # total size of the old objects
+ NUM_MINOR_COLLECTS,        # number of minor collections so far
+ NUM_MAJOR_COLLECTS,        # number of major collections so far
+ TOTAL_MINOR_TIME,          # total time spent in minor collections
+ TOTAL_MAJOR_TIME,          # total time spent in major collection steps
+ NUM_SIZE_CLASSES,          # size classes are 1..N, see get_size_class_stats
+ ARENA_BYTES_RETAINED,      # empty arenas kept for reuse (PYPY_GC_ARENA_RETAIN)
+ ARENA_BYTES_RELEASED,      # total size of the arenas returned to the OS
+ NURSERY_MAX_SIZE,          # adaptive nursery mode: the maximum size, or 0
+ NURSERY_SURVIVAL_RATE,     # adaptive nursery mode: average fraction of
+                            # the nursery surviving, in millionths
+ NUM_NURSERY_RESIZES,       # adaptive nursery mode: number of resizes so far
+) = range(22)
+
+# The statistics that can be asked with get_size_class_stats(), for the
+# small objects of size 'size_class * WORD'.
+(SIZE_CLASS_PAGES,          # number of pages holding objects of this size
+ SIZE_CLASS_USED_BLOCKS,    # number of objects of this size
+ SIZE_CLASS_TOTAL_BLOCKS,   # number of objects that fit in these pages
+) = range(3)
+
+def get_stats(stats_no):
+    """Return one of the statistics of the GC listed above, as an
+    integer.  GCs that don't track a given statistic return 0.
+    """
+    return 0
+
+class GetStatsEntry(ExtRegistryEntry):
+    _about_ = get_stats
+
+    def compute_result_annotation(self, s_stats_no):
+        from rpython.annotator import model as annmodel
+        return annmodel.SomeInteger()
+
+    def specialize_call(self, hop):
+        [v_stats_no] = hop.inputargs(lltype.Signed)
+        hop.exception_cannot_occur()
+        return hop.genop('gc_get_stats', [v_stats_no],
+                         resulttype=lltype.Signed)
+
+def get_size_class_stats(size_class, stats_no):
+    """Return one of the SIZE_CLASS_* statistics of the GC, for the
+    small objects of size 'size_class * WORD'.  The difference between
+    the total and the used blocks measures the fragmentation.  GCs that
+    don't allocate small objects this way return 0.
+    """
+    return 0
+
+class GetSizeClassStatsEntry(ExtRegistryEntry):
+    _about_ = get_size_class_stats
+
+    def compute_result_annotation(self, s_size_class, s_stats_no):
+        from rpython.annotator import model as annmodel
+        return annmodel.SomeInteger()
+
+    def specialize_call(self, hop):
+        args_v = hop.inputargs(lltype.Signed, lltype.Signed)
+        hop.exception_cannot_occur()
+        return hop.genop('gc_get_size_class_stats', args_v,
+                         resulttype=lltype.Signed)
+
+class CollectStepEntry(ExtRegistryEntry):
+    _about_ = collect_step
+
+    def compute_result_annotation(self):
+        from rpython.annotator import model as annmodel
+        return annmodel.SomeBool()
+
+    def specialize_call(self, hop):
+        hop.exception_cannot_occur()
+        return hop.genop('gc__collect_step', [], resulttype=hop.r_result)
+
+class CollectAndCompactEntry(ExtRegistryEntry):
+    _about_ = collect_and_compact
+
+    def compute_result_annotation(self):
+        from rpython.annotator import model as annmodel
+        return annmodel.s_None
+
+    def specialize_call(self, hop):
+        hop.exception_cannot_occur()
+        # gen=3 means a full collection followed by a compaction
+        c_gen = hop.inputconst(lltype.Signed, 3)
+        return hop.genop('gc__collect', [c_gen], resulttype=hop.r_result)
+
 class SetMaxHeapSizeEntry(ExtRegistryEntry):
     _about_ = set_max_heap_size
 
@@ -137,6 +264,19 @@ class SetMaxHeapSizeEntry(ExtRegistryEntry):
         return hop.genop('gc_set_max_heap_size', [v_nbytes],
                          resulttype=lltype.Void)
 
+class SetAllocSamplePeriodEntry(ExtRegistryEntry):
+    _about_ = set_alloc_sample_period
+
+    def compute_result_annotation(self, s_nbytes):
+        from rpython.annotator import model as annmodel
+        return annmodel.s_None
+
+    def specialize_call(self, hop):
+        [v_nbytes] = hop.inputargs(lltype.Signed)
+        hop.exception_cannot_occur()
+        return hop.genop('gc_set_alloc_sample_period', [v_nbytes],
+                         resulttype=lltype.Void)
+
 def can_move(p):
     """Check if the GC object 'p' is at an address that can move.
     Must not be called with None.  With non-moving GCs, it is always False.
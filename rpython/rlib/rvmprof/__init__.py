@@ -35,5 +35,11 @@ def get_unique_id(code):
 def enable(fileno, interval):
     _get_vmprof().enable(fileno, interval)
 
+def enable_alloc(fileno, period):
+    _get_vmprof().enable_alloc(fileno, period)
+
+def sample_stack_now():
+    _get_vmprof().sample_stack_now()
+
 def disable():
     _get_vmprof().disable()
@@ -42,6 +42,12 @@ def setup():
     vmprof_enable = rffi.llexternal("vmprof_enable", [], rffi.INT,
                                     compilation_info=eci,
                                     save_err=rffi.RFFI_SAVE_ERRNO)
+    vmprof_enable_alloc = rffi.llexternal("vmprof_enable_alloc", [], rffi.INT,
+                                          compilation_info=eci)
+    vmprof_sample_stack_now = rffi.llexternal("vmprof_sample_stack_now",
+                                              [], rffi.INT,
+                                              compilation_info=eci,
+                                              _nowrapper=True)
     vmprof_disable = rffi.llexternal("vmprof_disable", [], rffi.INT,
                                      compilation_info=eci,
                                      save_err=rffi.RFFI_SAVE_ERRNO)
@@ -33,7 +33,7 @@ class FakeWeakCodeObjectList(object):
 
 class VMProf(object):
 
-    _immutable_fields_ = ['is_enabled?']
+    _immutable_fields_ = ['is_enabled?', 'is_alloc_enabled?']
 
     use_weaklist = True # False for tests
 
@@ -48,6 +48,7 @@ class VMProf(object):
 
     def _cleanup_(self):
         self.is_enabled = False
+        self.is_alloc_enabled = False
 
     @jit.dont_look_inside
     @specialize.argtype(1)
@@ -142,6 +143,40 @@ class VMProf(object):
             raise VMProfError(os.strerror(rposix.get_saved_errno()))
         self.is_enabled = True
 
+    @jit.dont_look_inside
+    def enable_alloc(self, fileno, period):
+        """Enable vmprof in allocation sampling mode.  Writes go to the
+        given 'fileno'.  Instead of sampling the stack at regular time
+        intervals, a sample is written each time 'period' bytes have been
+        allocated by the GC: this requires the GC hooks to call
+        sample_stack_now() from on_gc_alloc_sample().
+        Raises VMProfError if something goes wrong.
+        """
+        assert fileno >= 0
+        if self.is_enabled:
+            raise VMProfError("vmprof is already enabled")
+        if period <= 0:
+            raise VMProfError("bad value for 'period'")
+
+        # the interval written in the header is not used in this mode
+        p_error = self.cintf.vmprof_init(fileno, 0.001, "pypy")
+        if p_error:
+            raise VMProfError(rffi.charp2str(p_error))
+
+        self._gather_all_code_objs()
+        self.cintf.vmprof_enable_alloc()
+        self.is_enabled = True
+        self.is_alloc_enabled = True
+        rgc.set_alloc_sample_period(period)
+
+    @rgc.no_collect
+    def sample_stack_now(self):
+        """Write a sample of the current stack, in allocation sampling
+        mode.  Called from the GC hooks, so it must not allocate.
+        """
+        if self.is_alloc_enabled:
+            self.cintf.vmprof_sample_stack_now()
+
     @jit.dont_look_inside
     def disable(self):
         """Disable vmprof.
@@ -149,6 +184,9 @@ class VMProf(object):
         """
         if not self.is_enabled:
             raise VMProfError("vmprof is not enabled")
+        if self.is_alloc_enabled:
+            rgc.set_alloc_sample_period(0)
+            self.is_alloc_enabled = False
         self.is_enabled = False
         res = self.cintf.vmprof_disable()
         if res < 0:
@@ -7,6 +7,8 @@ typedef long intptr_t;
 RPY_EXTERN char *vmprof_init(int, double, char *);
 RPY_EXTERN void vmprof_ignore_signals(int);
 RPY_EXTERN int vmprof_enable(void);
+RPY_EXTERN int vmprof_enable_alloc(void);
+RPY_EXTERN int vmprof_sample_stack_now(void);
 RPY_EXTERN int vmprof_disable(void);
 RPY_EXTERN int vmprof_register_virtual_function(char *, long, int);
 RPY_EXTERN void* vmprof_stack_new(void);
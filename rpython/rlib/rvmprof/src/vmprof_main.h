@@ -112,6 +112,32 @@ static void segfault_handler(int arg)
     longjmp(restore_point, SIGSEGV);
 }
 
+static int write_stack_sample(intptr_t pc)
+{
+    int depth;
+    int fd = profile_file;
+    struct profbuf_s *p;
+    struct prof_stacktrace_s *st;
+    assert(fd >= 0);
+
+    p = reserve_buffer(fd);
+    if (p == NULL)
+        return -1;
+    st = (struct prof_stacktrace_s *)p->data;
+    st->marker = MARKER_STACKTRACE;
+    st->count = 1;
+    depth = get_stack_trace(get_vmprof_stack(), st->stack,
+                            MAX_STACK_DEPTH-2, pc);
+    st->depth = depth;
+    st->stack[depth++] = get_current_thread_id();
+    p->data_offset = offsetof(struct prof_stacktrace_s, marker);
+    p->data_size = (depth * sizeof(void *) +
+                    sizeof(struct prof_stacktrace_s) -
+                    offsetof(struct prof_stacktrace_s, marker));
+    commit_buffer(fd, p);
+    return 0;
+}
+
 static void sigprof_handler(int sig_nr, siginfo_t* info, void *ucontext)
 {
 #ifdef __APPLE__
@@ -143,35 +169,29 @@ static void sigprof_handler(int sig_nr, siginfo_t* info, void *ucontext)
 
     if ((val & 1) == 0) {
         int saved_errno = errno;
-        int fd = profile_file;
-        assert(fd >= 0);
-
-        struct profbuf_s *p = reserve_buffer(fd);
-        if (p == NULL) {
-            /* ignore this signal: there are no free buffers right now */
-        }
-        else {
-            int depth;
-            struct prof_stacktrace_s *st = (struct prof_stacktrace_s *)p->data;
-            st->marker = MARKER_STACKTRACE;
-            st->count = 1;
-            depth = get_stack_trace(get_vmprof_stack(), st->stack,
-                MAX_STACK_DEPTH-2, GetPC((ucontext_t*)ucontext));
-            st->depth = depth;
-            st->stack[depth++] = get_current_thread_id();
-            p->data_offset = offsetof(struct prof_stacktrace_s, marker);
-            p->data_size = (depth * sizeof(void *) +
-                            sizeof(struct prof_stacktrace_s) -
-                            offsetof(struct prof_stacktrace_s, marker));
-            commit_buffer(fd, p);
-        }
-
+        /* if there are no free buffers right now, ignore this signal */
+        write_stack_sample(GetPC((ucontext_t*)ucontext));
         errno = saved_errno;
     }
 
     __sync_sub_and_fetch(&signal_handler_value, 2L);
 }
 
+RPY_EXTERN
+int vmprof_sample_stack_now(void)
+{
+    /* Write a sample of the stack of the current thread now.  Used in
+       allocation sampling mode, see vmprof_enable_alloc(). */
+    int result = 0;
+    long val = __sync_fetch_and_add(&signal_handler_value, 2L);
+
+    if ((val & 1) == 0)
+        result = write_stack_sample(0);
+
+    __sync_sub_and_fetch(&signal_handler_value, 2L);
+    return result;
+}
+
 
 /* *************************************************************
  * the setup and teardown functions
@@ -291,6 +311,17 @@ int vmprof_enable(void)
     return -1;
 }
 
+RPY_EXTERN
+int vmprof_enable_alloc(void)
+{
+    /* Allocation sampling mode: no timer, the samples are taken by
+       explicit calls to vmprof_sample_stack_now() */
+    assert(profile_file >= 0);
+    profile_interval_usec = 0;
+    vmprof_ignore_signals(0);
+    return 0;
+}
+
 static int _write_all(const char *buf, size_t bufsize)
 {
     while (bufsize > 0) {
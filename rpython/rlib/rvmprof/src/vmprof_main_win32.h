@@ -156,6 +156,33 @@ int vmprof_enable(void)
     return 0;
 }
 
+RPY_EXTERN
+int vmprof_enable_alloc(void)
+{
+    /* no sampling thread: the samples are taken by explicit calls to
+       vmprof_sample_stack_now() */
+    return 0;
+}
+
+RPY_EXTERN
+int vmprof_sample_stack_now(void)
+{
+    char buf[SINGLE_BUF_SIZE];
+    prof_stacktrace_s *stack = (prof_stacktrace_s*)buf;
+    long depth;
+
+    depth = get_stack_trace(get_vmprof_stack(), stack->stack,
+                            MAX_STACK_DEPTH-2, 0);
+    stack->depth = depth;
+    stack->stack[depth++] = GetCurrentThreadId();
+    stack->count = 1;
+    stack->marker = MARKER_STACKTRACE;
+    return _write_all((char*)stack + offsetof(prof_stacktrace_s, marker),
+                      depth * sizeof(void *) +
+                      sizeof(struct prof_stacktrace_s) -
+                      offsetof(struct prof_stacktrace_s, marker));
+}
+
 RPY_EXTERN
 int vmprof_disable(void)
 {
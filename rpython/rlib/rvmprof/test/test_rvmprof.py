@@ -147,3 +147,64 @@ def test_enable():
     finally:
         assert os.path.exists(tmpfilename)
         os.unlink(tmpfilename)
+
+
+def test_enable_alloc():
+
+    class MyCode:
+        pass
+    def get_name(code):
+        return 'py:code:52:x'
+    try:
+        rvmprof.register_code_object_class(MyCode, get_name)
+    except rvmprof.VMProfPlatformUnsupported as e:
+        py.test.skip(str(e))
+
+    @rvmprof.vmprof_execute_code("xcode1", lambda code, num: code)
+    def main(code, num):
+        for i in range(num):
+            rvmprof.sample_stack_now()
+        return num
+
+    tmpfilename = str(udir.join('test_rvmprof_alloc'))
+
+    def f():
+        if NonConstant(False):
+            # Hack to give os.open() the correct annotation
+            os.open('foo', 1, 1)
+        code = MyCode()
+        rvmprof.register_code(code, get_name)
+        fd = os.open(tmpfilename, os.O_WRONLY | os.O_CREAT | os.O_TRUNC,
+                     0666)
+        rvmprof.enable_alloc(fd, 4096)
+        main(code, 5)
+        rvmprof.disable()
+        rvmprof.sample_stack_now()     # ignored
+        os.close(fd)
+        return 0
+
+    def count_samples(filename):
+        import struct
+        WORD = struct.calcsize('l')
+        s = open(filename, 'rb').read()
+        i = 5 * WORD     # header
+        assert s[i] == '\x05'
+        i += 4 + ord(s[i + 3])
+        samples = 0
+        while s[i] != '\x03':
+            if s[i] == '\x01':
+                _, depth = struct.unpack('ll', s[i + 1:i + 1 + 2 * WORD])
+                i += 1 + 2 * WORD + (depth + 1) * WORD
+                samples += 1
+            else:
+                assert s[i] == '\x02'
+                _, size = struct.unpack('ll', s[i + 1:i + 1 + 2 * WORD])
+                i += 1 + 2 * WORD + size
+        return samples
+
+    assert f() == 0
+    assert count_samples(tmpfilename) == 5
+    fn = compile(f, [], gcpolicy="minimark")
+    assert fn() == 0
+    assert count_samples(tmpfilename) == 5
+    os.unlink(tmpfilename)
@@ -39,6 +39,67 @@ def test_collect_0():
 
     assert res is None
 
+def test_collect_step():
+    def f():
+        return rgc.collect_step()
+
+    t, typer, graph = gengraph(f, [])
+    ops = list(graph.iterblockops())
+    assert len(ops) == 1
+    op = ops[0][1]
+    assert op.opname == 'gc__collect_step'
+    assert len(op.args) == 0
+
+    res = interpret(f, [])
+
+    assert res is True
+
+def test_collect_and_compact():
+    def f():
+        return rgc.collect_and_compact()
+
+    t, typer, graph = gengraph(f, [])
+    ops = list(graph.iterblockops())
+    assert len(ops) == 1
+    op = ops[0][1]
+    assert op.opname == 'gc__collect'
+    assert len(op.args) == 1
+    assert op.args[0].value == 3
+
+    res = interpret(f, [])
+
+    assert res is None
+
+def test_get_stats():
+    def f():
+        return rgc.get_stats(rgc.LAST_PAUSE)
+
+    t, typer, graph = gengraph(f, [])
+    ops = list(graph.iterblockops())
+    assert len(ops) == 1
+    op = ops[0][1]
+    assert op.opname == 'gc_get_stats'
+    assert op.args[0].value == rgc.LAST_PAUSE
+
+    res = interpret(f, [])
+
+    assert res == 0
+
+def test_get_size_class_stats():
+    def f(i):
+        return rgc.get_size_class_stats(i, rgc.SIZE_CLASS_PAGES)
+
+    t, typer, graph = gengraph(f, [int])
+    ops = list(graph.iterblockops())
+    assert len(ops) == 1
+    op = ops[0][1]
+    assert op.opname == 'gc_get_size_class_stats'
+    assert op.args[1].value == rgc.SIZE_CLASS_PAGES
+
+    res = interpret(f, [2])
+
+    assert res == 0
+
 def test_can_move():
     T0 = lltype.GcStruct('T')
     T1 = lltype.GcArray(lltype.Float)
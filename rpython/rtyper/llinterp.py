@@ -816,6 +816,9 @@ class LLFrame(object):
     def op_gc__collect(self, *gen):
         self.heap.collect(*gen)
 
+    def op_gc__collect_step(self):
+        return self.heap.collect_step()
+
     def op_gc_heap_stats(self):
         raise NotImplementedError
 
@@ -895,6 +898,15 @@ class LLFrame(object):
     def op_gc_set_max_heap_size(self, maxsize):
         raise NotImplementedError("gc_set_max_heap_size")
 
+    def op_gc_get_stats(self, stats_no):
+        return self.heap.get_stats(stats_no)
+
+    def op_gc_get_size_class_stats(self, size_class, stats_no):
+        return self.heap.get_size_class_stats(size_class, stats_no)
+
+    def op_gc_set_alloc_sample_period(self, nbytes):
+        self.heap.set_alloc_sample_period(nbytes)
+
     def op_gc_asmgcroot_static(self, index):
         raise NotImplementedError("gc_asmgcroot_static")
 
@@ -5,7 +5,9 @@ from rpython.rtyper.lltypesystem.llmemory import weakref_create, weakref_deref
 
 setfield = setattr
 from operator import setitem as setarrayitem
-from rpython.rlib.rgc import can_move, collect, add_memory_pressure
+from rpython.rlib.rgc import can_move, collect_step, get_stats
+from rpython.rlib.rgc import get_size_class_stats, set_alloc_sample_period
+from rpython.rlib.rgc import add_memory_pressure
 
 def setinterior(toplevelcontainer, inneraddr, INNERTYPE, newvalue,
                 offsets=None):
@@ -15,6 +17,12 @@ def setinterior(toplevelcontainer, inneraddr, INNERTYPE, newvalue,
 
 from rpython.rtyper.lltypesystem.lltype import cast_ptr_to_int as gc_id
 
+def collect(gen=2):
+    # the host's gc.collect() doesn't know about gen=3 (full collection
+    # followed by a compaction)
+    import gc
+    gc.collect(min(gen, 2))
+
 def weakref_create_getlazy(objgetter):
     return weakref_create(objgetter())
 
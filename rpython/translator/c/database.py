@@ -31,13 +31,14 @@ class LowLevelDatabase(object):
                  gcpolicyclass=None,
                  exctransformer=None,
                  thread_enabled=False,
-                 sandbox=False):
+                 sandbox=False,
+                 gchooks=None):
         self.translator = translator
         self.standalone = standalone
         self.sandbox    = sandbox
         if gcpolicyclass is None:
             gcpolicyclass = gc.RefcountingGcPolicy
-        self.gcpolicy = gcpolicyclass(self, thread_enabled)
+        self.gcpolicy = gcpolicyclass(self, thread_enabled, gchooks)
         self.exctransformer = exctransformer
 
         self.structdefnodes = {}
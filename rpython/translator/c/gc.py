@@ -8,9 +8,10 @@ from rpython.translator.tool.cbuild import ExternalCompilationInfo
 
 class BasicGcPolicy(object):
 
-    def __init__(self, db, thread_enabled=False):
+    def __init__(self, db, thread_enabled=False, gchooks=None):
         self.db = db
         self.thread_enabled = thread_enabled
+        self.gchooks = gchooks
 
     def common_gcheader_definition(self, defnode):
         if defnode.db.gctransformer is not None:
@@ -304,7 +305,7 @@ class BasicFrameworkGcPolicy(BasicGcPolicy):
 
     def gettransformer(self, translator):
         if hasattr(self, 'transformerclass'):    # for rpython/memory tests
-            return self.transformerclass(translator)
+            return self.transformerclass(translator, gchooks=self.gchooks)
         raise NotImplementedError
 
     def struct_setup(self, structdefnode, rtti):
@@ -441,7 +442,8 @@ class ShadowStackFrameworkGcPolicy(BasicFrameworkGcPolicy):
 
     def gettransformer(self, translator):
         from rpython.memory.gctransform import shadowstack
-        return shadowstack.ShadowStackFrameworkGCTransformer(translator)
+        return shadowstack.ShadowStackFrameworkGCTransformer(translator,
+                                                        gchooks=self.gchooks)
 
     def enter_roots_frame(self, funcgen, (c_gcdata, c_numcolors)):
         numcolors = c_numcolors.value
@@ -486,7 +488,8 @@ class AsmGcRootFrameworkGcPolicy(BasicFrameworkGcPolicy):
 
     def gettransformer(self, translator):
         from rpython.memory.gctransform import asmgcroot
-        return asmgcroot.AsmGcRootFrameworkGCTransformer(translator)
+        return asmgcroot.AsmGcRootFrameworkGCTransformer(translator,
+                                                        gchooks=self.gchooks)
 
     def GC_KEEPALIVE(self, funcgen, v):
         return 'pypy_asm_keepalive(%s);' % funcgen.expr(v)
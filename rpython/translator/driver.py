@@ -311,6 +311,13 @@ class TranslationDriver(SimpleTaskEngine):
                     continue
                 annotator.build_types(func, inputtypes, False)
 
+        gchooks = self.extra.get('get_gchooks', lambda: None)()
+        if gchooks is not None:
+            # the GC hooks are only called by the GC, which is annotated
+            # much later: annotate them now, with the rest of the program
+            func, inputtypes = gchooks.get_annotation_entry_point()
+            annotator.build_types(func, inputtypes, False)
+
         if self.entry_point:
             s = annotator.build_types(self.entry_point, self.inputtypes)
             translator.entry_point_graph = annotator.bookkeeper.getdesc(self.entry_point).getuniquegraph()
@@ -413,11 +420,13 @@ class TranslationDriver(SimpleTaskEngine):
             translator.frozen = True
 
         standalone = self.standalone
+        get_gchooks = self.extra.get('get_gchooks', lambda: None)
+        gchooks = get_gchooks()
 
         if standalone:
             from rpython.translator.c.genc import CStandaloneBuilder
             cbuilder = CStandaloneBuilder(self.translator, self.entry_point,
-                                          config=self.config,
+                                          config=self.config, gchooks=gchooks,
                       secondary_entrypoints=
                       self.secondary_entrypoints + annotated_jit_entrypoints)
         else:
@@ -426,7 +435,8 @@ class TranslationDriver(SimpleTaskEngine):
             cbuilder = CLibraryBuilder(self.translator, self.entry_point,
                                        functions=functions,
                                        name='libtesting',
-                                       config=self.config)
+                                       config=self.config,
+                                       gchooks=gchooks)
         if not standalone:     # xxx more messy
             cbuilder.modulename = self.extmod_name
         database = cbuilder.build_database()